@@ -0,0 +1,159 @@
+"""Controlo de admissão das escritas mais disputadas (`POST /events`, `.../inscrever`, ...).
+
+Numa abertura de inscrições os clientes repetem os pedidos em ciclo; sem controlo, cada
+repetição espera por uma thread e por uma ligação do pool e as leituras públicas ficam na
+mesma fila. As rotas marcadas com `Depends(admitir)` passam por três verificações antes
+de o handler tocar na base de dados, pela ordem:
+
+1. Pedidos em curso na rota: acima de `admission_max_concurrency` (ou do valor da rota em
+   `admission_route_concurrency`) responde 503 logo, sem esperar por vaga.
+2. Ocupação do pool do primário: a partir de `admission_max_pool_usage` responde 503; as
+   ligações que sobram ficam para as leituras e para as escritas já admitidas.
+3. Token bucket por utilizador (claim `id` do JWT) e rota: `admission_user_rate` pedidos
+   por segundo, em rajadas até `admission_user_burst`. Esgotado, responde 429 com
+   `Retry-After` igual ao tempo até haver uma ficha. Vem em último para que um 503 não
+   gaste fichas: quem repete depois do `Retry-After` não leva 429 por trabalho não feito.
+
+O estado é de cada processo (com N workers o débito por utilizador chega a N vezes o
+configurado) e só é mexido no event loop, por isso dispensa locks. As recusas aparecem em
+`http_request_duration_seconds` com `status` 429 ou 503.
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+from . import db as app_db
+from .auth import verify_token
+from .config import settings
+
+
+class Baldes:
+    """Token buckets por chave, num LRU limitado a `max_chaves` entradas.
+
+    Uma chave esquecida volta com o balde cheio, o mesmo que teria ao fim de
+    `rajada / taxa` segundos parada.
+    """
+
+    def __init__(self, taxa: float, rajada: int, max_chaves: int):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.max_chaves = max_chaves
+        self._baldes: OrderedDict[tuple, tuple[float, float]] = OrderedDict()
+
+    def retirar(self, chave: tuple, agora: float) -> float:
+        """Gasta uma ficha; devolve 0 ou os segundos até haver uma (sem gastar)."""
+        balde = self._baldes.pop(chave, None)
+        if balde is None:
+            fichas = float(self.rajada)
+        else:
+            fichas = min(float(self.rajada), balde[0] + (agora - balde[1]) * self.taxa)
+        espera = 0.0
+        if fichas >= 1:
+            fichas -= 1
+        else:
+            espera = (1 - fichas) / self.taxa
+        self._baldes[chave] = (fichas, agora)
+        if len(self._baldes) > self.max_chaves:
+            self._baldes.popitem(last=False)
+        return espera
+
+    def __len__(self) -> int:
+        return len(self._baldes)
+
+
+def _concorrencia_rotas(valor: str | None) -> dict[str, int]:
+    """`"POST /events=8,POST /events/{id}/inscrever=16"` -> {rota: limite}."""
+    limites = {}
+    for item in (valor or "").split(","):
+        if item.strip():
+            rota, _, limite = item.rpartition("=")
+            limites[" ".join(rota.split())] = int(limite)
+    return limites
+
+
+class Admissao:
+    """Limites de admissão de um processo (ver docstring do módulo)."""
+
+    def __init__(
+        self,
+        taxa: float,
+        rajada: int,
+        max_utilizadores: int,
+        concorrencia: int,
+        concorrencia_rotas: dict[str, int] | None = None,
+        max_uso_pool: float = 1.0,
+        retry_after: int = 1,
+    ):
+        self.baldes = Baldes(taxa, rajada, max_utilizadores)
+        self.concorrencia = concorrencia
+        self.concorrencia_rotas = concorrencia_rotas or {}
+        self.max_uso_pool = max_uso_pool
+        self.retry_after = retry_after
+        self.em_curso: dict[str, int] = {}
+
+    def limite(self, rota: str) -> int:
+        return self.concorrencia_rotas.get(rota, self.concorrencia)
+
+    def _pool_saturado(self) -> bool:
+        eng = app_db.current_engine()
+        pool = app_db.pool_status(eng) if eng is not None else None
+        return pool is not None and pool["usage"] >= self.max_uso_pool
+
+    def verificar(self, rota: str, user_id, agora: float) -> None:
+        """Levanta 503/429 se o pedido não deve entrar; não reserva a vaga."""
+        if self.em_curso.get(rota, 0) >= self.limite(rota) or self._pool_saturado():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serviço sobrecarregado. Tente novamente mais tarde.",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        if user_id is not None:
+            espera = self.baldes.retirar((user_id, rota), agora)
+            if espera:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Demasiados pedidos. Tente novamente mais tarde.",
+                    headers={"Retry-After": str(math.ceil(espera))},
+                )
+
+
+def criar() -> Admissao:
+    """`Admissao` com os limites de `settings`."""
+    return Admissao(
+        settings.admission_user_rate,
+        settings.admission_user_burst,
+        settings.admission_max_users,
+        settings.admission_max_concurrency,
+        _concorrencia_rotas(settings.admission_route_concurrency),
+        settings.admission_max_pool_usage,
+        settings.admission_retry_after_seconds,
+    )
+
+
+controlo = criar()
+
+
+def _utilizador(request: Request):
+    # Token inválido: não há balde; o verify_token do handler responde 401
+    try:
+        return verify_token(request.headers.get("authorization")).get("id")
+    except HTTPException:
+        return None
+
+
+async def admitir(request: Request):
+    """Dependência das rotas controladas: admite o pedido e ocupa uma vaga até ao fim."""
+    if not settings.admission_enabled:
+        yield
+        return
+    admissao = controlo
+    rota = f"{request.method} {request.scope['route'].path}"
+    admissao.verificar(rota, _utilizador(request), time.monotonic())
+    admissao.em_curso[rota] = admissao.em_curso.get(rota, 0) + 1
+    try:
+        yield
+    finally:
+        admissao.em_curso[rota] -= 1
@@ -0,0 +1,365 @@
+"""Outbox transacional e feed de alterações (`GET /events/changes`, `/events/changes/stream`).
+
+Cada escrita de eventos ou inscrições em `main.py` chama `registar`, que insere as linhas
+em `alteracoes` na mesma transação: uma alteração só aparece no feed se a escrita foi
+confirmada, e nenhuma escrita confirmada fica sem a sua alteração.
+
+O `Difusor` de cada processo é o único leitor do outbox: enquanto há subscritores (pedidos
+de long-poll ou streams SSE) uma tarefa lê `seq > último` a cada
+`CHANGES_POLL_INTERVAL_SECONDS`, ou logo após um commit deste processo, guarda as
+alterações num buffer circular e acorda todos os subscritores. Mil clientes à escuta
+custam uma query por intervalo, não mil. Só quem pede um `since` anterior ao buffer vai à
+base de dados diretamente.
+
+Os `seq` são atribuídos no INSERT mas ficam visíveis no COMMIT, que pode chegar por outra
+ordem: um buraco na sequência é uma transação ainda aberta (ou desfeita). O difusor só
+entrega alterações contíguas e espera até `CHANGES_GAP_TIMEOUT_SECONDS` por um buraco
+antes de o saltar, para um cliente que retoma com `since` não perder nada. Os buracos
+saltados continuam a ser vigiados durante `CHANGES_GAP_RESCAN_SECONDS`: uma alteração que
+aparece lá depois é republicada com um `seq` novo (`republicar`) e chega a todos, também a
+quem retoma com `since`. Um commit ainda mais tardio não é entregue.
+
+`python -m app.alteracoes` apaga as alterações mais antigas que
+`CHANGES_RETENTION_HOURS`, em lotes por intervalo de `seq`. Um `since` anterior ao que
+ficou retido responde 410: o cliente recarrega o estado e retoma a partir de `next`.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import db as app_db
+from .config import settings
+from .models import Alteracao
+from .serialization import alteracao_out
+
+logger = logging.getLogger(__name__)
+
+
+def registar(
+    db: Session,
+    entidade: str,
+    acao: str,
+    evento_id: int,
+    status: str | None = None,
+    user_ids: Iterable[int] | None = None,
+) -> None:
+    """Insere as alterações de uma escrita (uma por utilizador nas escritas em lote)."""
+    linhas = [
+        {
+            "entidade": entidade,
+            "acao": acao,
+            "evento_id": evento_id,
+            "user_id": user_id,
+            "status": status,
+        }
+        for user_id in (user_ids if user_ids is not None else (None,))
+    ]
+    _inserir(db, linhas)
+
+
+def registar_eventos(db: Session, acao: str, evento_ids: Iterable[int], status: str) -> None:
+    """Insere uma alteração por evento, para escritas que mudam vários eventos de uma vez."""
+    linhas = [
+        {"entidade": "evento", "acao": acao, "evento_id": evento_id, "status": status}
+        for evento_id in evento_ids
+    ]
+    _inserir(db, linhas)
+
+
+def _inserir(db: Session, linhas: list[dict]) -> None:
+    if not linhas:
+        return
+    db.execute(insert(Alteracao), linhas)
+    if not db.info.get("alteracoes"):
+        # Depois do commit o difusor deste processo lê logo, sem esperar pelo intervalo
+        db.info["alteracoes"] = True
+        event.listen(db, "after_commit", _apos_commit, once=True)
+
+
+def _apos_commit(session: Session) -> None:
+    session.info.pop("alteracoes", None)
+    difusor.acordar()
+
+
+def ultima(db: Session) -> int:
+    """`seq` da alteração mais recente (0 sem alterações)."""
+    return db.execute(select(func.max(Alteracao.seq))).scalar() or 0
+
+
+def ler(db: Session, depois: int, ate: int | None, limite: int) -> list[dict]:
+    """Alterações com `depois < seq <= ate`, por ordem."""
+    stmt = select(*alteracao_out.columns).where(Alteracao.seq > depois)
+    if ate is not None:
+        stmt = stmt.where(Alteracao.seq <= ate)
+    return alteracao_out.many(db.execute(stmt.order_by(Alteracao.seq).limit(limite)))
+
+
+def recuperar(db: Session, depois: int, ate: int, limite: int) -> list[dict] | None:
+    """Como `ler`, ou None se alterações depois de `depois` já foram compactadas."""
+    primeira = db.execute(select(func.min(Alteracao.seq))).scalar()
+    if primeira is not None and depois < primeira - 1:
+        return None
+    return ler(db, depois, ate, limite)
+
+
+def republicar(db: Session, intervalos: list[tuple[int, int]]) -> int:
+    """Muda para o fim do outbox as alterações que apareceram em buracos já saltados.
+
+    Quem já passou o buraco não volta a ler abaixo do seu `seq`; com um `seq` novo a
+    alteração é entregue como qualquer outra. Só um processo consegue apagar a linha
+    original, por isso cada alteração é republicada uma vez. Devolve quantas mudou.
+    """
+    atrasadas = db.execute(
+        select(Alteracao.__table__).where(
+            or_(*(Alteracao.seq.between(inicio, fim) for inicio, fim in intervalos))
+        )
+    ).mappings().all()
+    mudadas = 0
+    for linha in atrasadas:
+        if db.execute(delete(Alteracao).where(Alteracao.seq == linha["seq"])).rowcount:
+            db.execute(insert(Alteracao).values({**linha, "seq": None}))
+            mudadas += 1
+    db.commit()
+    if mudadas:
+        logger.info(f"{mudadas} alterações confirmadas depois do buraco, republicadas")
+    return mudadas
+
+
+class Difusor:
+    """Lê o outbox uma vez por intervalo e distribui as alterações aos subscritores."""
+
+    def __init__(
+        self,
+        capacidade: int,
+        intervalo: float,
+        espera_buracos: float,
+        reexame_buracos: float = 300.0,
+        ocioso: float = 30.0,
+    ):
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self.espera_buracos = espera_buracos
+        self.reexame_buracos = reexame_buracos
+        # Continua a ler durante `ocioso` segundos sem subscritores: os clientes de long-poll
+        # voltam a pedir logo a seguir e encontram o buffer em dia
+        self.ocioso = ocioso
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reiniciar()
+
+    def _reiniciar(self) -> None:
+        self._esquecer()
+        self.subscritores = 0
+        self._ultimo_uso = 0.0
+        self._buraco: tuple[int, float] | None = None
+        # Buracos saltados (primeiro seq, último seq, quando), vigiados por `_reexaminar`
+        self._saltados: list[tuple[int, int, float]] = []
+        self._tarefa: asyncio.Task | None = None
+        self._nova = asyncio.Event()
+        self._acordar = asyncio.Event()
+        self._arranque = asyncio.Lock()
+
+    def _esquecer(self) -> None:
+        # O buffer tem todas as alterações com base < seq <= confirmado
+        self.recentes: deque[dict] = deque()
+        self.base: int | None = None
+        self.confirmado: int | None = None
+
+    def acordar(self) -> None:
+        """Pede uma leitura imediata (seguro a partir de qualquer thread)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed() and self._tarefa is not None:
+            loop.call_soon_threadsafe(self._acordar.set)
+
+    @asynccontextmanager
+    async def subscrever(self):
+        """Mantém a leitura do outbox ativa enquanto o subscritor estiver dentro do bloco."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._reiniciar()
+        async with self._arranque:
+            if self.confirmado is None:
+                # Começa no fim do outbox: o que já lá estava vem da base de dados se pedido
+                self.base = self.confirmado = await app_db.run_in_session(ultima)
+        self.subscritores += 1
+        if self._tarefa is None or self._tarefa.done():
+            # Contexto vazio: as leituras não contam nas métricas do pedido que a arrancou
+            self._tarefa = asyncio.create_task(self._correr(), context=contextvars.Context())
+        try:
+            yield self
+        finally:
+            self.subscritores -= 1
+            self._ultimo_uso = time.monotonic()
+
+    async def _correr(self) -> None:
+        while self.subscritores or time.monotonic() - self._ultimo_uso < self.ocioso:
+            self._acordar.clear()
+            try:
+                mais = await self._ler()
+            except Exception:
+                logger.exception("Leitura do outbox falhou")
+                mais = False
+            if mais:
+                continue
+            try:
+                await asyncio.wait_for(self._acordar.wait(), self.intervalo)
+            except TimeoutError:
+                pass
+        # Sem leituras o buffer deixa de estar em dia: o próximo subscritor recomeça no fim
+        self._esquecer()
+        self._tarefa = None
+
+    async def _reexaminar(self, agora: float) -> None:
+        vigiados = []
+        for inicio, fim, desde in self._saltados:
+            if agora - desde < self.reexame_buracos:
+                vigiados.append((inicio, fim, desde))
+            else:
+                logger.warning(f"Alterações {inicio}..{fim} nunca chegaram; deixam de ser vigiadas")
+        self._saltados = vigiados
+        if vigiados:
+            await app_db.run_in_session(republicar, [(inicio, fim) for inicio, fim, _ in vigiados])
+
+    async def _ler(self) -> bool:
+        """Acrescenta ao buffer as alterações contíguas; True se pode haver mais por ler."""
+        await self._reexaminar(time.monotonic())
+        linhas = await app_db.run_in_session(ler, self.confirmado, None, self.capacidade)
+        agora = time.monotonic()
+        esperado = self.confirmado + 1
+        novas = []
+        for alteracao in linhas:
+            if alteracao["seq"] != esperado:
+                if self._buraco is None or self._buraco[0] != esperado:
+                    self._buraco = (esperado, agora)
+                if agora - self._buraco[1] < self.espera_buracos:
+                    break
+                logger.info(f"Alterações {esperado}..{alteracao['seq'] - 1} em falta, a saltar")
+                self._saltados.append((esperado, alteracao["seq"] - 1, agora))
+            self._buraco = None
+            novas.append(alteracao)
+            esperado = alteracao["seq"] + 1
+        if not novas:
+            return False
+
+        for alteracao in novas:
+            if len(self.recentes) >= self.capacidade:
+                self.base = self.recentes.popleft()["seq"]
+            self.recentes.append(alteracao)
+        self.confirmado = novas[-1]["seq"]
+        nova, self._nova = self._nova, asyncio.Event()
+        nova.set()
+        return len(linhas) == self.capacidade and len(novas) == len(linhas)
+
+    def _em_memoria(self, depois: int, limite: int) -> list[dict]:
+        # Os seq do buffer são crescentes: salta os já vistos pelo cliente
+        saida = []
+        for alteracao in reversed(self.recentes):
+            if alteracao["seq"] <= depois:
+                break
+            saida.append(alteracao)
+        return saida[::-1][:limite]
+
+    async def proximas(self, depois: int, limite: int, espera: float) -> list[dict] | None:
+        """Alterações depois de `depois`, esperando até `espera` segundos se ainda não há.
+
+        Devolve None se `depois` é anterior às alterações retidas (compactadas).
+        """
+        prazo = time.monotonic() + espera
+        while True:
+            if depois < self.base:
+                return await app_db.run_in_session(recuperar, depois, self.confirmado, limite)
+            alteracoes = self._em_memoria(depois, limite)
+            restante = prazo - time.monotonic()
+            if alteracoes or restante <= 0:
+                return alteracoes
+            try:
+                await asyncio.wait_for(self._nova.wait(), restante)
+            except TimeoutError:
+                pass
+
+
+difusor = Difusor(
+    settings.changes_buffer_size,
+    settings.changes_poll_interval_seconds,
+    settings.changes_gap_timeout_seconds,
+    settings.changes_gap_rescan_seconds,
+)
+
+
+def sem_utilizadores(alteracoes: list[dict]) -> list[dict]:
+    """Alterações sem o `user_id`, para quem não é admin."""
+    return [{**alteracao, "user_id": None} for alteracao in alteracoes]
+
+
+async def sse(depois: int | None, completo: bool) -> AsyncIterator[str]:
+    """Corpo de `GET /events/changes/stream`: uma mensagem SSE por alteração (`id` = seq).
+
+    A ligação termina ao fim de `CHANGES_STREAM_MAX_SECONDS`; o cliente volta a ligar com
+    `Last-Event-ID` e continua onde ficou.
+    """
+    fim = time.monotonic() + settings.changes_stream_max_seconds
+    async with difusor.subscrever():
+        if depois is None:
+            depois = difusor.confirmado
+        # Também põe os cabeçalhos a caminho antes da primeira alteração
+        yield f"retry: {int(settings.changes_poll_interval_seconds * 1000)}\n\n"
+        while (restante := fim - time.monotonic()) > 0:
+            espera = min(settings.changes_heartbeat_seconds, restante)
+            lista = await difusor.proximas(depois, 500, espera)
+            if lista is None:
+                # Já compactado: o cliente recarrega o estado e continua a partir do fim
+                depois = difusor.confirmado
+                yield f"id: {depois}\nevent: reset\ndata: {{}}\n\n"
+                continue
+            if not lista:
+                yield ": keep-alive\n\n"
+                continue
+            for alteracao in lista if completo else sem_utilizadores(lista):
+                yield (
+                    f"id: {alteracao['seq']}\n"
+                    f"event: {alteracao['entidade']}.{alteracao['acao']}\n"
+                    f"data: {json.dumps(alteracao)}\n\n"
+                )
+            depois = lista[-1]["seq"]
+
+
+def compactar(conn: Connection, retencao: timedelta, lote: int) -> int:
+    """Apaga as alterações mais antigas que `retencao`, `lote` a `lote`; devolve quantas."""
+    agora = conn.execute(select(func.now())).scalar_one()
+    corte = conn.execute(
+        select(func.max(Alteracao.seq)).where(Alteracao.created_at < agora - retencao)
+    ).scalar()
+    conn.commit()
+    apagadas = 0
+    while corte is not None:
+        inicio = conn.execute(select(func.min(Alteracao.seq))).scalar()
+        if inicio is None or inicio > corte:
+            break
+        # Transações curtas, por intervalo da chave primária
+        fim = min(corte, inicio + lote - 1)
+        apagadas += conn.execute(delete(Alteracao).where(Alteracao.seq <= fim)).rowcount
+        conn.commit()
+    return apagadas
+
+
+if __name__ == "__main__":
+    from .db import create_sync_engine
+
+    with create_sync_engine().connect() as connection:
+        apagadas = compactar(
+            connection,
+            timedelta(hours=settings.changes_retention_hours),
+            settings.changes_compaction_batch,
+        )
+    print(f"{apagadas} alterações apagadas")
@@ -1,3 +1,8 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from typing import Any, Dict
 
 from fastapi import Header, HTTPException, status
@@ -6,6 +11,62 @@ from jose import JWTError, jwt
 from .config import settings
 
 
+class _VerifiedTokenCache:
+    """LRU de claims já verificados, indexado pelo SHA-256 do token.
+
+    Cada entrada expira no `exp` do token ou ao fim de `ttl` segundos, o que vier
+    primeiro (segundo `relogio`, em segundos Unix como o `exp`). Se `settings.jwt_secret`
+    mudar, a cache é esvaziada antes de ser usada.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, relogio: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.relogio = relogio
+        self._data: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._secret = settings.jwt_secret
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_secret(self) -> None:
+        if self._secret != settings.jwt_secret:
+            self._data.clear()
+            self._secret = settings.jwt_secret
+
+    def get(self, key: bytes) -> dict[str, Any] | None:
+        with self._lock:
+            self._check_secret()
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= self.relogio():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: bytes, claims: dict[str, Any]) -> None:
+        expires_at = self.relogio() + self.ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        with self._lock:
+            self._check_secret()
+            self._data[key] = (expires_at, dict(claims))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_token_cache = _VerifiedTokenCache(settings.jwt_cache_size, settings.jwt_cache_ttl_seconds)
+
+
 def _unauthorized(detail: str):
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
 
@@ -25,12 +86,20 @@ def verify_token(authorization: str | None = Header(default=None)) -> Dict[str,
 
     token = parts[1]
 
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
         decoded = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
-        return decoded
     except JWTError:
         _unauthorized("Token inválido ou expirado.")
 
+    if _token_cache.max_entries > 0:
+        _token_cache.put(key, decoded)
+    return decoded
+
 
 def require_organizador(user: Dict[str, Any]) -> Dict[str, Any]:
     """Verifica se o utilizador é Organizador ou Admin."""
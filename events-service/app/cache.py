@@ -0,0 +1,241 @@
+"""Cache de leitura para os endpoints públicos de eventos.
+
+Guarda eventos já serializados (`EventoOut` em modo JSON) e páginas de listagem, com os
+cabeçalhos ETag/Last-Modified da resposta (app/condicionais.py). Cada evento e o conjunto
+das listagens têm uma marca aleatória guardada na própria cache, que entra na chave das
+entradas. Invalidar é trocar a marca: as entradas antigas ficam inalcançáveis (e expiram
+pelo TTL) sem ter de as enumerar.
+
+O handler lê a marca antes de ler a base de dados e guarda o resultado com essa marca. Uma
+leitura que começou antes de uma escrita e termina depois da invalidação guarda a página
+antiga com a marca antiga, onde nunca é servida. Uma marca que desaparece (TTL, LRU) é
+substituída por outra nova, o que só custa misses.
+
+Se o backend falha ao trocar uma marca, a invalidação fica pendente e é repetida antes de
+cada leitura; até conseguir, este processo não serve nem guarda entradas.
+
+Backends:
+- `MemoryCache`: LRU + TTL no próprio processo (cada worker tem a sua cópia; o TTL limita
+  o tempo em que outro worker pode servir dados antigos).
+- `RedisCache`: qualquer cliente compatível com redis-py (`get`, `set`, `delete`),
+  partilhado entre workers.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from .config import settings
+from .db import redis_errors, run_blocking
+
+logger = logging.getLogger(__name__)
+
+_MARCA_LISTAS = "eventos:lista:marca"
+# As marcas duram mais do que as entradas: uma marca que expira deixa órfãs as que a usam
+_TTL_MARCAS_FATOR = 10
+
+
+class MemoryCache:
+    """LRU com expiração por entrada, seguro para uso a partir de várias threads."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Backend sobre o protocolo Redis; falhas do servidor contam como miss.
+
+    `set` devolve False se o servidor falhou, para o `EventCache` não perder invalidações.
+    Com DB_ASYNC os pedidos ao servidor saem do event loop (`run_blocking`). Só as
+    exceções de `redis_errors()` contam como falha; as outras chegam ao handler.
+    """
+
+    def __init__(self, client, ttl: float = 30.0):
+        self.client = client
+        self.ttl = ttl
+        self._erros = redis_errors()
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float = 30.0) -> "RedisCache":
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=0.25), ttl=ttl)
+
+    def get(self, key: str) -> Any | None:
+        try:
+            raw = run_blocking(self.client.get, key)
+        except self._erros as e:
+            logger.warning(f"Cache indisponível: {e}")
+            return None
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        try:
+            expires = max(1, int(self.ttl if ttl is None else ttl))
+            run_blocking(self.client.set, key, json.dumps(value), ex=expires)
+        except self._erros as e:
+            logger.warning(f"Cache indisponível: {e}")
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        try:
+            run_blocking(self.client.delete, key)
+        except self._erros as e:
+            logger.warning(f"Cache indisponível: {e}")
+
+
+class EventCache:
+    """Operações de cache usadas pelos handlers, com contadores de hits/misses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # Marcas que não foi possível trocar (backend em falha), a repetir
+        self._pendentes: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _repor(self) -> bool:
+        """Repete as invalidações pendentes; True se não ficou nenhuma."""
+        if not self._pendentes:
+            return True
+        with self._lock:
+            for chave in list(self._pendentes):
+                if self._nova_marca(chave) is not None:
+                    self._pendentes.discard(chave)
+            return not self._pendentes
+
+    def _nova_marca(self, chave: str) -> str | None:
+        marca = uuid.uuid4().hex
+        ok = self.backend.set(chave, marca, ttl=self.backend.ttl * _TTL_MARCAS_FATOR)
+        return marca if ok else None
+
+    def _marca(self, chave: str) -> str | None:
+        """Marca atual de `chave` (cria uma se não existir); None sem cache utilizável."""
+        if self.backend is None or not self._repor():
+            return None
+        marca = self.backend.get(chave)
+        return marca if marca is not None else self._nova_marca(chave)
+
+    def _trocar(self, chave: str) -> None:
+        if self._nova_marca(chave) is None:
+            with self._lock:
+                self._pendentes.add(chave)
+
+    def _lookup(self, key: str) -> Any | None:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @staticmethod
+    def _marca_evento(evento_id: int) -> str:
+        return f"eventos:{evento_id}:marca"
+
+    @staticmethod
+    def _list_key(marca: str, params: tuple) -> str:
+        parts = ("" if p is None else str(p) for p in params)
+        return f"eventos:lista:{marca}:" + ":".join(parts)
+
+    def marca_evento(self, evento_id: int) -> str | None:
+        """Marca do evento, a ler antes da base de dados e a passar a `get/set_evento`."""
+        return self._marca(self._marca_evento(evento_id))
+
+    def marca_listas(self) -> str | None:
+        """Marca das listagens, a ler antes da base de dados e a passar a `get/set_lista`."""
+        return self._marca(_MARCA_LISTAS)
+
+    def get_evento(self, evento_id: int, marca: str | None) -> dict | None:
+        if marca is None:
+            return None
+        return self._lookup(f"eventos:{evento_id}:{marca}")
+
+    def set_evento(self, evento_id: int, marca: str | None, data: dict) -> None:
+        if marca is not None:
+            self.backend.set(f"eventos:{evento_id}:{marca}", data)
+
+    def get_lista(self, marca: str | None, params: tuple) -> dict | None:
+        """Página de listagem guardada para os parâmetros do pedido (tipo, status, page, ...)."""
+        if marca is None:
+            return None
+        return self._lookup(self._list_key(marca, params))
+
+    def set_lista(self, marca: str | None, params: tuple, data: dict) -> None:
+        if marca is not None:
+            self.backend.set(self._list_key(marca, params), data)
+
+    def invalidate_evento(self, evento_id: int | None = None) -> None:
+        """Invalida um evento (se indicado) e todas as páginas de listagem."""
+        self.invalidate_eventos([] if evento_id is None else [evento_id])
+
+    def invalidate_eventos(self, evento_ids: Iterable[int]) -> None:
+        """Invalida vários eventos e as páginas de listagem uma única vez."""
+        if self.backend is None:
+            return
+        for evento_id in evento_ids:
+            self._trocar(self._marca_evento(evento_id))
+        self._trocar(_MARCA_LISTAS)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def build_cache() -> EventCache:
+    if settings.cache_backend == "redis":
+        if not settings.cache_url:
+            raise ValueError("CACHE_URL é obrigatório com CACHE_BACKEND=redis")
+        return EventCache(RedisCache.from_url(settings.cache_url, ttl=settings.cache_ttl_seconds))
+    if settings.cache_backend == "memory":
+        return EventCache(
+            MemoryCache(max_entries=settings.cache_max_entries, ttl=settings.cache_ttl_seconds)
+        )
+    return EventCache(None)
+
+
+cache = build_cache()
@@ -0,0 +1,209 @@
+"""Ciclo de vida dos eventos: fecha como `concluido` os eventos agendados que já terminaram.
+
+Um evento termina em `data_fim` ou, sem `data_fim`, em `data_inicio`. Cada worker corre um
+`Agendador` (arrancado no lifespan da aplicação) que, a cada `LIFECYCLE_INTERVAL_SECONDS`,
+tenta ficar com o lease `ciclo_vida_eventos` na tabela `arrendamentos`: um UPDATE
+condicional que só tem efeito se o lease é seu ou já expirou. Só o dono do lease fecha
+eventos, e renova-o a cada ciclo; se o worker morrer, outro fica com ele ao fim de
+`LIFECYCLE_LEASE_SECONDS`.
+
+Os eventos são fechados em lotes de `LIFECYCLE_BATCH_SIZE`, cada um na sua transação: um
+SELECT pelos índices `(status, data_fim)` e `(status, data_inicio)` com
+`FOR UPDATE SKIP LOCKED` (uma linha que um pedido está a editar fica para o ciclo
+seguinte, sem esperas) e um UPDATE pela chave primária. Cada lote ajusta os contadores,
+avança a geração das listagens e escreve o outbox, como um `PATCH` a cada evento, e apaga
+as listas de espera dos eventos fechados, que já não vão ter promoções. No fim
+do ciclo `lifecycle_lag_seconds` mostra há quanto tempo terminou o evento mais antigo que
+ficou por fechar (0 quando está tudo em dia).
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import alteracoes, datas, lista_espera, metrics
+from . import db as app_db
+from .config import settings
+from .contadores import ajustar_eventos
+from .models import Arrendamento, Evento
+
+logger = logging.getLogger(__name__)
+
+NOME = "ciclo_vida_eventos"
+
+
+def arrendar(db: Session, nome: str, dono: str, duracao: timedelta) -> bool:
+    """Fica com (ou renova) o lease `nome` durante `duracao`; False se outro o tem.
+
+    Usa o relógio da base de dados, comum a todos os workers.
+    """
+    agora = db.execute(select(func.now())).scalar_one()
+    resultado = db.execute(
+        update(Arrendamento)
+        .where(
+            Arrendamento.nome == nome,
+            or_(
+                Arrendamento.dono == dono,
+                Arrendamento.expira_em.is_(None),
+                Arrendamento.expira_em < agora,
+            ),
+        )
+        .values(dono=dono, expira_em=agora + duracao)
+    )
+    db.commit()
+    return resultado.rowcount == 1
+
+
+def libertar(db: Session, nome: str, dono: str) -> None:
+    """Larga o lease, se ainda for de `dono`, para outro worker ficar logo com ele."""
+    db.execute(
+        update(Arrendamento)
+        .where(Arrendamento.nome == nome, Arrendamento.dono == dono)
+        .values(dono=None, expira_em=None)
+    )
+    db.commit()
+
+
+def _terminados(agora: datetime) -> tuple:
+    # Um ramo por índice, em vez de um OR que nenhum dos dois serve
+    return (
+        (Evento.status == "agendado", Evento.data_fim < agora),
+        (
+            Evento.status == "agendado",
+            Evento.data_inicio < agora,
+            Evento.data_fim.is_(None),
+        ),
+    )
+
+
+def concluir_lote(db: Session, agora: datetime, lote: int) -> list[int]:
+    """Fecha até `lote` eventos terminados numa transação; devolve os ids fechados."""
+    linhas = []
+    for condicoes in _terminados(agora):
+        restantes = lote - len(linhas)
+        if restantes <= 0:
+            break
+        linhas += db.execute(
+            select(Evento.id, Evento.tipo)
+            .where(*condicoes)
+            .limit(restantes)
+            .with_for_update(skip_locked=True)
+        ).all()
+    if not linhas:
+        db.rollback()
+        return []
+
+    ids = [linha.id for linha in linhas]
+    db.execute(
+        update(Evento)
+        .where(Evento.id.in_(ids))
+        .values(status="concluido", versao=Evento.versao + 1)
+        .execution_options(synchronize_session=False)
+    )
+    deltas: Counter = Counter()
+    for linha in linhas:
+        deltas[(linha.tipo, "agendado")] -= 1
+        deltas[(linha.tipo, "concluido")] += 1
+    ajustar_eventos(db, deltas)
+    alteracoes.registar_eventos(db, "atualizado", ids, "concluido")
+    lista_espera.remover_eventos(db, ids)
+    db.commit()
+    return ids
+
+
+def atraso(db: Session, agora: datetime) -> float:
+    """Segundos desde o fim do evento terminado mais antigo ainda por fechar (0 se nenhum)."""
+    fins = [
+        db.execute(select(func.min(Evento.data_fim)).where(*_terminados(agora)[0])).scalar(),
+        db.execute(select(func.min(Evento.data_inicio)).where(*_terminados(agora)[1])).scalar(),
+    ]
+    fins = [fim for fim in fins if fim is not None]
+    return (agora - min(fins)).total_seconds() if fins else 0.0
+
+
+class Agendador:
+    """Fecha os eventos terminados a cada `intervalo` segundos, se tiver o lease."""
+
+    def __init__(
+        self,
+        intervalo: float,
+        lote: int,
+        lotes_por_ciclo: int,
+        duracao_lease: float,
+        nome: str = NOME,
+    ):
+        self.intervalo = intervalo
+        self.lote = lote
+        self.lotes_por_ciclo = lotes_por_ciclo
+        self.duracao_lease = timedelta(seconds=duracao_lease)
+        self.nome = nome
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Estado exposto em /metrics; None enquanto não correr
+        self.lider: bool | None = None
+        self.atraso: float | None = None
+
+    def ciclo(
+        self, db: Session, invalidar: Callable[[Iterable[int]], None] | None = None
+    ) -> int:
+        """Um ciclo: renova o lease e fecha até `lotes_por_ciclo` lotes; devolve quantos."""
+        self.lider = arrendar(db, self.nome, self.dono, self.duracao_lease)
+        if not self.lider:
+            self.atraso = None
+            return 0
+        fechados = 0
+        for _ in range(self.lotes_por_ciclo):
+            inicio = time.perf_counter()
+            ids = concluir_lote(db, datas.agora(), self.lote)
+            metrics.lifecycle_batch_duration.observe(time.perf_counter() - inicio)
+            if ids and invalidar is not None:
+                invalidar(ids)
+            fechados += len(ids)
+            if len(ids) < self.lote:
+                break
+        self.atraso = atraso(db, datas.agora())
+        return fechados
+
+    async def correr(self, invalidar: Callable[[Iterable[int]], None] | None = None):
+        """Ciclo infinito, até a tarefa ser cancelada (fim do lifespan)."""
+        try:
+            while True:
+                try:
+                    fechados = await app_db.run_in_session(self.ciclo, invalidar)
+                    if fechados:
+                        logger.info(f"{fechados} eventos terminados passaram a concluido")
+                except Exception:
+                    logger.exception("Ciclo de vida dos eventos falhou")
+                await asyncio.sleep(self.intervalo)
+        finally:
+            if self.lider:
+                try:
+                    await app_db.run_in_session(libertar, self.nome, self.dono)
+                except Exception:
+                    logger.exception("Não foi possível libertar o lease")
+            self.lider = self.atraso = None
+
+
+agendador = Agendador(
+    settings.lifecycle_interval_seconds,
+    settings.lifecycle_batch_size,
+    settings.lifecycle_max_batches,
+    settings.lifecycle_lease_seconds,
+)
+
+
+if __name__ == "__main__":
+    from .db import SessionLocal, create_sync_engine
+
+    # Um ciclo manual (por exemplo num cron, com LIFECYCLE_ENABLED=false nos workers)
+    with SessionLocal(bind=create_sync_engine()) as session:
+        print(f"{agendador.ciclo(session)} eventos concluídos")
+        libertar(session, agendador.nome, agendador.dono)
@@ -0,0 +1,138 @@
+"""Compressão das respostas (gzip ou brotli), negociada pelo `Accept-Encoding`.
+
+Só comprime corpos de tipos de texto (JSON, NDJSON, CSV, ...) com pelo menos
+`COMPRESSION_MIN_SIZE` bytes: abaixo disso os bytes poupados não pagam o CPU. As
+respostas em streaming (exportações) são comprimidas bloco a bloco, com um flush por
+bloco, para o cliente continuar a receber os dados à medida que são produzidos.
+
+O brotli (`brotli` no requirements.txt) é preferido quando o cliente o aceita com o mesmo
+peso do gzip; sem o pacote instalado só se oferece gzip. Um corpo comprimido leva o ETag
+na forma fraca (`W/"..."`), porque os bytes já não são os da representação original; as
+comparações de `If-None-Match` são fracas e continuam a dar 304.
+"""
+
+import zlib
+from collections.abc import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = ("application/json", "application/x-ndjson", "text/")
+
+
+def _pesos(accept_encoding: str) -> dict[str, float]:
+    pesos = {}
+    for parte in accept_encoding.split(","):
+        nome, _, parametros = parte.partition(";")
+        nome = nome.strip().lower()
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        if nome:
+            pesos[nome] = q
+    return pesos
+
+
+def negociar(accept_encoding: str) -> str | None:
+    """Codificação a usar ("br", "gzip") ou None para enviar sem compressão."""
+    pesos = _pesos(accept_encoding)
+    candidatas = ("br", "gzip") if brotli is not None else ("gzip",)
+    melhor, melhor_q = None, 0.0
+    for nome in candidatas:
+        q = pesos.get(nome, pesos.get("*", 0.0))
+        # Em caso de empate fica a primeira: br antes de gzip
+        if q > melhor_q:
+            melhor, melhor_q = nome, q
+    return melhor
+
+
+def _compressor(codificacao: str, gzip_level: int, brotli_quality: int) -> Callable:
+    """Função (bloco, último) -> bytes comprimidos desse bloco."""
+    if codificacao == "br":
+        comprimir = brotli.Compressor(quality=brotli_quality)
+
+        def bloco_br(dados: bytes, ultimo: bool) -> bytes:
+            saida = comprimir.process(dados)
+            return saida + (comprimir.finish() if ultimo else comprimir.flush())
+
+        return bloco_br
+
+    comprimir = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def bloco_gzip(dados: bytes, ultimo: bool) -> bytes:
+        saida = comprimir.compress(dados)
+        return saida + comprimir.flush(zlib.Z_FINISH if ultimo else zlib.Z_SYNC_FLUSH)
+
+    return bloco_gzip
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime as respostas de texto acima de `minimum_size` bytes."""
+
+    def __init__(self, app, minimum_size: int, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        codificacao = negociar(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacao is None:
+            return await self.app(scope, receive, send)
+
+        inicio = None
+        comprimir = None
+
+        async def send_wrapper(message):
+            nonlocal inicio, comprimir
+            if message["type"] == "http.response.start":
+                # Os cabeçalhos só seguem com o primeiro bloco, quando já se sabe o tamanho
+                inicio = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            corpo = message.get("body", b"")
+            ultimo = not message.get("more_body", False)
+            if inicio is None:
+                # Blocos seguintes de um streaming
+                if comprimir is not None:
+                    message = {**message, "body": comprimir(corpo, ultimo)}
+                return await send(message)
+
+            start, inicio = inicio, None
+            headers = MutableHeaders(raw=start["headers"])
+            tipo = headers.get("content-type", "")
+            if "content-encoding" in headers or not tipo.startswith(TIPOS_COMPRIMIVEIS):
+                await send(start)
+                return await send(message)
+
+            headers.add_vary_header("Accept-Encoding")
+            if ultimo and len(corpo) < self.minimum_size:
+                await send(start)
+                return await send(message)
+
+            comprimir = _compressor(codificacao, self.gzip_level, self.brotli_quality)
+            corpo = comprimir(corpo, ultimo)
+            headers["Content-Encoding"] = codificacao
+            if ultimo:
+                headers["Content-Length"] = str(len(corpo))
+            elif "content-length" in headers:
+                del headers["Content-Length"]
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({**message, "body": corpo})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,83 @@
+"""Pedidos condicionais (ETag / Last-Modified) nas leituras públicas de eventos.
+
+O detalhe de um evento tem o ETag `"<id>.<versao>"` e `Last-Modified` = `updated_at`;
+`versao` muda em cada edição, mesmo duas no mesmo segundo. As páginas de `GET /events` têm
+`"g<geração>"`, a geração das listagens mantida em `app.contadores`. Como os validadores
+vêm de valores já guardados (a cache ou colunas lidas pela chave primária), um pedido com
+`If-None-Match` ou `If-Modified-Since` que ainda corresponde recebe `304` sem serializar o
+corpo e sem ler as restantes colunas do evento.
+"""
+
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request, Response
+
+from .config import settings
+from .serialization import json_response
+
+_CABECALHOS_CONDICIONAIS = ("if-none-match", "if-modified-since")
+
+
+def validadores(etag: str, modificado: datetime | None) -> dict[str, str]:
+    """Cabeçalhos ETag, Last-Modified e Cache-Control de uma resposta."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age}, must-revalidate",
+    }
+    if modificado is not None:
+        # As datas guardadas não têm fuso horário: são tratadas como UTC
+        headers["Last-Modified"] = format_datetime(
+            modificado.replace(tzinfo=UTC, microsecond=0), usegmt=True
+        )
+    return headers
+
+
+def validadores_evento(evento_id: int, versao: int, updated_at: datetime) -> dict[str, str]:
+    return validadores(f'"{evento_id}.{versao}"', updated_at)
+
+
+def validadores_lista(geracao: int, modificado: datetime | None) -> dict[str, str]:
+    return validadores(f'"g{geracao}"', modificado)
+
+
+def condicional(request: Request) -> bool:
+    """O pedido traz pré-condições que podem dar 304."""
+    return any(nome in request.headers for nome in _CABECALHOS_CONDICIONAIS)
+
+
+def _sem_fraco(etag: str) -> str:
+    etag = etag.strip()
+    return etag.removeprefix("W/")
+
+
+def _corresponde(request: Request, headers: dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Com If-None-Match, If-Modified-Since é ignorado (RFC 9110, 13.2.2)
+        if if_none_match.strip() == "*":
+            return True
+        return _sem_fraco(headers["ETag"]) in {_sem_fraco(t) for t in if_none_match.split(",")}
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        return False
+    return parsedate_to_datetime(headers["Last-Modified"]) <= desde
+
+
+def nao_modificado(request: Request, headers: dict[str, str]) -> Response | None:
+    """Resposta 304 se as pré-condições do pedido correspondem aos validadores."""
+    if condicional(request) and _corresponde(request, headers):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def resposta(request: Request, content: Any, headers: dict[str, str]) -> Response:
+    """304 se o cliente já tem esta versão; senão o conteúdo (já em modo JSON)."""
+    return nao_modificado(request, headers) or json_response(content, headers=headers)
@@ -1,14 +1,121 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     jwt_secret: str = "PROJECTS_SECRET"
+    # Cache de tokens já verificados (0 desativa); cada entrada expira no `exp` ou antes
+    jwt_cache_size: int = 4096
+    jwt_cache_ttl_seconds: int = 300
 
     mysql_host: str = "events-db"
     mysql_db: str = "events_db"
     mysql_user: str = "root"
     mysql_password: str = "root"
 
+    # URL SQLAlchemy completa; quando definida substitui os campos mysql_* acima
+    database_url: str | None = None
+    # Usa AsyncSession + driver assíncrono (aiomysql/aiosqlite) em vez da threadpool
+    db_async: bool = False
+
+    # Réplicas de leitura (URLs SQLAlchemy separados por vírgulas); sem réplicas tudo vai
+    # para o primário. Depois de uma escrita, as leituras do mesmo utilizador ficam no
+    # primário durante replica_read_your_writes_seconds; uma réplica que falha a ligação
+    # sai da rotação durante replica_ejection_seconds
+    database_replica_urls: str | None = None
+    replica_read_your_writes_seconds: float = 5.0
+    # Redis onde fica a janela de cada utilizador, partilhada entre workers (por omissão o
+    # CACHE_URL com CACHE_BACKEND=redis); sem Redis a janela é de cada processo
+    replica_writers_url: str | None = None
+    replica_ejection_seconds: float = 30.0
+
+    # Pool de ligações (QueuePool). pre_ping: "always" testa cada checkout (uma ida à base
+    # por pedido), "idle" só as ligações paradas há mais de db_pool_pre_ping_idle_seconds,
+    # "never" confia no pool_recycle
+    db_pool_size: int = 20
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 5.0
+    db_pool_recycle: int = 1800
+    db_pool_use_lifo: bool = True
+    db_pool_pre_ping: Literal["always", "idle", "never"] = "idle"
+    db_pool_pre_ping_idle_seconds: float = 30.0
+
+    # Backoff máximo entre tentativas de ligação no arranque
+    db_connect_max_backoff_seconds: float = 5.0
+    # Aplicar migrações pendentes no arranque (desligar se correm num job à parte)
+    migrate_on_startup: bool = True
+
+    # /health/ready responde 503 acima desta fração de ligações em uso
+    db_ready_max_pool_usage: float = 0.9
+    health_check_timeout_seconds: float = 2.0
+
+    # Cache de leituras públicas: "memory" (LRU por processo), "redis" ou "none"
+    cache_backend: str = "memory"
+    cache_url: str | None = None
+    cache_ttl_seconds: int = 30
+    cache_max_entries: int = 10_000
+    # max-age do Cache-Control de `GET /events` e `GET /events/{id}` (0: revalidar sempre)
+    http_cache_max_age: int = 0
+
+    # Compressão gzip/brotli das respostas de texto a partir deste tamanho (0 desativa)
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Feed de alterações (`GET /events/changes` e `/events/changes/stream`): cada processo lê
+    # o outbox a cada changes_poll_interval_seconds (só com subscritores) e guarda as últimas
+    # changes_buffer_size alterações em memória. Um buraco na sequência (transação ainda
+    # aberta) atrasa a entrega até changes_gap_timeout_seconds; depois é saltado, e uma
+    # alteração que lá apareça até changes_gap_rescan_seconds depois é republicada no fim
+    changes_poll_interval_seconds: float = 1.0
+    changes_buffer_size: int = 10_000
+    changes_gap_timeout_seconds: float = 5.0
+    changes_gap_rescan_seconds: float = 300.0
+    # Espera máxima do long-poll, keep-alive e duração de cada ligação SSE (o cliente volta
+    # a ligar com Last-Event-ID)
+    changes_max_wait_seconds: float = 30.0
+    changes_heartbeat_seconds: float = 15.0
+    changes_stream_max_seconds: float = 300.0
+    # `python -m app.alteracoes`: apaga as alterações com mais de changes_retention_hours,
+    # changes_compaction_batch linhas por transação
+    changes_retention_hours: int = 72
+    changes_compaction_batch: int = 5000
+
+    # Ciclo de vida dos eventos (app/ciclo_vida.py): a cada lifecycle_interval_seconds o
+    # worker com o lease fecha como `concluido` os eventos agendados que já terminaram, em
+    # lotes de lifecycle_batch_size (no máximo lifecycle_max_batches por ciclo). Um lease
+    # não renovado expira ao fim de lifecycle_lease_seconds e passa para outro worker
+    lifecycle_enabled: bool = True
+    lifecycle_interval_seconds: float = 60.0
+    lifecycle_batch_size: int = 500
+    lifecycle_max_batches: int = 20
+    lifecycle_lease_seconds: float = 180.0
+
+    # Controlo de admissão das escritas disputadas (app/admissao.py). Por utilizador e rota:
+    # admission_user_rate pedidos/s com rajadas até admission_user_burst, acima disso 429
+    # (admission_max_users baldes em memória). Por rota: no máximo admission_max_concurrency
+    # pedidos em curso ("ROTA=N,..." em admission_route_concurrency para rotas concretas,
+    # p.ex. "POST /events/{id}/inscrever=16"), e nenhum com o pool do primário acima de
+    # admission_max_pool_usage; acima disso 503. Ambos com Retry-After
+    admission_enabled: bool = True
+    admission_user_rate: float = 2.0
+    admission_user_burst: int = 10
+    admission_max_users: int = 100_000
+    admission_max_concurrency: int = 10
+    admission_route_concurrency: str | None = None
+    admission_max_pool_usage: float = 0.75
+    admission_retry_after_seconds: int = 1
+
+    # Middleware de latência/queries e `GET /metrics` (formato Prometheus)
+    metrics_enabled: bool = True
+
+    # /graphql: profundidade máxima das queries e custo máximo estimado (campos multiplicados
+    # pelo `limit` das listas onde estão)
+    graphql_enabled: bool = True
+    graphql_max_depth: int = 6
+    graphql_max_complexity: int = 5000
+
     class Config:
         env_prefix = ""
 
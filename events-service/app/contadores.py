@@ -0,0 +1,130 @@
+"""Contadores mantidos para o `total` das listagens, em vez de COUNT(*) por página.
+
+Cada escrita em `main.py` ajusta os contadores na mesma transação, através de upserts
+`total = total + delta`. `reconstruir` recalcula tudo a partir das tabelas base
+(`python -m app.contadores`).
+
+Os mesmos ajustes avançam a geração das listagens de eventos (`geracoes_listas`), que dá
+o ETag das páginas de `GET /events`: uma página só muda quando a geração muda.
+"""
+
+from collections import Counter
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import estatisticas
+from .models import ContadorEventos, ContadorInscricoes, Evento, GeracaoListas, Inscricao
+
+_LISTAS_EVENTOS = "eventos"
+
+
+def _incrementar(db: Session, model, keys: dict, delta: int) -> None:
+    table = model.__table__
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(table).values(**keys, total=delta)
+        stmt = stmt.on_duplicate_key_update(total=table.c.total + delta)
+    else:
+        stmt = sqlite.insert(table).values(**keys, total=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys), set_={"total": table.c.total + delta}
+        )
+    db.execute(stmt)
+
+
+def ajustar_eventos(db: Session, deltas: Mapping[tuple[str, str], int]) -> None:
+    """Aplica deltas indexados por (tipo, status) e avança a geração das listagens.
+
+    Chamado em todas as escritas de eventos, mesmo as que não mudam (tipo, status).
+    """
+    for (tipo, status), delta in deltas.items():
+        if delta:
+            _incrementar(db, ContadorEventos, {"tipo": tipo, "status": status}, delta)
+    db.execute(
+        update(GeracaoListas)
+        .where(GeracaoListas.nome == _LISTAS_EVENTOS)
+        .values(geracao=GeracaoListas.geracao + 1)
+    )
+
+
+def ajustar_inscricoes(
+    db: Session, evento_id: int, deltas: Mapping[str, int], valores: Mapping[str, Any]
+) -> None:
+    """Aplica deltas por status às inscrições de um evento e às estatísticas do organizador.
+
+    `valores` é a variação de `valor_pago` por status (ver `estatisticas.ajustar`).
+    """
+    for status, delta in deltas.items():
+        if delta:
+            _incrementar(
+                db, ContadorInscricoes, {"evento_id": evento_id, "status": status}, delta
+            )
+    estatisticas.ajustar(db, evento_id, deltas, valores)
+
+
+def mudanca_evento(antes: tuple[str, str] | None, depois: tuple[str, str] | None) -> Counter:
+    """Deltas para um evento que passa de (tipo, status) `antes` para `depois`."""
+    deltas: Counter = Counter()
+    if antes is not None:
+        deltas[antes] -= 1
+    if depois is not None:
+        deltas[depois] += 1
+    return deltas
+
+
+def total_eventos(db: Session, tipo: str | None, status: str | None) -> int:
+    stmt = select(func.coalesce(func.sum(ContadorEventos.total), 0))
+    if tipo:
+        stmt = stmt.where(ContadorEventos.tipo == tipo)
+    if status:
+        stmt = stmt.where(ContadorEventos.status == status)
+    return int(db.execute(stmt).scalar_one())
+
+
+def total_inscricoes(db: Session, evento_id: int) -> int:
+    stmt = select(func.coalesce(func.sum(ContadorInscricoes.total), 0)).where(
+        ContadorInscricoes.evento_id == evento_id
+    )
+    return int(db.execute(stmt).scalar_one())
+
+
+def geracao_eventos(db: Session) -> tuple[int, datetime | None]:
+    """Geração atual das listagens de eventos e a data da última mudança."""
+    row = db.execute(
+        select(GeracaoListas.geracao, GeracaoListas.updated_at).where(
+            GeracaoListas.nome == _LISTAS_EVENTOS
+        )
+    ).first()
+    return (row.geracao, row.updated_at) if row else (0, None)
+
+
+def reconstruir(conn: Connection) -> None:
+    """Recalcula todos os contadores com SQL por conjuntos."""
+    conn.execute(delete(ContadorEventos))
+    conn.execute(
+        insert(ContadorEventos).from_select(
+            ["tipo", "status", "total"],
+            select(Evento.tipo, Evento.status, func.count()).group_by(Evento.tipo, Evento.status),
+        )
+    )
+    conn.execute(delete(ContadorInscricoes))
+    conn.execute(
+        insert(ContadorInscricoes).from_select(
+            ["evento_id", "status", "total"],
+            select(Inscricao.evento_id, Inscricao.status, func.count())
+            .group_by(Inscricao.evento_id, Inscricao.status),
+        )
+    )
+
+
+if __name__ == "__main__":
+    from .db import create_sync_engine
+
+    with create_sync_engine().begin() as connection:
+        reconstruir(connection)
+    print("Contadores reconstruídos")
@@ -0,0 +1,21 @@
+"""Convenção das datas guardadas: UTC sem fuso horário.
+
+As colunas `DateTime` não guardam o fuso e `Last-Modified` trata-as como UTC. Uma data com
+fuso que chega à API (`...Z`, `...+01:00`) é convertida para UTC e perde o fuso antes de
+ser comparada, subtraída ou escrita; uma data sem fuso já é UTC. O "agora" do código que
+compara com estas colunas é `agora()`, nunca `datetime.now()` (hora local do processo).
+"""
+
+from datetime import UTC, datetime
+
+
+def para_utc(valor: datetime | None) -> datetime | None:
+    """`valor` em UTC sem fuso horário (None fica None)."""
+    if valor is None or valor.tzinfo is None:
+        return valor
+    return valor.astimezone(UTC).replace(tzinfo=None)
+
+
+def agora() -> datetime:
+    """Instante atual em UTC sem fuso horário, comparável com as colunas `DateTime`."""
+    return datetime.now(UTC).replace(tzinfo=None)
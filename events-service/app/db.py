@@ -1,52 +1,535 @@
-import time
+import asyncio
+import functools
+import inspect
+import itertools
 import logging
+import time
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.sql.functions import now
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from starlette.concurrency import run_in_threadpool
 
+from .auth import verify_token
 from .config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Drivers assíncronos equivalentes aos drivers síncronos usados por omissão
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP do SQLite não tem microssegundos nem o formato usado pelo
+    # SQLAlchemy, o que estragaria comparações com parâmetros datetime.
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
 
-def _database_url() -> str:
-    # Keep parity with Node service config/db.js
-    return (
-        f"mysql+pymysql://{settings.mysql_user}:{settings.mysql_password}"
-        f"@{settings.mysql_host}/{settings.mysql_db}?charset=utf8mb4"
+
+def _database_url(async_driver: bool = False, raw_url: str | None = None) -> str:
+    raw_url = raw_url or settings.database_url
+    if raw_url:
+        url = make_url(raw_url)
+    else:
+        # Keep parity with Node service config/db.js
+        url = make_url(
+            f"mysql+pymysql://{settings.mysql_user}:{settings.mysql_password}"
+            f"@{settings.mysql_host}/{settings.mysql_db}?charset=utf8mb4"
+        )
+    if async_driver:
+        url = url.set(drivername=_ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    return url.render_as_string(hide_password=False)
+
+
+def _engine_kwargs(url: str) -> dict:
+    kwargs = {}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # Base em memória: todas as sessões partilham a mesma ligação
+            kwargs["poolclass"] = StaticPool
+            return kwargs
+        if parsed.get_driver_name() == "aiosqlite":
+            # O aiosqlite usa NullPool (uma ligação por sessão): não há pool a dimensionar
+            return kwargs
+    kwargs.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_use_lifo=settings.db_pool_use_lifo,
+        pool_pre_ping=settings.db_pool_pre_ping == "always",
     )
+    return kwargs
+
 
+def _ping_idle_connections(eng, idle_seconds: float) -> None:
+    """Pre-ping só de ligações que estiveram paradas no pool mais de `idle_seconds`.
 
-def create_engine_with_retry(max_retries: int = 10, delay: int = 3):
-    """Cria engine com retry logic para esperar pela base de dados."""
-    for attempt in range(max_retries):
+    As ligações usadas há pouco (o caso normal sob carga) saem do pool sem ida extra à
+    base; as que podem ter sido fechadas pelo servidor (`wait_timeout`) são testadas e,
+    se falharem, o pool troca-as por uma nova (DisconnectionError).
+    """
+
+    @event.listens_for(eng, "checkin")
+    def _checkin(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(eng, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
         try:
-            eng = create_engine(_database_url(), pool_pre_ping=True)
-            # Testa a conexão
-            with eng.connect() as conn:
-                conn.execute(text("SELECT 1"))
-            logger.info("Base de dados conectada com sucesso!")
-            return eng
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
         except Exception as e:
-            remaining = max_retries - attempt - 1
-            logger.warning(f"Conexão falhou. Tentativas restantes: {remaining}. Erro: {e}")
-            if remaining > 0:
-                time.sleep(delay)
-    raise Exception("Não foi possível conectar à base de dados após várias tentativas")
+            raise exc.DisconnectionError() from e
+
+
+def _configure_pool(eng) -> None:
+    sync_engine = getattr(eng, "sync_engine", eng)
+    if settings.db_pool_pre_ping == "idle" and isinstance(sync_engine.pool, QueuePool):
+        _ping_idle_connections(sync_engine, settings.db_pool_pre_ping_idle_seconds)
+
+
+def pool_status(eng) -> dict | None:
+    """Ocupação do pool do engine (None para pools sem limite, como o StaticPool)."""
+    pool = getattr(eng, "sync_engine", eng).pool
+    if not isinstance(pool, QueuePool):
+        return None
+    # O limite do próprio pool (não o de `settings`): o engine pode não ter sido criado por
+    # `create_sync_engine`. max_overflow=-1 (sem limite) conta como 0
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        # `pool.overflow()` é negativo enquanto há ligações por abrir dentro do `size`
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "usage": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+# Criados por `init_engine()` (lifespan da aplicação ou CLIs); importar este módulo não
+# abre ligações nem importa drivers
+engine = None
+async_engine = None
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+# expire_on_commit=False: os objetos devolvidos são serializados fora do greenlet da sessão
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def create_sync_engine(raw_url: str | None = None):
+    """Engine síncrono com o pool configurado (também usado pelas CLIs)."""
+    url = _database_url(raw_url=raw_url)
+    eng = create_engine(url, **_engine_kwargs(url))
+    _configure_pool(eng)
+    return eng
+
+
+def create_async_engine_lazy(raw_url: str | None = None):
+    """Engine assíncrono com o pool configurado."""
+    url = _database_url(async_driver=True, raw_url=raw_url)
+    eng = create_async_engine(url, **_engine_kwargs(url))
+    _configure_pool(eng)
+    return eng
+
+
+class ReplicaSet:
+    """Réplicas de leitura em round robin.
+
+    Uma réplica que falha ao dar uma ligação sai da rotação durante `ejection_seconds`;
+    sem réplicas disponíveis as leituras vão para o primário.
+    """
+
+    def __init__(self, engines: list, ejection_seconds: float = 30.0):
+        self.engines = list(engines)
+        self.ejection_seconds = ejection_seconds
+        self._ejected_until: dict[int, float] = {}
+        self._next = itertools.count()
+
+    def pick(self):
+        """Próxima réplica saudável, ou None."""
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            eng = self.engines[next(self._next) % len(self.engines)]
+            if self._ejected_until.get(id(eng), 0.0) <= now:
+                return eng
+        return None
+
+    def eject(self, eng) -> None:
+        self._ejected_until[id(eng)] = time.monotonic() + self.ejection_seconds
+        logger.warning(f"Réplica {eng.url!r} fora de rotação durante {self.ejection_seconds}s")
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        ejected = sum(1 for until in self._ejected_until.values() if until > now)
+        return {"total": len(self.engines), "healthy": len(self.engines) - ejected}
+
+    def dispose(self) -> None:
+        for eng in self.engines:
+            getattr(eng, "sync_engine", eng).dispose()
+
+
+class RecentWriters:
+    """Utilizadores que escreveram há menos de `window` segundos (por processo).
+
+    Com vários workers o pedido seguinte do utilizador cai quase sempre noutro processo, que
+    não o conhece: use `RedisRecentWriters` (`REPLICA_WRITERS_URL`).
+    """
+
+    def __init__(self, window: float = 5.0, max_entries: int = 100_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._until: dict = {}
+
+    def mark(self, user_id) -> None:
+        now = time.monotonic()
+        if len(self._until) >= self.max_entries:
+            self._until = {k: v for k, v in self._until.items() if v > now}
+        self._until[user_id] = now + self.window
+
+    def active(self, user_id) -> bool:
+        return self._until.get(user_id, 0.0) > time.monotonic()
+
+
+def redis_errors() -> tuple[type[Exception], ...]:
+    """Exceções de um servidor Redis em falha (as do redis-py, se estiver instalado)."""
+    try:
+        import redis
+    except ImportError:
+        return (OSError,)
+    return (redis.RedisError, OSError)
+
+
+class RedisRecentWriters:
+    """`RecentWriters` partilhado entre workers: uma chave com TTL por utilizador no Redis.
+
+    Se o Redis falha, a leitura vai para o primário (mais carga, nunca dados antigos).
+    """
+
+    def __init__(self, client, window: float = 5.0):
+        self.client = client
+        self.window = window
+        self._erros = redis_errors()
+
+    @classmethod
+    def from_url(cls, url: str, window: float = 5.0) -> "RedisRecentWriters":
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=0.25), window=window)
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f"escritores:{user_id}"
+
+    def mark(self, user_id) -> None:
+        try:
+            self.client.set(self._key(user_id), 1, px=max(1, int(self.window * 1000)))
+        except self._erros as e:
+            logger.warning(f"Marca de escrita recente não guardada: {e}")
+
+    def active(self, user_id) -> bool:
+        try:
+            return self.client.get(self._key(user_id)) is not None
+        except self._erros as e:
+            logger.warning(f"Marca de escrita recente indisponível: {e}")
+            return True
+
+
+def _create_recent_writers():
+    url = settings.replica_writers_url
+    if url is None and settings.cache_backend == "redis":
+        url = settings.cache_url
+    if url:
+        return RedisRecentWriters.from_url(url, settings.replica_read_your_writes_seconds)
+    return RecentWriters(settings.replica_read_your_writes_seconds)
+
+
+# Leituras encaminhadas para réplicas (None sem DATABASE_REPLICA_URLS)
+replicas: ReplicaSet | None = None
+recent_writers = _create_recent_writers()
+
+
+def _create_replicas() -> ReplicaSet | None:
+    urls = [u.strip() for u in (settings.database_replica_urls or "").split(",") if u.strip()]
+    if not urls:
+        return None
+    create = create_async_engine_lazy if settings.db_async else create_sync_engine
+    return ReplicaSet([create(url) for url in urls], settings.replica_ejection_seconds)
+
+
+def current_engine():
+    """Engine do modo configurado (síncrono ou assíncrono), ou None se ainda não foi criado."""
+    return async_engine if settings.db_async else engine
 
 
-engine = create_engine_with_retry()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def init_engine(eng=None, replica_engines: list | None = None):
+    """Cria o engine do modo configurado (ou usa `eng`) e liga-lhe as sessões.
+
+    `create_engine` não abre ligações: a primeira só acontece no primeiro pedido ou em
+    `wait_for_database`. Chamadas seguintes devolvem o engine já criado. As réplicas vêm
+    de `replica_engines` ou, ao criar o engine, de `DATABASE_REPLICA_URLS`.
+    """
+    global engine, async_engine, replicas
+    if replica_engines is not None:
+        replicas = ReplicaSet(replica_engines, settings.replica_ejection_seconds)
+    if eng is None:
+        eng = current_engine()
+    if eng is None:
+        eng = create_async_engine_lazy() if settings.db_async else create_sync_engine()
+        if replicas is None:
+            replicas = _create_replicas()
+    if hasattr(eng, "sync_engine"):
+        async_engine = eng
+        AsyncSessionLocal.configure(bind=eng)
+    else:
+        engine = eng
+        SessionLocal.configure(bind=eng)
+    return eng
+
+
+def all_engines() -> list:
+    """Primário e réplicas em uso."""
+    primary = current_engine()
+    return ([primary] if primary is not None else []) + (replicas.engines if replicas else [])
+
+
+def reset_engine() -> None:
+    """Esquece o engine atual e as réplicas (fecha as ligações dos pools)."""
+    global engine, async_engine, replicas
+    if engine is not None:
+        engine.dispose()
+    if async_engine is not None:
+        async_engine.sync_engine.dispose()
+    if replicas is not None:
+        replicas.dispose()
+    engine = async_engine = replicas = None
+    SessionLocal.configure(bind=None)
+    AsyncSessionLocal.configure(bind=None)
+
+
+async def ping_database(eng) -> None:
+    """`SELECT 1` no engine, síncrono (na threadpool) ou assíncrono."""
+    if hasattr(eng, "sync_engine"):
+        async with eng.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    else:
+        await run_in_threadpool(_ping_sync, eng)
+
+
+def _ping_sync(eng) -> None:
+    with eng.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def wait_for_database(eng, initial_delay: float = 0.1, max_delay: float | None = None):
+    """Espera pela base de dados com backoff exponencial, sem bloquear o event loop.
+
+    Tenta indefinidamente: enquanto a base não responde o processo continua a servir
+    `/health/live` e o `/health/ready` mantém a instância fora do balanceador.
+    """
+    max_delay = settings.db_connect_max_backoff_seconds if max_delay is None else max_delay
+    delay = initial_delay
+    attempt = 1
+    while True:
+        try:
+            await ping_database(eng)
+            logger.info("Base de dados conectada com sucesso!")
+            return
+        except (exc.SQLAlchemyError, OSError) as e:
+            logger.warning(
+                f"Conexão falhou (tentativa {attempt}). Nova tentativa em {delay:.1f}s. Erro: {e}"
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+            attempt += 1
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
+@event.listens_for(Session, "after_commit")
+def _note_commit(session) -> None:
+    session.info["committed"] = True
+
+
+def _user_id(request: Request):
+    """Id do utilizador do token do pedido, se houver (só usado com réplicas)."""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    try:
+        return verify_token(authorization).get("id")
+    except HTTPException:
+        return None
+
+
+def _note_writer(request: Request, session: Session) -> None:
+    # Leituras seguintes do mesmo utilizador ficam no primário durante a janela
+    if replicas is not None and session.info.get("committed"):
+        user_id = _user_id(request)
+        if user_id is not None:
+            recent_writers.mark(user_id)
+
+
+def _read_target(request: Request):
+    """Réplica para uma leitura, ou None para o primário (sem réplicas ou escrita recente)."""
+    if replicas is None:
+        return None
+    user_id = _user_id(request)
+    if user_id is not None and recent_writers.active(user_id):
+        return None
+    return replicas.pick()
+
+
+def get_db(request: Request):
     db = SessionLocal()
+    try:
+        yield db
+    finally:
+        _note_writer(request, db)
+        db.close()
+
+
+def on_replica(session: Session) -> bool:
+    """A sessão lê uma réplica: o que leu pode estar atrasado e não vai para a cache."""
+    return session.info.get("replica", False)
+
+
+def get_read_db(request: Request):
+    """Sessão para endpoints só de leitura: réplica em round robin, ou o primário."""
+    target = _read_target(request)
+    while target is not None:
+        db = SessionLocal(bind=target, info={"replica": True})
+        try:
+            # Checkout da ligação já aqui: uma réplica em baixo é ejetada antes do handler
+            db.connection()
+            break
+        except exc.DBAPIError:
+            db.close()
+            replicas.eject(target)
+            target = replicas.pick()
+    else:
+        db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def _writers_remote() -> bool:
+    # Com a janela no Redis, marcar e consultar são idas à rede: fora do event loop
+    return replicas is not None and isinstance(recent_writers, RedisRecentWriters)
+
+
+async def get_async_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        finally:
+            if _writers_remote():
+                await run_in_threadpool(_note_writer, request, db.sync_session)
+            else:
+                _note_writer(request, db.sync_session)
+
+
+async def get_async_read_db(request: Request):
+    if _writers_remote():
+        target = await run_in_threadpool(_read_target, request)
+    else:
+        target = _read_target(request)
+    while target is not None:
+        db = AsyncSessionLocal(bind=target, info={"replica": True})
+        try:
+            await db.connection()
+            break
+        except exc.DBAPIError:
+            await db.close()
+            replicas.eject(target)
+            target = replicas.pick()
+    else:
+        db = AsyncSessionLocal()
+    async with db:
+        yield db
+
+
+async def run_in_session(fn, *args):
+    """Corre `fn(session, *args)` no primário fora de um pedido, sem bloquear o event loop.
+
+    Para tarefas em segundo plano (feed de alterações, ciclo de vida dos eventos).
+    """
+    if settings.db_async:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args)
+
+    def correr():
+        with SessionLocal() as db:
+            return fn(db, *args)
+
+    return await run_in_threadpool(correr)
+
+
+def run_blocking(fn, *args, **kwargs):
+    """Chama `fn(*args, **kwargs)`, numa thread se estiver a correr dentro de `run_sync`.
+
+    No modo assíncrono o corpo dos handlers corre no event loop (ver `db_endpoint`): uma
+    chamada de rede síncrona ali (p.ex. ao Redis) pararia todos os pedidos. Fora de
+    `run_sync` (modo síncrono, CLIs) chama diretamente.
+    """
+    if in_greenlet():
+        return await_only(run_in_threadpool(fn, *args, **kwargs))
+    return fn(*args, **kwargs)
+
+
+_ASYNC_DEPENDENCIES = {get_db: get_async_db, get_read_db: get_async_read_db}
+
+
+def db_endpoint(func):
+    """Adapta um handler escrito sobre `Session` ao modo configurado.
+
+    No modo síncrono devolve o handler tal como está (corre na threadpool). No modo
+    assíncrono devolve um handler `async def` que recebe uma `AsyncSession` e executa o
+    corpo com `run_sync`: as idas à base de dados ficam em I/O assíncrono, sem ocupar
+    um worker da threadpool durante o round trip.
+
+    O resto do corpo corre no event loop. Outro I/O síncrono tem de passar por
+    `run_blocking` (o `RedisCache` já o faz); a verificação do JWT e a cache em memória
+    são só CPU, com custo de microssegundos.
+    """
+    if not settings.db_async:
+        return func
+
+    signature = inspect.signature(func)
+    params = [
+        p.replace(default=Depends(_ASYNC_DEPENDENCIES[p.default.dependency]))
+        if p.name == "db"
+        else p
+        for p in signature.parameters.values()
+    ]
+
+    @functools.wraps(func)
+    async def wrapper(*args, db, **kwargs):
+        return await db.run_sync(lambda session: func(*args, db=session, **kwargs))
+
+    wrapper.__signature__ = signature.replace(parameters=params)
+    return wrapper
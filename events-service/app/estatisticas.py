@@ -0,0 +1,131 @@
+"""Estatísticas de inscrições para os organizadores (`GET /events/{id}/stats`,
+`GET /organizers/me/stats`).
+
+A tabela `estatisticas_inscricoes` guarda, por (organizador_id, evento_id, status), o
+número de inscrições e a soma de `valor_pago`. Cada escrita de inscrições ajusta-a na
+mesma transação, através de `contadores.ajustar_inscricoes`, com um upsert
+`INSERT ... SELECT` sobre o evento: o organizador (e o preço, numa inscrição nova) vêm da
+linha do evento, que a escrita já tocou, sem uma ida extra à base de dados. Ler as
+estatísticas de um organizador é um varrimento do prefixo da chave primária, sem tocar
+nas inscrições.
+
+`reconstruir` recalcula tudo com SQL por conjuntos (`python -m app.estatisticas`).
+"""
+
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models import EstatisticaInscricoes, Evento, Inscricao
+
+_COLUNAS = ["organizador_id", "evento_id", "status", "total", "valor_pago"]
+
+
+def ajustar(
+    db: Session, evento_id: int, deltas: Mapping[str, int], valores: Mapping[str, Any]
+) -> None:
+    """Aplica deltas de inscrições e de valor pago por status às estatísticas do evento.
+
+    Os valores são `Decimal` ou expressões sobre `eventos` (ex.: `Evento.preco * 3`).
+    """
+    table = EstatisticaInscricoes.__table__
+    for status, delta in deltas.items():
+        valor = valores.get(status, 0)
+        if isinstance(valor, (int, Decimal)):
+            if not delta and not valor:
+                continue
+            valor = literal(valor, table.c.valor_pago.type)
+        linha = select(
+            Evento.organizador_id, literal(evento_id), literal(status), literal(delta), valor
+        ).where(Evento.id == evento_id)
+        if db.get_bind().dialect.name == "mysql":
+            stmt = mysql.insert(table).from_select(_COLUNAS, linha)
+            stmt = stmt.on_duplicate_key_update(
+                total=table.c.total + stmt.inserted.total,
+                valor_pago=table.c.valor_pago + stmt.inserted.valor_pago,
+            )
+        else:
+            stmt = sqlite.insert(table).from_select(_COLUNAS, linha)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["organizador_id", "evento_id", "status"],
+                set_={
+                    "total": table.c.total + stmt.excluded.total,
+                    "valor_pago": table.c.valor_pago + stmt.excluded.valor_pago,
+                },
+            )
+        db.execute(stmt)
+
+
+def remover_evento(db: Session, organizador_id: int, evento_id: int) -> None:
+    """Retira um evento apagado das estatísticas do organizador."""
+    db.execute(
+        delete(EstatisticaInscricoes).where(
+            EstatisticaInscricoes.organizador_id == organizador_id,
+            EstatisticaInscricoes.evento_id == evento_id,
+        )
+    )
+
+
+def resumo(db: Session, organizador_id: int, evento_id: int | None = None) -> dict:
+    """Inscrições e valor pago por status, e os totais, de um organizador ou de um evento."""
+    stmt = select(
+        EstatisticaInscricoes.status,
+        func.sum(EstatisticaInscricoes.total),
+        func.sum(EstatisticaInscricoes.valor_pago),
+    ).where(EstatisticaInscricoes.organizador_id == organizador_id)
+    if evento_id is not None:
+        stmt = stmt.where(EstatisticaInscricoes.evento_id == evento_id)
+    stmt = stmt.group_by(EstatisticaInscricoes.status)
+
+    por_status = {}
+    receita = Decimal("0.00")
+    for status, total, valor in db.execute(stmt):
+        if not total:
+            continue
+        valor = _dinheiro(valor)
+        por_status[status] = {"total": int(total), "valor_pago": str(valor)}
+        if status != "cancelado":
+            receita += valor
+    return {
+        "por_status": por_status,
+        "total": sum(s["total"] for s in por_status.values()),
+        # Receita: soma das inscrições não canceladas
+        "valor_pago": str(receita),
+    }
+
+
+def _dinheiro(valor) -> Decimal:
+    # SQLite devolve float nas somas de Numeric; arredonda-se aos cêntimos
+    return Decimal(str(valor or 0)).quantize(Decimal("0.01"))
+
+
+def reconstruir(conn: Connection) -> None:
+    """Recalcula as estatísticas a partir das inscrições, com SQL por conjuntos."""
+    conn.execute(delete(EstatisticaInscricoes))
+    conn.execute(
+        insert(EstatisticaInscricoes).from_select(
+            _COLUNAS,
+            select(
+                Evento.organizador_id,
+                Inscricao.evento_id,
+                Inscricao.status,
+                func.count(),
+                func.coalesce(func.sum(Inscricao.valor_pago), 0),
+            )
+            .join(Evento, Evento.id == Inscricao.evento_id)
+            .group_by(Evento.organizador_id, Inscricao.evento_id, Inscricao.status),
+        )
+    )
+
+
+if __name__ == "__main__":
+    from .db import create_sync_engine
+
+    with create_sync_engine().begin() as connection:
+        reconstruir(connection)
+    print("Estatísticas reconstruídas")
@@ -0,0 +1,95 @@
+"""Exportação em streaming (NDJSON ou CSV) de eventos e listas de inscritos.
+
+As linhas vêm de um cursor do lado do servidor (`yield_per`, que ativa `stream_results`)
+e são serializadas em blocos à medida que chegam, pelo que a memória usada não depende do
+tamanho da exportação. A sessão é própria do stream: as dependências com `yield` do
+FastAPI terminam antes de a resposta começar a ser enviada.
+"""
+
+import csv
+import io
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from . import db as app_db
+from .config import settings
+
+BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _encode_ndjson(columns: Sequence[str], rows) -> str:
+    return "".join(
+        json.dumps(
+            {c: _json_value(v) for c, v in zip(columns, row)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [v.isoformat() if isinstance(v, datetime) else v for v in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+def _encoder(formato: str, columns: Sequence[str]):
+    if formato == "csv":
+        return _encode_csv
+    return lambda rows: _encode_ndjson(columns, rows)
+
+
+def _stream_sync(stmt: Select, formato: str, columns: Sequence[str]):
+    encode = _encoder(formato, columns)
+    if formato == "csv":
+        yield _encode_csv([columns])
+    db = app_db.SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+        for batch in result.partitions():
+            yield encode(batch)
+    finally:
+        db.close()
+
+
+async def _stream_async(stmt: Select, formato: str, columns: Sequence[str]):
+    encode = _encoder(formato, columns)
+    if formato == "csv":
+        yield _encode_csv([columns])
+    async with app_db.AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=BATCH_SIZE))
+        async for batch in result.partitions():
+            yield encode(batch)
+
+
+def export_response(stmt: Select, formato: str, filename: str) -> StreamingResponse:
+    """Resposta em streaming com as colunas selecionadas por `stmt`."""
+    columns = [c.name for c in stmt.selected_columns]
+    if settings.db_async:
+        body = _stream_async(stmt, formato, columns)
+    else:
+        body = _stream_sync(stmt, formato, columns)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{formato}"'},
+    )
@@ -0,0 +1,314 @@
+"""Esquema GraphQL (strawberry) de eventos e inscrições, montado em `/graphql`.
+
+Só leituras, pela mesma ligação de leitura das rotas REST (réplicas incluídas). Os campos
+aninhados (`inscricoes`, `totalInscritos`, `evento` de uma inscrição) são resolvidos por
+DataLoaders criados em cada pedido: as chaves pedidas por todos os objetos de um nível
+juntam-se numa única consulta, por isso uma query de 50 eventos com as suas inscrições
+custa o mesmo número de statements do que uma de 5. `lugaresDisponiveis` vem da coluna
+`lugares_ocupados`, lida com o próprio evento.
+
+A profundidade das queries é limitada por `GRAPHQL_MAX_DEPTH` e o custo estimado (cada
+campo conta 1, multiplicado pelo `limit` das listas onde está) por
+`GRAPHQL_MAX_COMPLEXITY`, antes de qualquer acesso à base de dados.
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Annotated, Any, Optional
+
+import strawberry
+from fastapi import Depends, HTTPException, Request
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    ValidationRule,
+)
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from strawberry.dataloader import DataLoader
+from strawberry.extensions import AddValidationRules, MaxAliasesLimiter, QueryDepthLimiter
+from strawberry.fastapi import BaseContext, GraphQLRouter
+from strawberry.types import Info
+
+from . import intervalos
+from .auth import verify_token
+from .config import settings
+from .datas import para_utc
+from .models import ContadorInscricoes, Evento, Inscricao
+from .pagination import decode_cursor, encode_cursor
+from .serialization import evento_out, inscricao_out
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 100
+
+EVENTO_COLUNAS = (*evento_out.columns, Evento.lugares_ocupados)
+
+
+def _limite(limit: int) -> int:
+    if not 1 <= limit <= LIMITE_MAXIMO:
+        raise ValueError(f"`limit` tem de estar entre 1 e {LIMITE_MAXIMO}.")
+    return limit
+
+
+# ==================== TIPOS ====================
+
+
+@strawberry.type(name="Inscricao")
+class InscricaoType:
+    evento_id: int
+    user_id: int
+    status: str
+    valor_pago: Decimal
+    created_at: datetime
+    updated_at: datetime
+
+    @strawberry.field
+    async def evento(self, info: Info) -> Optional["EventoType"]:
+        return await info.context.evento.load(self.evento_id)
+
+
+@strawberry.type(name="Evento")
+class EventoType:
+    id: int
+    nome: str
+    descricao: str
+    data_inicio: datetime
+    data_fim: datetime | None
+    local: str
+    capacidade: int
+    preco: float
+    tipo: str
+    imagem: str | None
+    organizador_id: int
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    lugares_ocupados: strawberry.Private[int]
+
+    @classmethod
+    def from_row(cls, row) -> "EventoType":
+        return cls(**dict(zip(evento_out.fields, row)), lugares_ocupados=row.lugares_ocupados)
+
+    @strawberry.field
+    def lugares_disponiveis(self) -> int:
+        return max(self.capacidade - self.lugares_ocupados, 0)
+
+    @strawberry.field
+    async def total_inscritos(self, info: Info) -> int:
+        return await info.context.total_inscritos.load(self.id)
+
+    @strawberry.field
+    async def inscricoes(
+        self, info: Info, limit: int = LIMITE_PADRAO, status: str | None = None
+    ) -> list[InscricaoType] | None:
+        """Inscrições mais recentes (apenas organizador do evento ou admin)."""
+        user = info.context.user or {}
+        if user.get("tipo") != "admin" and (
+            user.get("tipo") != "organizador" or user.get("id") != self.organizador_id
+        ):
+            raise PermissionError("Apenas o organizador do evento pode ver as inscrições.")
+        return await info.context.inscricoes.load((self.id, _limite(limit), status))
+
+
+@strawberry.type
+class EventosPage:
+    data: list[EventoType]
+    next_cursor: str | None
+
+
+# ==================== CONTEXTO E DATALOADERS ====================
+
+
+class Contexto(BaseContext):
+    """Sessão de leitura, utilizador do token e DataLoaders de um pedido."""
+
+    def __init__(self, db, user: dict[str, Any] | None):
+        super().__init__()
+        self.db = db
+        self.user = user
+        # Resolvers concorrentes partilham a sessão, que só aceita uma operação de cada vez
+        self._lock = asyncio.Lock()
+        self.evento = DataLoader(self._eventos_por_id)
+        self.total_inscritos = DataLoader(self._totais_inscritos)
+        self.inscricoes = DataLoader(self._inscricoes_por_evento)
+
+    async def rows(self, stmt, params: dict | None = None) -> list:
+        async with self._lock:
+            if isinstance(self.db, AsyncSession):
+                return (await self.db.execute(stmt, params)).all()
+            return await run_in_threadpool(lambda: self.db.execute(stmt, params).all())
+
+    def eventos(self, rows) -> list[EventoType]:
+        eventos = [EventoType.from_row(row) for row in rows]
+        for evento in eventos:
+            # `inscricao.evento` dos eventos já carregados não volta à base de dados
+            self.evento.prime(evento.id, evento)
+        return eventos
+
+    async def _eventos_por_id(self, ids: list[int]) -> list[EventoType | None]:
+        rows = await self.rows(select(*EVENTO_COLUNAS).where(Evento.id.in_(ids)))
+        por_id = {row.id: EventoType.from_row(row) for row in rows}
+        return [por_id.get(i) for i in ids]
+
+    async def _totais_inscritos(self, ids: list[int]) -> list[int]:
+        rows = await self.rows(
+            select(ContadorInscricoes.evento_id, func.sum(ContadorInscricoes.total))
+            .where(ContadorInscricoes.evento_id.in_(ids))
+            .group_by(ContadorInscricoes.evento_id)
+        )
+        totais = {evento_id: int(total) for evento_id, total in rows}
+        return [totais.get(i, 0) for i in ids]
+
+    async def _inscricoes_por_evento(self, keys: list[tuple]) -> list[list[InscricaoType]]:
+        # Uma consulta por combinação (limit, status) pedida, com as N primeiras de cada
+        # evento por ROW_NUMBER() sobre o índice (evento_id, created_at, user_id)
+        grupos = defaultdict(list)
+        for evento_id, limit, status in keys:
+            grupos[(limit, status)].append(evento_id)
+        resultado = {}
+        for (limit, status), ids in grupos.items():
+            posicao = func.row_number().over(
+                partition_by=Inscricao.evento_id,
+                order_by=(desc(Inscricao.created_at), desc(Inscricao.user_id)),
+            )
+            sub = select(*inscricao_out.columns, posicao.label("posicao")).where(
+                Inscricao.evento_id.in_(ids)
+            )
+            if status:
+                sub = sub.where(Inscricao.status == status)
+            sub = sub.subquery()
+            rows = await self.rows(
+                select(*(sub.c[name] for name in inscricao_out.fields))
+                .where(sub.c.posicao <= limit)
+                .order_by(sub.c.evento_id, sub.c.posicao)
+            )
+            por_evento = defaultdict(list)
+            for row in rows:
+                por_evento[row.evento_id].append(
+                    InscricaoType(**dict(zip(inscricao_out.fields, row)))
+                )
+            for evento_id in ids:
+                resultado[(evento_id, limit, status)] = por_evento[evento_id]
+        return [resultado[key] for key in keys]
+
+
+# ==================== QUERY ====================
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    async def evento(self, info: Info, id: int) -> EventoType | None:
+        return await info.context.evento.load(id)
+
+    @strawberry.field
+    async def eventos(
+        self,
+        info: Info,
+        limit: int = LIMITE_PADRAO,
+        cursor: str | None = None,
+        tipo: str | None = None,
+        status: str | None = None,
+        desde: Annotated[datetime | None, strawberry.argument(name="from")] = None,
+        ate: Annotated[datetime | None, strawberry.argument(name="to")] = None,
+    ) -> EventosPage:
+        """Eventos por (data_inicio, id), com os filtros e a janela de `GET /events`."""
+        limit = _limite(limit)
+        try:
+            depois = decode_cursor(cursor) if cursor else None
+        except HTTPException as e:
+            raise ValueError(e.detail)
+        filtros = {"tipo": tipo, "status": status}
+        desde, ate = para_utc(desde), para_utc(ate)
+        stmt, params = intervalos.janela(EVENTO_COLUNAS, filtros, depois, desde, ate, limit + 1)
+        rows = await info.context.rows(stmt, params)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].data_inicio, rows[-1].id)
+        return EventosPage(data=info.context.eventos(rows), next_cursor=next_cursor)
+
+
+# ==================== LIMITES ====================
+
+
+# Campos que devolvem listas com `limit`
+_LISTAS = ("eventos", "inscricoes")
+
+
+def _custo(selection_set, fragmentos: dict, vistos: frozenset = frozenset()) -> int:
+    """Custo estimado de um conjunto de seleções (ver docstring do módulo)."""
+    custo = 0
+    for selection in selection_set.selections if selection_set else ():
+        if isinstance(selection, FieldNode):
+            multiplicador = LIMITE_PADRAO if selection.name.value in _LISTAS else 1
+            for argumento in selection.arguments:
+                if argumento.name.value == "limit":
+                    valor = argumento.value
+                    # Limite numa variável ou fora de [1, LIMITE_MAXIMO] (só é recusado
+                    # pelo resolver, depois desta validação): conta o máximo permitido
+                    multiplicador = LIMITE_MAXIMO
+                    if isinstance(valor, IntValueNode) and 1 <= int(valor.value) <= LIMITE_MAXIMO:
+                        multiplicador = int(valor.value)
+            custo += 1 + multiplicador * _custo(selection.selection_set, fragmentos, vistos)
+        elif isinstance(selection, InlineFragmentNode):
+            custo += _custo(selection.selection_set, fragmentos, vistos)
+        elif isinstance(selection, FragmentSpreadNode):
+            nome = selection.name.value
+            if nome in fragmentos and nome not in vistos:
+                custo += _custo(fragmentos[nome].selection_set, fragmentos, vistos | {nome})
+    return custo
+
+
+def _limite_complexidade(maximo: int) -> type[ValidationRule]:
+    class LimiteComplexidade(ValidationRule):
+        def enter_operation_definition(self, node, *_args):
+            fragmentos = {
+                d.name.value: d
+                for d in self.context.document.definitions
+                if isinstance(d, FragmentDefinitionNode)
+            }
+            custo = _custo(node.selection_set, fragmentos)
+            if custo > maximo:
+                mensagem = f"Query demasiado complexa: custo {custo}, máximo {maximo}."
+                self.report_error(GraphQLError(mensagem, node))
+
+    return LimiteComplexidade
+
+
+def criar_schema() -> strawberry.Schema:
+    return strawberry.Schema(
+        query=Query,
+        extensions=[
+            QueryDepthLimiter(max_depth=settings.graphql_max_depth),
+            MaxAliasesLimiter(max_alias_count=15),
+            AddValidationRules([_limite_complexidade(settings.graphql_max_complexity)]),
+        ],
+    )
+
+
+def _utilizador(request: Request) -> dict[str, Any] | None:
+    """Claims do token, se houver um válido; sem token a query é anónima."""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    try:
+        return verify_token(authorization)
+    except HTTPException:
+        return None
+
+
+def graphql_router(read_db_dependency) -> GraphQLRouter:
+    """Router `/graphql` com a dependência de sessão de leitura do modo atual (sync/async)."""
+
+    async def get_context(request: Request, db=Depends(read_db_dependency)) -> Contexto:
+        return Contexto(db, _utilizador(request))
+
+    return GraphQLRouter(criar_schema(), context_getter=get_context)
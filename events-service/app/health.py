@@ -0,0 +1,46 @@
+"""Verificações de saúde para o orquestrador (liveness/readiness).
+
+`/health/live` só confirma que o processo responde. `/health/ready` diz se a instância
+deve receber tráfego: o arranque (ligação + migrações) tem de ter terminado, a base de
+dados tem de responder a `SELECT 1` dentro de `HEALTH_CHECK_TIMEOUT_SECONDS` e o pool
+tem de ter folga. Com o pool acima de `DB_READY_MAX_POOL_USAGE` a instância declara-se
+indisponível sem sequer pedir uma ligação (que ficaria à espera até `pool_timeout`),
+para o balanceador desviar pedidos enquanto a fila esvazia.
+"""
+
+import asyncio
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import db as app_db
+from .config import settings
+
+
+async def readiness(eng, startup: asyncio.Task | None = None) -> tuple[bool, dict]:
+    """Estado de prontidão: (pronto, detalhe para a resposta).
+
+    `startup` é a tarefa de arranque (espera pela base de dados + migrações); enquanto não
+    terminar com sucesso a instância não está pronta.
+    """
+    if eng is None or (startup is not None and not startup.done()):
+        return False, {"database": "starting", "pool": None}
+    if startup is not None and startup.exception() is not None:
+        return False, {"database": "error", "pool": None, "reason": "arranque falhou"}
+    pool = app_db.pool_status(eng)
+    detail = {"database": "unknown", "pool": pool}
+    if pool is not None and pool["usage"] >= settings.db_ready_max_pool_usage:
+        detail["database"] = "skipped"
+        detail["reason"] = "pool saturado"
+        return False, detail
+    try:
+        timeout = settings.health_check_timeout_seconds
+        await asyncio.wait_for(app_db.ping_database(eng), timeout=timeout)
+    except (TimeoutError, SQLAlchemyError, OSError) as e:
+        detail["database"] = "error"
+        detail["reason"] = type(e).__name__
+        return False, detail
+    detail["database"] = "ok"
+    if app_db.replicas is not None:
+        # Réplicas em baixo não tiram a instância do balanceador: as leituras vão ao primário
+        detail["replicas"] = app_db.replicas.status()
+    return True, detail
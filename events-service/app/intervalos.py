@@ -0,0 +1,155 @@
+"""Janelas de datas sobre os eventos: sobreposição com [desde, ate] e próximos eventos.
+
+Um evento ocupa [data_inicio, data_fim], ou só o instante `data_inicio` se `data_fim` for
+NULL. Um B-tree só ordena por uma das pontas, por isso cada evento guarda a classe da sua
+duração em `duracao_nivel`: 0 para eventos pontuais e L quando a duração, em minutos, está
+em [2^(L-1), 2^L). Num nível L, um evento que termina depois de `desde` começou depois de
+`desde - 2^L` minutos, e o índice (duracao_nivel, data_inicio, id) responde à
+sobreposição com um intervalo curto por nível em vez de um varrimento. O último nível
+junta as durações maiores e não tem limite inferior (são poucos eventos).
+
+Numa listagem ordenada por (data_inicio, id), cada nível é uma subconsulta que lê no
+máximo as chaves da página pelo índice; o UNION ALL só ordena essas chaves e as colunas
+do evento são lidas no fim, pela chave primária.
+"""
+
+import math
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import (
+    Integer,
+    Select,
+    and_,
+    asc,
+    bindparam,
+    or_,
+    select,
+    union_all,
+)
+
+from .models import Evento
+
+# 2^20 minutos são quase dois anos; durações maiores ficam todas no último nível
+MAX_NIVEL = 20
+
+
+def nivel_duracao(data_inicio: datetime, data_fim: datetime | None) -> int:
+    """Classe da duração do evento para `eventos.duracao_nivel`."""
+    if data_fim is None or data_fim <= data_inicio:
+        return 0
+    minutos = math.ceil((data_fim - data_inicio).total_seconds() / 60)
+    return min(minutos.bit_length(), MAX_NIVEL)
+
+
+_FILTROS = {"tipo": Evento.tipo, "status": Evento.status}
+
+
+def _no_nivel(nivel: int):
+    """Eventos do nível que ainda não terminaram em `desde`, limitados por data_inicio."""
+    if nivel == 0:
+        return and_(Evento.duracao_nivel == 0, Evento.data_inicio >= bindparam("desde"))
+    condicoes = [Evento.duracao_nivel == nivel, Evento.data_fim >= bindparam("desde")]
+    if nivel < MAX_NIVEL:
+        condicoes.append(Evento.data_inicio > bindparam(f"desde_{nivel}"))
+    return and_(*condicoes)
+
+
+def _limites(desde: datetime) -> dict:
+    """Valores dos parâmetros de `_no_nivel`: o limite inferior de data_inicio por nível."""
+    params = {f"desde_{n}": desde - timedelta(minutes=2**n) for n in range(1, MAX_NIVEL)}
+    params["desde"] = desde
+    return params
+
+
+def _condicoes(filtros: tuple[str, ...], depois: bool, ate: bool) -> list:
+    condicoes = [_FILTROS[nome] == bindparam(nome) for nome in filtros]
+    if depois:
+        # Paginação por chave: continua depois de (data_inicio, id) sem OFFSET
+        condicoes.append(
+            or_(
+                Evento.data_inicio > bindparam("depois_data"),
+                and_(
+                    Evento.data_inicio == bindparam("depois_data"),
+                    Evento.id > bindparam("depois_id"),
+                ),
+            )
+        )
+    if ate:
+        condicoes.append(Evento.data_inicio <= bindparam("ate"))
+    return condicoes
+
+
+def _params(filtros: dict, depois, desde, ate) -> dict:
+    params = {nome: valor for nome, valor in filtros.items() if valor}
+    if depois is not None:
+        params["depois_data"], params["depois_id"] = depois
+    if desde is not None:
+        params.update(_limites(desde))
+    if ate is not None:
+        params["ate"] = ate
+    return params
+
+
+@lru_cache(maxsize=256)
+def _janela(columns: tuple, filtros: tuple[str, ...], depois: bool, desde: bool, ate: bool):
+    # Construir as subconsultas por nível custa mais do que executá-las: a forma da consulta
+    # é construída uma vez e os pedidos só trazem os valores dos parâmetros
+    condicoes = _condicoes(filtros, depois, ate)
+    ordem = (asc(Evento.data_inicio), asc(Evento.id))
+    offset = bindparam("offset", type_=Integer)
+    limit = bindparam("limit", type_=Integer)
+    if not desde:
+        return select(*columns).where(*condicoes).order_by(*ordem).offset(offset).limit(limit)
+
+    # Cada nível só precisa da chave, que o índice cobre; as colunas vêm no fim, por id
+    ramos = [
+        select(Evento.id, Evento.data_inicio)
+        .where(*condicoes, _no_nivel(n))
+        .order_by(*ordem)
+        .limit(bindparam("limite_nivel", type_=Integer))
+        .subquery()
+        for n in range(MAX_NIVEL + 1)
+    ]
+    uniao = union_all(*(select(ramo.c.id, ramo.c.data_inicio) for ramo in ramos)).subquery()
+    return (
+        select(*columns)
+        .join(uniao, uniao.c.id == Evento.id)
+        .order_by(asc(uniao.c.data_inicio), asc(uniao.c.id))
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+def janela(
+    columns: Sequence,
+    filtros: dict,
+    depois: tuple[datetime, int] | None,
+    desde: datetime | None,
+    ate: datetime | None,
+    limit: int,
+    offset: int = 0,
+) -> tuple[Select, dict]:
+    """Página de eventos em [desde, ate] por (data_inicio, id): (statement, parâmetros).
+
+    `filtros` são igualdades em `tipo`/`status` (valores vazios são ignorados) e `depois`
+    o par (data_inicio, id) de um cursor.
+    """
+    nomes = tuple(nome for nome, valor in filtros.items() if valor)
+    stmt = _janela(
+        tuple(columns), nomes, depois is not None, desde is not None, ate is not None
+    )
+    params = _params(filtros, depois, desde, ate)
+    params.update(limit=limit, offset=offset, limite_nivel=offset + limit)
+    return stmt, params
+
+
+def sobrepostos(stmt: Select, desde: datetime | None, ate: datetime | None) -> Select:
+    """Restringe `stmt` aos eventos que se sobrepõem a [desde, ate] (sem ordem)."""
+    if ate is not None:
+        stmt = stmt.where(Evento.data_inicio <= ate)
+    if desde is not None:
+        niveis = or_(*(_no_nivel(n) for n in range(MAX_NIVEL + 1)))
+        stmt = stmt.where(niveis.params(_limites(desde)))
+    return stmt
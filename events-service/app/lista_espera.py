@@ -0,0 +1,267 @@
+"""Lista de espera dos eventos esgotados (`/events/{id}/lista-espera`).
+
+Quem entra recebe a `senha` seguinte do evento (`filas_espera.ultima_senha`) e fica em
+`lista_espera`. Quando se libertam lugares (inscrição cancelada ou apagada, capacidade
+aumentada), `promover` inscreve a cabeça da fila na mesma transação, por ordem de senha,
+enquanto houver lugares: um lugar livre nunca fica à espera de ser disputado por quem está
+a repetir `POST /events/{id}/inscrever`.
+
+A posição na fila é o número de senhas em espera até à nossa. Uma árvore de Fenwick por
+evento (`nos_filas_espera`, com senhas até 2^32) guarda essas contagens: entrar ou sair
+ajusta no máximo 33 nós num único upsert, e a posição é a soma de no máximo 32 nós lidos
+pela chave primária. Sair do meio da fila não obriga a renumerar ninguém, e a posição
+custa o mesmo na senha 10 ou na senha 100 000, ao contrário de um COUNT(*) até à senha.
+
+Escritas na fila bloqueiam primeiro a linha do evento em `filas_espera`, sempre pela mesma
+ordem (fila, lista, nós), para entradas e promoções concorrentes não se bloquearem.
+`reconstruir` recalcula filas e árvores a partir de `lista_espera`
+(`python -m app.lista_espera`).
+"""
+
+from collections import Counter
+from collections.abc import Iterable, Mapping
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import alteracoes
+from .contadores import ajustar_inscricoes
+from .lugares import reservar_lugares
+from .models import EsperaInscricao, Evento, FilaEspera, Inscricao, NoFilaEspera
+
+# Senhas possíveis por evento: a raiz da árvore é o nó 2^32
+_LIMITE = 1 << 32
+
+
+def _nos_acima(senha: int) -> Iterable[int]:
+    """Nós que contam `senha` (atualização)."""
+    while senha <= _LIMITE:
+        yield senha
+        senha += senha & -senha
+
+
+def _nos_prefixo(senha: int) -> Iterable[int]:
+    """Nós cuja soma conta as senhas `<= senha` (consulta)."""
+    while senha > 0:
+        yield senha
+        senha -= senha & -senha
+
+
+def _somar(db: Session, evento_id: int, deltas: Mapping[int, int]) -> None:
+    linhas = [
+        {"evento_id": evento_id, "no": no, "total": delta} for no, delta in deltas.items() if delta
+    ]
+    if not linhas:
+        return
+    table = NoFilaEspera.__table__
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(table).values(linhas)
+        stmt = stmt.on_duplicate_key_update(total=table.c.total + stmt.inserted.total)
+    else:
+        stmt = sqlite.insert(table).values(linhas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["evento_id", "no"], set_={"total": table.c.total + stmt.excluded.total}
+        )
+    db.execute(stmt)
+
+
+def _fila(db: Session, evento_id: int):
+    """Linha da fila do evento, bloqueada até ao commit (None se ainda não há fila)."""
+    return db.execute(
+        select(FilaEspera.ultima_senha, FilaEspera.em_espera)
+        .where(FilaEspera.evento_id == evento_id)
+        .with_for_update()
+    ).first()
+
+
+def posicao(db: Session, evento_id: int, senha: int) -> int:
+    """Posição (a partir de 1) da senha na fila: senhas em espera até ela, inclusive."""
+    return int(
+        db.execute(
+            select(func.coalesce(func.sum(NoFilaEspera.total), 0)).where(
+                NoFilaEspera.evento_id == evento_id, NoFilaEspera.no.in_(list(_nos_prefixo(senha)))
+            )
+        ).scalar_one()
+    )
+
+
+def _senha(db: Session, evento_id: int, user_id: int) -> int | None:
+    return db.execute(
+        select(EsperaInscricao.senha).where(
+            EsperaInscricao.evento_id == evento_id, EsperaInscricao.user_id == user_id
+        )
+    ).scalar()
+
+
+def consultar(db: Session, evento_id: int, user_id: int) -> dict | None:
+    """Posição do utilizador e tamanho da fila, ou None se não está em espera."""
+    senha = _senha(db, evento_id, user_id)
+    if senha is None:
+        return None
+    em_espera = db.execute(
+        select(FilaEspera.em_espera).where(FilaEspera.evento_id == evento_id)
+    ).scalar()
+    return {
+        "evento_id": evento_id,
+        "user_id": user_id,
+        "posicao": posicao(db, evento_id, senha),
+        "em_espera": em_espera,
+    }
+
+
+def entrar(db: Session, evento_id: int, user_id: int) -> dict:
+    """Põe o utilizador no fim da fila (sem commit); o evento já foi validado."""
+    fila = _fila(db, evento_id)
+    if fila is None:
+        db.execute(insert(FilaEspera).values(evento_id=evento_id, ultima_senha=0, em_espera=0))
+        fila = _fila(db, evento_id)
+    senha = fila.ultima_senha + 1
+    db.execute(
+        update(FilaEspera)
+        .where(FilaEspera.evento_id == evento_id)
+        .values(ultima_senha=senha, em_espera=FilaEspera.em_espera + 1)
+    )
+    # Um pedido repetido em simultâneo falha aqui pela chave (evento_id, user_id)
+    db.execute(insert(EsperaInscricao).values(evento_id=evento_id, user_id=user_id, senha=senha))
+    _somar(db, evento_id, Counter(_nos_acima(senha)))
+    return {
+        "evento_id": evento_id,
+        "user_id": user_id,
+        "posicao": posicao(db, evento_id, senha),
+        "em_espera": fila.em_espera + 1,
+    }
+
+
+def _remover(db: Session, evento_id: int, senhas: list[int]) -> None:
+    # A linha da fila já está bloqueada por quem chama
+    db.execute(
+        delete(EsperaInscricao)
+        .where(EsperaInscricao.evento_id == evento_id, EsperaInscricao.senha.in_(senhas))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(FilaEspera)
+        .where(FilaEspera.evento_id == evento_id)
+        .values(em_espera=FilaEspera.em_espera - len(senhas))
+    )
+    deltas: Counter = Counter()
+    for senha in senhas:
+        deltas.subtract(_nos_acima(senha))
+    _somar(db, evento_id, deltas)
+
+
+def sair(db: Session, evento_id: int, user_id: int) -> bool:
+    """Tira o utilizador da fila (sem commit); False se não estava em espera."""
+    if _fila(db, evento_id) is None:
+        return False
+    senha = _senha(db, evento_id, user_id)
+    if senha is None:
+        return False
+    _remover(db, evento_id, [senha])
+    return True
+
+
+def promover(db: Session, evento_id: int) -> list[int]:
+    """Inscreve a cabeça da fila nos lugares livres do evento (sem commit).
+
+    Chamado depois de cada escrita que liberta lugares; devolve os utilizadores inscritos.
+    """
+    evento = db.execute(
+        select((Evento.capacidade - Evento.lugares_ocupados).label("livres"), Evento.preco)
+        .where(Evento.id == evento_id, Evento.status == "agendado")
+        .with_for_update()
+    ).first()
+    if evento is None or evento.livres <= 0:
+        return []
+    livres = evento.livres
+    fila = _fila(db, evento_id)
+    if fila is None or not fila.em_espera:
+        return []
+
+    promovidos: list[int] = []
+    while livres > 0:
+        cabeca = db.execute(
+            select(EsperaInscricao.user_id, EsperaInscricao.senha)
+            .where(EsperaInscricao.evento_id == evento_id)
+            .order_by(EsperaInscricao.senha)
+            .limit(livres)
+        ).all()
+        if not cabeca:
+            break
+        # Quem entretanto se inscreveu por outra via só sai da fila
+        inscritos = set(
+            db.execute(
+                select(Inscricao.user_id).where(
+                    Inscricao.evento_id == evento_id,
+                    Inscricao.user_id.in_([linha.user_id for linha in cabeca]),
+                )
+            ).scalars()
+        )
+        aceites = [linha.user_id for linha in cabeca if linha.user_id not in inscritos]
+        _remover(db, evento_id, [linha.senha for linha in cabeca])
+        if aceites:
+            reservar_lugares(db, evento_id, len(aceites))
+            db.execute(
+                insert(Inscricao),
+                [
+                    {
+                        "evento_id": evento_id,
+                        "user_id": u,
+                        "status": "pendente",
+                        "valor_pago": evento.preco,
+                    }
+                    for u in aceites
+                ],
+            )
+            ajustar_inscricoes(
+                db, evento_id, {"pendente": len(aceites)}, {"pendente": Evento.preco * len(aceites)}
+            )
+            alteracoes.registar(db, "inscricao", "criado", evento_id, "pendente", aceites)
+            promovidos += aceites
+            livres -= len(aceites)
+    return promovidos
+
+
+def remover_evento(db: Session, evento_id: int) -> None:
+    """Apaga a fila de um evento apagado."""
+    remover_eventos(db, [evento_id])
+
+
+def remover_eventos(db: Session, evento_ids: list[int]) -> None:
+    """Apaga as filas de eventos que já não vão promover ninguém (sem commit)."""
+    for model in (EsperaInscricao, FilaEspera, NoFilaEspera):
+        db.execute(
+            delete(model)
+            .where(model.evento_id.in_(evento_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def reconstruir(conn: Connection) -> None:
+    """Recalcula `filas_espera` e `nos_filas_espera` a partir de `lista_espera`."""
+    conn.execute(delete(NoFilaEspera))
+    conn.execute(delete(FilaEspera))
+    conn.execute(
+        insert(FilaEspera).from_select(
+            ["evento_id", "ultima_senha", "em_espera"],
+            select(
+                EsperaInscricao.evento_id, func.max(EsperaInscricao.senha), func.count()
+            ).group_by(EsperaInscricao.evento_id),
+        )
+    )
+    nos: Counter = Counter()
+    for evento_id, senha in conn.execute(select(EsperaInscricao.evento_id, EsperaInscricao.senha)):
+        nos.update((evento_id, no) for no in _nos_acima(senha))
+    linhas = [{"evento_id": e, "no": no, "total": total} for (e, no), total in nos.items()]
+    for inicio in range(0, len(linhas), 10_000):
+        conn.execute(insert(NoFilaEspera), linhas[inicio : inicio + 10_000])
+
+
+if __name__ == "__main__":
+    from .db import create_sync_engine
+
+    with create_sync_engine().begin() as connection:
+        reconstruir(connection)
+    print("Filas de espera reconstruídas")
@@ -0,0 +1,100 @@
+"""Contador de lugares ocupados por evento (`eventos.lugares_ocupados`).
+
+A reserva é um único UPDATE condicional: só incrementa se o evento aceita inscrições e
+ainda tem lugares, pelo que inscrições concorrentes nunca ultrapassam a capacidade. A
+linha do evento fica bloqueada até ao commit da transação que fez a reserva, que deve ser
+curta (reserva + INSERT da inscrição).
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models import Evento
+
+
+def reservar_lugares(
+    db: Session, evento_id: int, quantidade: int = 1, *, so_agendados: bool = True
+) -> bool:
+    """Ocupa `quantidade` lugares se houver espaço; devolve False caso contrário.
+
+    Com `so_agendados=False` só a capacidade conta (reativar uma inscrição não é uma
+    inscrição nova e é permitido em eventos que já não estão agendados).
+    """
+    condicoes = [
+        Evento.id == evento_id,
+        Evento.lugares_ocupados + quantidade <= Evento.capacidade,
+    ]
+    if so_agendados:
+        condicoes.append(Evento.status == "agendado")
+    result = db.execute(
+        update(Evento)
+        .where(*condicoes)
+        # updated_at mantém-se: a ocupação não faz parte da representação pública do evento
+        .values(
+            lugares_ocupados=Evento.lugares_ocupados + quantidade,
+            updated_at=Evento.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reservar_ate(
+    db: Session, evento_id: int, quantidade: int, *, so_agendados: bool = True
+) -> int:
+    """Ocupa até `quantidade` lugares (os que houver livres) e devolve quantos ocupou.
+
+    `so_agendados` tem o mesmo significado que em `reservar_lugares`.
+    """
+    condicoes = [Evento.id == evento_id]
+    if so_agendados:
+        condicoes.append(Evento.status == "agendado")
+    livres = db.execute(
+        select(Evento.capacidade - Evento.lugares_ocupados)
+        .where(*condicoes)
+        .with_for_update()
+    ).scalar()
+    n = max(0, min(quantidade, livres or 0))
+    if n and not reservar_lugares(db, evento_id, n, so_agendados=so_agendados):
+        return 0
+    return n
+
+
+def libertar_lugares(db: Session, evento_id: int, quantidade: int = 1) -> None:
+    """Devolve lugares ao evento (cancelamento ou remoção de inscrições)."""
+    if quantidade <= 0:
+        return
+    db.execute(
+        update(Evento)
+        .where(Evento.id == evento_id)
+        .values(
+            lugares_ocupados=Evento.lugares_ocupados - quantidade,
+            updated_at=Evento.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recusa_reserva(db: Session, evento_id: int, *, so_agendados: bool = True) -> HTTPException:
+    """Explica porque é que `reservar_lugares` falhou (só chamado no caminho de erro)."""
+    evento = db.get(Evento, evento_id)
+    if not evento:
+        return HTTPException(status_code=404, detail="Evento não encontrado")
+    if so_agendados and evento.status != "agendado":
+        return HTTPException(
+            status_code=400, detail="Este evento não está a aceitar inscrições."
+        )
+    return HTTPException(status_code=409, detail="Evento esgotado.")
+
+
+def recalcular_lugares(conn: Connection) -> None:
+    """Recalcula `lugares_ocupados` de todos os eventos a partir das inscrições."""
+    conn.execute(
+        text(
+            "UPDATE eventos SET lugares_ocupados = ("
+            " SELECT COUNT(*) FROM inscricoes"
+            " WHERE inscricoes.evento_id = eventos.id AND inscricoes.status <> 'cancelado')"
+        )
+    )
@@ -1,28 +1,175 @@
-from fastapi import Depends, FastAPI, HTTPException, Query, status
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import asc, desc, func, select
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import and_, asc, delete, desc, func, insert, literal, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from .auth import require_estudante, require_organizador, verify_token
-from .db import Base, engine, get_db
+from . import (
+    alteracoes,
+    ciclo_vida,
+    compressao,
+    condicionais,
+    datas,
+    estatisticas,
+    intervalos,
+    lista_espera,
+    metrics,
+    search,
+)
+from . import db as app_db
+from .admissao import admitir
+from .auth import require_admin, require_estudante, require_organizador, verify_token
+from .cache import cache
+from .config import settings
+from .contadores import (
+    ajustar_eventos,
+    ajustar_inscricoes,
+    geracao_eventos,
+    mudanca_evento,
+    total_eventos,
+    total_inscricoes,
+)
+from .db import db_endpoint, get_db, get_read_db, init_engine, wait_for_database
+from .export import export_response
+from .health import readiness
+from .intervalos import nivel_duracao
+from .lugares import libertar_lugares, recusa_reserva, reservar_ate, reservar_lugares
+from .migrations import upgrade
 from .models import Evento, Inscricao
+from .pagination import decode_cursor, decode_score_cursor, encode_cursor
 from .schemas import (
+    AlteracoesPage,
+    CountMode,
+    CursorPaginatedEventos,
+    DataHora,
+    EsperaOut,
     EventoCreate,
     EventoOut,
     EventoUpdate,
+    InscricaoBatchResponse,
+    InscricaoBatchStatus,
+    InscricaoBatchUsers,
     InscricaoOut,
     InscricaoResponse,
     InscricaoUpdateStatus,
     PaginatedEventos,
     PaginatedInscricoes,
 )
+from .serialization import campos_evento, evento_out, inscricao_out, json_response
+
+logger = logging.getLogger(__name__)
+
+
+def _evento_do_organizador(db: Session, evento_id: int, user, detail: str) -> Evento:
+    """Carrega o evento e garante que o utilizador é o seu organizador (ou admin)."""
+    evento = db.get(Evento, evento_id)
+    if not evento:
+        raise HTTPException(status_code=404, detail="Evento não encontrado")
+    if evento.organizador_id != user.get("id") and user.get("tipo") != "admin":
+        raise HTTPException(status_code=403, detail=detail)
+    return evento
+
+
+def _estados_inscricoes(db: Session, evento_id: int, user_ids: list[int]) -> dict[int, Row]:
+    """Estado e valor pago das inscrições pedidas, numa única query (linhas bloqueadas)."""
+    rows = db.execute(
+        select(Inscricao.user_id, Inscricao.status, Inscricao.valor_pago)
+        .where(Inscricao.evento_id == evento_id, Inscricao.user_id.in_(user_ids))
+        .with_for_update()
+    ).all()
+    return {row.user_id: row for row in rows}
+
+
+def _ve_utilizadores(authorization: str | None) -> bool:
+    """O feed de alterações é público; só um admin vê o `user_id` das inscrições."""
+    return authorization is not None and verify_token(authorization).get("tipo") == "admin"
+
+
+def _mudancas(inscricoes: Iterable, status: str | None) -> tuple[Counter, Counter]:
+    """Deltas de contagem e de valor pago por status quando as inscrições passam para
+    `status` (None: apagadas), para `ajustar_inscricoes`."""
+    deltas: Counter = Counter()
+    valores: Counter = Counter()
+    for inscricao in inscricoes:
+        deltas[inscricao.status] -= 1
+        valores[inscricao.status] -= inscricao.valor_pago
+        if status is not None:
+            deltas[status] += 1
+            valores[status] += inscricao.valor_pago
+    return deltas, valores
+
+
+def _validar_janela(desde: datetime | None, ate: datetime | None) -> None:
+    if desde is not None and ate is not None and desde > ate:
+        raise HTTPException(status_code=400, detail="`from` não pode ser posterior a `to`.")
+
+
+def _migrate_sync(eng) -> None:
+    with eng.connect() as conn:
+        upgrade(conn)
+
+
+async def _prepare_database(eng) -> None:
+    """Tarefa de arranque: espera pela base de dados e aplica as migrações pendentes."""
+    try:
+        await wait_for_database(eng)
+        if not settings.migrate_on_startup:
+            return
+        # Migrações versionadas (app/migrations.py) em vez de create_all
+        if settings.db_async:
+            async with eng.connect() as conn:
+                await conn.run_sync(upgrade)
+        else:
+            await run_in_threadpool(_migrate_sync, eng)
+    except Exception:
+        logger.exception("Arranque da base de dados falhou")
+        raise
+
+
+async def _ciclo_vida(startup: asyncio.Task) -> None:
+    """Tarefa do lifespan: fecha os eventos terminados depois de a base de dados estar pronta."""
+    if not settings.lifecycle_enabled:
+        return
+    await asyncio.wait({startup})
+    if startup.cancelled() or startup.exception() is not None:
+        return  # a falha já foi registada por `_prepare_database`
+    # `cache` lido a cada chamada (os testes substituem-no)
+    await ciclo_vida.agendador.correr(lambda ids: cache.invalidate_eventos(ids))
 
 
 def create_app() -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # O engine é criado aqui, sem abrir ligações; a espera pela base de dados e as
+        # migrações correm em segundo plano para o processo servir /health/live de imediato
+        eng = init_engine()
+        if settings.metrics_enabled:
+            for each in app_db.all_engines():
+                metrics.instrument_engine(getattr(each, "sync_engine", each))
+        app.state.startup = asyncio.create_task(_prepare_database(eng))
+        ciclo = asyncio.create_task(_ciclo_vida(app.state.startup))
+        try:
+            yield
+        finally:
+            app.state.startup.cancel()
+            ciclo.cancel()
+            await asyncio.gather(ciclo, return_exceptions=True)
+
     app = FastAPI(
         title="events-service",
         description="API de Eventos e Inscrições - Python/FastAPI",
         version="2.0.0",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -33,54 +180,288 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    @app.on_event("startup")
-    def _startup() -> None:
-        # Similar to sequelize sync({ alter: true }) but safer: create if missing.
-        Base.metadata.create_all(bind=engine)
+    if settings.compression_min_size:
+        app.add_middleware(
+            compressao.CompressionMiddleware,
+            minimum_size=settings.compression_min_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+        )
+
+    if settings.metrics_enabled:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def get_metrics():
+            """Métricas no formato de texto do Prometheus."""
+            return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    @app.get("/health/live")
+    def health_live():
+        """O processo está vivo (não toca na base de dados)."""
+        return {"status": "ok"}
+
+    @app.get("/health/ready")
+    async def health_ready():
+        """Pronto para tráfego: arranque concluído, base de dados acessível e pool com folga."""
+        startup = getattr(app.state, "startup", None)
+        ready, detail = await readiness(app_db.current_engine(), startup)
+        return JSONResponse(
+            {"status": "ready" if ready else "unavailable", **detail},
+            status_code=200 if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    @app.get("/cache/stats")
+    def get_cache_stats():
+        """Contadores de hits/misses da cache de leituras públicas."""
+        return cache.stats()
 
     # ==================== ROTAS DE EVENTOS ====================
 
     @app.get("/events", response_model=PaginatedEventos)
+    @db_endpoint
     def get_all_eventos(
+        request: Request,
         page: int = Query(default=1, ge=1),
         limit: int = Query(default=10, ge=1, le=100),
+        cursor: str | None = None,
         tipo: str | None = None,
         status_param: str | None = Query(default=None, alias="status"),
-        db: Session = Depends(get_db),
+        desde: DataHora | None = Query(default=None, alias="from"),
+        ate: DataHora | None = Query(default=None, alias="to"),
+        count: CountMode = "estimated",
+        fields: str | None = None,
+        db: Session = Depends(get_read_db),
     ):
         """Listar todos os eventos (público)."""
-        stmt = select(Evento)
+        _validar_janela(desde, ate)
+        saida = campos_evento(fields)
+        # Páginas em modo cursor não são guardadas em cache (percursos completos do catálogo)
+        campos = None if saida is evento_out else ",".join(saida.fields)
+        cache_params = (tipo, status_param, desde, ate, page, limit, count, campos)
+        # Marca lida antes da base de dados: uma escrita entretanto deixa esta página órfã
+        marca = None if cursor else cache.marca_listas()
+        if marca is not None:
+            cached = cache.get_lista(marca, cache_params)
+            if cached is not None:
+                return condicionais.resposta(request, cached["pagina"], cached["headers"])
+
+        # Lida antes da página: se uma escrita acontecer entretanto, o ETag fica para trás
+        # e o pedido seguinte volta a receber a página, nunca o contrário
+        geracao, modificado = geracao_eventos(db)
+        headers = condicionais.validadores_lista(geracao, modificado)
+        if (resposta := condicionais.nao_modificado(request, headers)) is not None:
+            return resposta
+
+        if count == "exact":
+            stmt = select(Evento.id)
+            if tipo:
+                stmt = stmt.where(Evento.tipo == tipo)
+            if status_param:
+                stmt = stmt.where(Evento.status == status_param)
+            janela = intervalos.sobrepostos(stmt, desde, ate).subquery()
+            total = db.execute(select(func.count()).select_from(janela)).scalar_one()
+        elif count == "estimated" and desde is None and ate is None:
+            total = total_eventos(db, tipo, status_param)
+        else:
+            # Os contadores não distinguem datas: com janela só há total com count=exact
+            total = None
+
+        depois = decode_cursor(cursor) if cursor else None
+        offset = 0 if cursor else (page - 1) * limit
+        filtros = {"tipo": tipo, "status": status_param}
+        # Uma linha a mais indica se existe página seguinte sem depender do total
+        stmt, params = intervalos.janela(
+            saida.colunas("data_inicio"), filtros, depois, desde, ate, limit + 1, offset
+        )
+        rows = db.execute(stmt, params).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1].data_inicio, rows[-1].id)
+
+        result = {
+            "total": total,
+            "totalPages": None if total is None else (total + limit - 1) // limit,
+            "currentPage": None if cursor else page,
+            "data": saida.many(rows),
+            "nextCursor": next_cursor,
+        }
+        if not app_db.on_replica(db):
+            cache.set_lista(marca, cache_params, {"pagina": result, "headers": headers})
+        return json_response(result, headers=headers)
+
+    @app.get("/events/upcoming", response_model=CursorPaginatedEventos)
+    @db_endpoint
+    def get_proximos_eventos(
+        limit: int = Query(default=10, ge=1, le=100),
+        cursor: str | None = None,
+        tipo: str | None = None,
+        fields: str | None = None,
+        db: Session = Depends(get_read_db),
+    ):
+        """Eventos agendados que ainda não terminaram, por data de início (público)."""
+        saida = campos_evento(fields)
+        depois = decode_cursor(cursor) if cursor else None
+        filtros = {"tipo": tipo, "status": "agendado"}
+        stmt, params = intervalos.janela(
+            saida.colunas("data_inicio"), filtros, depois, datas.agora(), None, limit + 1
+        )
+        rows = db.execute(stmt, params).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1].data_inicio, rows[-1].id)
+        return json_response({"data": saida.many(rows), "nextCursor": next_cursor})
+
+    @app.get("/events/search", response_model=CursorPaginatedEventos)
+    @db_endpoint
+    def search_eventos(
+        q: str = Query(min_length=1, max_length=200),
+        limit: int = Query(default=10, ge=1, le=100),
+        cursor: str | None = None,
+        tipo: str | None = None,
+        status_param: str | None = Query(default=None, alias="status"),
+        desde: DataHora | None = Query(default=None, alias="from"),
+        ate: DataHora | None = Query(default=None, alias="to"),
+        fields: str | None = None,
+        db: Session = Depends(get_read_db),
+    ):
+        """Pesquisar eventos por texto no nome, descrição e local (público)."""
+        _validar_janela(desde, ate)
+        saida = campos_evento(fields)
+        palavras = search.termos(q)
+        if not palavras:
+            raise HTTPException(status_code=400, detail="A pesquisa não tem palavras.")
+
+        dialect = db.get_bind().dialect.name
+        stmt, relevancia = search.pesquisa(dialect, palavras, saida.columns)
         if tipo:
             stmt = stmt.where(Evento.tipo == tipo)
         if status_param:
             stmt = stmt.where(Evento.status == status_param)
+        stmt = intervalos.sobrepostos(stmt, desde, ate)
+
+        depois = decode_score_cursor(cursor) if cursor else None
+        rows = db.execute(search.pagina(stmt, relevancia, limit + 1, depois)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = db.execute(count_stmt).scalar_one()
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1].score, rows[-1].id)
+        return json_response({"data": saida.many(rows), "nextCursor": next_cursor})
 
-        offset = (page - 1) * limit
-        rows = (
-            db.execute(stmt.order_by(asc(Evento.data_inicio)).limit(limit).offset(offset))
-            .scalars()
-            .all()
+    @app.get("/events/export")
+    async def export_eventos(
+        formato: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        tipo: str | None = None,
+        status_param: str | None = Query(default=None, alias="status"),
+    ):
+        """Exportar todos os eventos em NDJSON ou CSV (público); a sessão é a do stream."""
+        stmt = select(*evento_out.columns)
+        if tipo:
+            stmt = stmt.where(Evento.tipo == tipo)
+        if status_param:
+            stmt = stmt.where(Evento.status == status_param)
+        stmt = stmt.order_by(asc(Evento.data_inicio), asc(Evento.id))
+        return export_response(stmt, formato, "eventos")
+
+    @app.get("/events/changes", response_model=AlteracoesPage)
+    async def get_alteracoes(
+        since: int | None = Query(default=None, ge=0),
+        limit: int = Query(default=100, ge=1, le=1000),
+        wait: float = Query(default=25.0, ge=0, le=settings.changes_max_wait_seconds),
+        authorization: str | None = Header(default=None),
+    ):
+        """Alterações a eventos e inscrições depois de `since`, esperando até `wait` segundos
+        por novas (long-poll). Sem `since` começa no fim do feed."""
+        completo = _ve_utilizadores(authorization)
+        async with alteracoes.difusor.subscrever() as difusor:
+            depois = difusor.confirmado if since is None else since
+            lista = await difusor.proximas(depois, limit, wait)
+        if lista is None:
+            raise HTTPException(
+                status_code=410,
+                detail="Alterações já compactadas: recarregue o estado e retome sem since.",
+            )
+        return json_response(
+            {
+                "changes": lista if completo else alteracoes.sem_utilizadores(lista),
+                "next": lista[-1]["seq"] if lista else depois,
+            },
+            headers={"Cache-Control": "no-store"},
         )
 
-        return {
-            "total": total,
-            "totalPages": (total + limit - 1) // limit,
-            "currentPage": page,
-            "data": rows,
-        }
+    @app.get("/events/changes/stream")
+    async def stream_alteracoes(
+        since: int | None = Query(default=None, ge=0),
+        last_event_id: int | None = Header(default=None),
+        authorization: str | None = Header(default=None),
+    ):
+        """Alterações em Server-Sent Events; retoma depois de `Last-Event-ID` (ou `since`)."""
+        completo = _ve_utilizadores(authorization)
+        return StreamingResponse(
+            alteracoes.sse(since if last_event_id is None else last_event_id, completo),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-store"},
+        )
 
     @app.get("/events/{id}", response_model=EventoOut)
-    def get_evento_by_id(id: int, db: Session = Depends(get_db)):
+    @db_endpoint
+    def get_evento_by_id(
+        request: Request,
+        id: int,
+        fields: str | None = None,
+        db: Session = Depends(get_read_db),
+    ):
         """Obter um evento específico (público)."""
-        evento = db.get(Evento, id)
-        if not evento:
+        saida = campos_evento(fields)
+        # Marca lida antes da base de dados: uma escrita entretanto deixa esta entrada órfã
+        marca = cache.marca_evento(id)
+        cached = cache.get_evento(id, marca)
+        if cached is not None:
+            evento = cached["evento"]
+            if saida is not evento_out:
+                evento = {name: evento[name] for name in saida.fields}
+            return condicionais.resposta(request, evento, cached["headers"])
+
+        if condicionais.condicional(request):
+            # Só os validadores para decidir o 304; as restantes colunas só se o evento mudou
+            row = db.execute(
+                select(Evento.versao, Evento.updated_at).where(Evento.id == id)
+            ).first()
+            if not row:
+                raise HTTPException(status_code=404, detail="Evento não encontrado")
+            headers = condicionais.validadores_evento(id, row.versao, row.updated_at)
+            if (resposta := condicionais.nao_modificado(request, headers)) is not None:
+                return resposta
+
+        row = db.execute(
+            select(*saida.colunas("updated_at", "versao")).where(Evento.id == id)
+        ).first()
+        if not row:
             raise HTTPException(status_code=404, detail="Evento não encontrado")
-        return evento
 
-    @app.post("/events", response_model=EventoOut, status_code=status.HTTP_201_CREATED)
+        data = saida(row)
+        headers = condicionais.validadores_evento(id, row.versao, row.updated_at)
+        if saida is evento_out and not app_db.on_replica(db):
+            # A cache guarda o evento completo; as projeções servem-se a partir dele. Uma
+            # réplica atrasada guardaria o evento de antes da escrita que acabou de invalidar
+            cache.set_evento(id, marca, {"evento": data, "headers": headers})
+        return json_response(data, headers=headers)
+
+    @app.post(
+        "/events",
+        response_model=EventoOut,
+        status_code=status.HTTP_201_CREATED,
+        dependencies=[Depends(admitir)],
+    )
+    @db_endpoint
     def create_evento(
         payload: EventoCreate,
         user=Depends(verify_token),
@@ -103,14 +484,21 @@ def create_app() -> FastAPI:
             imagem=payload.imagem,
             tipo=payload.tipo,
             organizador_id=organizador_id,
+            status="agendado",
+            duracao_nivel=nivel_duracao(payload.data_inicio, payload.data_fim),
         )
 
         db.add(evento)
+        db.flush()
+        ajustar_eventos(db, mudanca_evento(None, (evento.tipo, evento.status)))
+        alteracoes.registar(db, "evento", "criado", evento.id, evento.status)
         db.commit()
         db.refresh(evento)
+        cache.invalidate_evento()
         return evento
 
     @app.patch("/events/{id}", response_model=EventoOut)
+    @db_endpoint
     def update_evento(
         id: int,
         payload: EventoUpdate,
@@ -130,16 +518,27 @@ def create_app() -> FastAPI:
                 detail="Não autorizado. Apenas o organizador ou admin podem editar este evento.",
             )
 
+        antes = (evento.tipo, evento.status)
         data = payload.model_dump(exclude_unset=True)
         for k, v in data.items():
             setattr(evento, k, v)
+        evento.duracao_nivel = nivel_duracao(evento.data_inicio, evento.data_fim)
+        evento.versao = Evento.versao + 1
 
         db.add(evento)
+        ajustar_eventos(db, mudanca_evento(antes, (evento.tipo, evento.status)))
+        alteracoes.registar(db, "evento", "atualizado", id, evento.status)
+        if data.keys() & {"capacidade", "status"}:
+            # Mais lugares (ou o evento reaberto): a lista de espera ocupa-os
+            db.flush()
+            lista_espera.promover(db, id)
         db.commit()
         db.refresh(evento)
+        cache.invalidate_evento(id)
         return evento
 
     @app.delete("/events/{id}")
+    @db_endpoint
     def delete_evento(
         id: int,
         user=Depends(verify_token),
@@ -158,12 +557,23 @@ def create_app() -> FastAPI:
             )
 
         db.delete(evento)
+        ajustar_eventos(db, mudanca_evento((evento.tipo, evento.status), None))
+        estatisticas.remover_evento(db, evento.organizador_id, id)
+        lista_espera.remover_evento(db, id)
+        alteracoes.registar(db, "evento", "apagado", id)
         db.commit()
+        cache.invalidate_evento(id)
         return {"mensagem": "Evento apagado com sucesso"}
 
     # ==================== ROTAS DE INSCRIÇÕES ====================
 
-    @app.post("/events/{id}/inscrever", response_model=InscricaoResponse, status_code=status.HTTP_201_CREATED)
+    @app.post(
+        "/events/{id}/inscrever",
+        response_model=InscricaoResponse,
+        status_code=status.HTTP_201_CREATED,
+        dependencies=[Depends(admitir)],
+    )
+    @db_endpoint
     def inscrever_em_evento(
         id: int,
         user=Depends(verify_token),
@@ -173,55 +583,134 @@ def create_app() -> FastAPI:
         user = require_estudante(user)
         user_id = user.get("id")
 
-        # Verificar se o evento existe
-        evento = db.get(Evento, id)
+        # Reservar um lugar de forma atómica (o evento existe, aceita inscrições e tem lugares)
+        if not reservar_lugares(db, id):
+            exc = recusa_reserva(db, id)
+            db.rollback()
+            raise exc
+
+        # Criar a inscrição; a chave (evento_id, user_id) rejeita inscrições duplicadas
+        try:
+            db.execute(
+                insert(Inscricao).from_select(
+                    ["evento_id", "user_id", "status", "valor_pago"],
+                    select(Evento.id, literal(user_id), literal("pendente"), Evento.preco)
+                    .where(Evento.id == id),
+                )
+            )
+            ajustar_inscricoes(db, id, {"pendente": 1}, {"pendente": Evento.preco})
+            alteracoes.registar(db, "inscricao", "criado", id, "pendente", [user_id])
+            db.commit()
+        except IntegrityError:
+            # Desfaz também a reserva do lugar
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Já se encontra inscrito neste evento."
+            )
+
+        inscricao = db.get(Inscricao, (id, user_id))
+
+        return {
+            "message": "Inscrição efetuada com sucesso.",
+            "inscricao": inscricao
+        }
+
+    @app.post(
+        "/events/{id}/lista-espera",
+        response_model=EsperaOut,
+        status_code=status.HTTP_201_CREATED,
+        dependencies=[Depends(admitir)],
+    )
+    @db_endpoint
+    def entrar_lista_espera(
+        id: int,
+        response: Response,
+        user=Depends(verify_token),
+        db: Session = Depends(get_db),
+    ):
+        """Entrar na lista de espera de um evento esgotado (apenas estudantes)."""
+        user = require_estudante(user)
+        user_id = user.get("id")
+
+        # Bloqueado como em `promover` (evento, depois fila): um cancelamento em simultâneo
+        # espera pelo commit e promove quem entrou
+        evento = db.get(Evento, id, with_for_update=True)
         if not evento:
             raise HTTPException(status_code=404, detail="Evento não encontrado")
-
-        # Verificar se o evento está disponível para inscrições
         if evento.status != "agendado":
             raise HTTPException(
-                status_code=400,
-                detail="Este evento não está a aceitar inscrições."
+                status_code=400, detail="Este evento não está a aceitar inscrições."
             )
+        if db.get(Inscricao, (id, user_id)):
+            raise HTTPException(status_code=400, detail="Já se encontra inscrito neste evento.")
 
-        # Verificar se já existe uma inscrição
-        inscricao_existente = db.execute(
-            select(Inscricao).where(
-                Inscricao.evento_id == id,
-                Inscricao.user_id == user_id
+        espera = lista_espera.consultar(db, id, user_id)
+        if espera is not None:
+            # Pedido repetido: mantém a senha que já tinha
+            response.status_code = status.HTTP_200_OK
+            return espera
+        # Com a fila à espera, os lugares libertados são logo promovidos
+        if evento.lugares_ocupados < evento.capacidade:
+            raise HTTPException(
+                status_code=409, detail="O evento tem lugares livres; inscreva-se diretamente."
             )
-        ).scalar_one_or_none()
 
-        if inscricao_existente:
+        try:
+            espera = lista_espera.entrar(db, id, user_id)
+            # Sem bloqueios de linha (SQLite) o lugar pode ter sido libertado depois da
+            # verificação acima; a fila já está escrita, por isso é promovida aqui
+            promovidos = lista_espera.promover(db, id)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
             raise HTTPException(
-                status_code=400,
-                detail="Já se encontra inscrito neste evento."
+                status_code=409, detail="Pedido repetido em simultâneo; tente de novo."
             )
+        # A promoção segue a ordem da fila: quem saiu estava à frente (ou é o próprio)
+        espera["em_espera"] -= len(promovidos)
+        espera["posicao"] = max(0, espera["posicao"] - len(promovidos))
+        return espera
 
-        # Criar a inscrição
-        inscricao = Inscricao(
-            evento_id=id,
-            user_id=user_id,
-            valor_pago=evento.preco
-        )
+    @app.get("/events/{id}/lista-espera/me", response_model=EsperaOut)
+    @db_endpoint
+    def posicao_lista_espera(
+        id: int,
+        user=Depends(verify_token),
+        db: Session = Depends(get_read_db),
+    ):
+        """Posição do estudante na lista de espera do evento."""
+        user = require_estudante(user)
+        espera = lista_espera.consultar(db, id, user.get("id"))
+        if espera is None:
+            raise HTTPException(status_code=404, detail="Não se encontra na lista de espera.")
+        return espera
 
-        db.add(inscricao)
+    @app.delete("/events/{id}/lista-espera/me")
+    @db_endpoint
+    def sair_lista_espera(
+        id: int,
+        user=Depends(verify_token),
+        db: Session = Depends(get_db),
+    ):
+        """Sair da lista de espera do evento."""
+        user = require_estudante(user)
+        if not lista_espera.sair(db, id, user.get("id")):
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Não se encontra na lista de espera.")
         db.commit()
-        db.refresh(inscricao)
-
-        return {
-            "message": "Inscrição efetuada com sucesso.",
-            "inscricao": inscricao
-        }
+        return {"mensagem": "Saiu da lista de espera."}
 
     @app.get("/events/{evento_id}/inscritos", response_model=PaginatedInscricoes)
+    @db_endpoint
     def get_all_inscricoes(
         evento_id: int,
         page: int = Query(default=1, ge=1),
         limit: int = Query(default=10, ge=1, le=100),
+        cursor: str | None = None,
+        count: CountMode = "estimated",
         user=Depends(verify_token),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
     ):
         """Listar todas as inscrições de um evento (apenas organizador do evento)."""
         user = require_organizador(user)
@@ -238,26 +727,90 @@ def create_app() -> FastAPI:
                 detail="Apenas o organizador do evento pode ver as inscrições."
             )
 
-        stmt = select(Inscricao).where(Inscricao.evento_id == evento_id)
-        
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = db.execute(count_stmt).scalar_one()
+        stmt = select(*inscricao_out.columns).where(Inscricao.evento_id == evento_id)
 
-        offset = (page - 1) * limit
-        rows = (
-            db.execute(stmt.order_by(desc(Inscricao.created_at)).limit(limit).offset(offset))
-            .scalars()
-            .all()
-        )
+        if count == "exact":
+            total = db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+        elif count == "estimated":
+            total = total_inscricoes(db, evento_id)
+        else:
+            total = None
 
-        return {
+        stmt = stmt.order_by(desc(Inscricao.created_at), desc(Inscricao.user_id)).limit(limit + 1)
+        if cursor:
+            # Paginação por chave: continua depois de (created_at, user_id) sem OFFSET
+            created_at, last_user_id = decode_cursor(cursor)
+            stmt = stmt.where(
+                or_(
+                    Inscricao.created_at < created_at,
+                    and_(Inscricao.created_at == created_at, Inscricao.user_id < last_user_id),
+                )
+            )
+        else:
+            stmt = stmt.offset((page - 1) * limit)
+        rows = db.execute(stmt).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].user_id)
+
+        return json_response({
             "total": total,
-            "totalPages": (total + limit - 1) // limit,
-            "currentPage": page,
-            "data": rows,
-        }
+            "totalPages": None if total is None else (total + limit - 1) // limit,
+            "currentPage": None if cursor else page,
+            "data": inscricao_out.many(rows),
+            "nextCursor": next_cursor,
+        })
+
+    @app.get("/events/{evento_id}/inscritos/export")
+    @db_endpoint
+    def export_inscricoes(
+        evento_id: int,
+        formato: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        user=Depends(verify_token),
+        db: Session = Depends(get_db),
+    ):
+        """Exportar as inscrições de um evento em NDJSON ou CSV (apenas organizador do evento)."""
+        user = require_organizador(user)
+        _evento_do_organizador(
+            db, evento_id, user, "Apenas o organizador do evento pode ver as inscrições."
+        )
+
+        stmt = (
+            select(*inscricao_out.columns)
+            .where(Inscricao.evento_id == evento_id)
+            .order_by(desc(Inscricao.created_at), desc(Inscricao.user_id))
+        )
+        return export_response(stmt, formato, f"inscritos_evento_{evento_id}")
+
+    @app.get("/events/{evento_id}/stats")
+    @db_endpoint
+    def get_evento_stats(
+        evento_id: int,
+        user=Depends(verify_token),
+        db: Session = Depends(get_read_db),
+    ):
+        """Inscrições e valor pago por status de um evento (apenas organizador do evento)."""
+        user = require_organizador(user)
+        evento = _evento_do_organizador(
+            db, evento_id, user, "Apenas o organizador do evento pode ver as estatísticas."
+        )
+        return {"evento_id": evento_id, **estatisticas.resumo(db, evento.organizador_id, evento_id)}
+
+    @app.get("/organizers/me/stats")
+    @db_endpoint
+    def get_organizador_stats(
+        user=Depends(verify_token),
+        db: Session = Depends(get_read_db),
+    ):
+        """Inscrições e valor pago por status em todos os eventos do organizador."""
+        user = require_organizador(user)
+        return {"organizador_id": user["id"], **estatisticas.resumo(db, user["id"])}
 
     @app.patch("/events/{evento_id}/inscricoes/{user_id}", response_model=InscricaoOut)
+    @db_endpoint
     def update_inscricao_status(
         evento_id: int,
         user_id: int,
@@ -280,25 +833,42 @@ def create_app() -> FastAPI:
                 detail="Apenas o organizador do evento pode atualizar inscrições."
             )
 
-        # Buscar a inscrição
+        # Buscar a inscrição (bloqueada até ao commit: o estado decide o acerto de lugares)
         inscricao = db.execute(
             select(Inscricao).where(
                 Inscricao.evento_id == evento_id,
                 Inscricao.user_id == user_id
-            )
+            ).with_for_update()
         ).scalar_one_or_none()
 
         if not inscricao:
             raise HTTPException(status_code=404, detail="Inscrição não encontrada")
 
+        # Cancelar liberta o lugar; reativar uma inscrição cancelada volta a ocupá-lo
+        libertou = payload.status == "cancelado" and inscricao.status != "cancelado"
+        reativou = payload.status != "cancelado" and inscricao.status == "cancelado"
+        if libertou:
+            libertar_lugares(db, evento_id)
+        elif reativou and not reservar_lugares(db, evento_id, so_agendados=False):
+            exc = recusa_reserva(db, evento_id, so_agendados=False)
+            db.rollback()
+            raise exc
+
+        if inscricao.status != payload.status:
+            ajustar_inscricoes(db, evento_id, *_mudancas([inscricao], payload.status))
+            alteracoes.registar(db, "inscricao", "atualizado", evento_id, payload.status, [user_id])
         inscricao.status = payload.status
         db.add(inscricao)
+        if libertou:
+            # O lugar passa para a cabeça da lista de espera na mesma transação
+            lista_espera.promover(db, evento_id)
         db.commit()
         db.refresh(inscricao)
 
         return inscricao
 
     @app.delete("/events/{evento_id}/inscricoes/{user_id}")
+    @db_endpoint
     def delete_inscricao(
         evento_id: int,
         user_id: int,
@@ -320,22 +890,197 @@ def create_app() -> FastAPI:
                 detail="Apenas o organizador do evento pode apagar inscrições."
             )
 
-        # Buscar a inscrição
+        # Buscar a inscrição (bloqueada até ao commit: o estado decide o acerto de lugares)
         inscricao = db.execute(
             select(Inscricao).where(
                 Inscricao.evento_id == evento_id,
                 Inscricao.user_id == user_id
-            )
+            ).with_for_update()
         ).scalar_one_or_none()
 
         if not inscricao:
             raise HTTPException(status_code=404, detail="Inscrição não encontrada")
 
+        if inscricao.status != "cancelado":
+            libertar_lugares(db, evento_id)
+        ajustar_inscricoes(db, evento_id, *_mudancas([inscricao], None))
+        alteracoes.registar(db, "inscricao", "apagado", evento_id, user_ids=[user_id])
+        libertou = inscricao.status != "cancelado"
         db.delete(inscricao)
+        if libertou:
+            # Apaga antes de promover: o mesmo utilizador pode voltar a entrar pela fila
+            db.flush()
+            lista_espera.promover(db, evento_id)
         db.commit()
 
         return {"mensagem": "Inscrição apagada com sucesso."}
 
+    # ==================== OPERAÇÕES EM LOTE ====================
+
+    @app.post("/events/{evento_id}/inscricoes", response_model=InscricaoBatchResponse)
+    @db_endpoint
+    def inscrever_em_lote(
+        evento_id: int,
+        payload: InscricaoBatchUsers,
+        user=Depends(verify_token),
+        db: Session = Depends(get_db),
+    ):
+        """Inscrever uma lista de estudantes num evento (apenas admin)."""
+        require_admin(user)
+        evento = db.get(Evento, evento_id)
+        if not evento:
+            raise HTTPException(status_code=404, detail="Evento não encontrado")
+        if evento.status != "agendado":
+            raise HTTPException(
+                status_code=400,
+                detail="Este evento não está a aceitar inscrições."
+            )
+
+        user_ids = list(dict.fromkeys(payload.user_ids))
+        existentes = _estados_inscricoes(db, evento_id, user_ids)
+        novos = [u for u in user_ids if u not in existentes]
+        aceites = novos[:reservar_ate(db, evento_id, len(novos))]
+
+        try:
+            if aceites:
+                db.execute(
+                    insert(Inscricao),
+                    [
+                        {
+                            "evento_id": evento_id,
+                            "user_id": u,
+                            "status": "pendente",
+                            "valor_pago": evento.preco,
+                        }
+                        for u in aceites
+                    ],
+                )
+                ajustar_inscricoes(
+                    db,
+                    evento_id,
+                    {"pendente": len(aceites)},
+                    {"pendente": Evento.preco * len(aceites)},
+                )
+                alteracoes.registar(db, "inscricao", "criado", evento_id, "pendente", aceites)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="Inscrições alteradas em simultâneo; repita o pedido."
+            )
+
+        aceites_set = set(aceites)
+        resultados = [
+            {
+                "user_id": u,
+                "resultado": "ja_inscrito" if u in existentes
+                else "inscrita" if u in aceites_set else "esgotado",
+            }
+            for u in user_ids
+        ]
+        return {"evento_id": evento_id, "resultados": resultados}
+
+    @app.patch("/events/{evento_id}/inscricoes", response_model=InscricaoBatchResponse)
+    @db_endpoint
+    def update_inscricoes_status_em_lote(
+        evento_id: int,
+        payload: InscricaoBatchStatus,
+        user=Depends(verify_token),
+        db: Session = Depends(get_db),
+    ):
+        """Atualizar o status de várias inscrições (apenas organizador do evento)."""
+        user = require_organizador(user)
+        _evento_do_organizador(
+            db, evento_id, user, "Apenas o organizador do evento pode atualizar inscrições."
+        )
+
+        user_ids = list(dict.fromkeys(payload.user_ids))
+        estados = _estados_inscricoes(db, evento_id, user_ids)
+        alterar = [u for u in user_ids if u in estados and estados[u].status != payload.status]
+
+        esgotados: set[int] = set()
+        if payload.status == "cancelado":
+            libertar_lugares(db, evento_id, len(alterar))
+        else:
+            # Reativar inscrições canceladas volta a ocupar lugares, enquanto houver
+            reativar = [u for u in alterar if estados[u].status == "cancelado"]
+            ocupados = reservar_ate(db, evento_id, len(reativar), so_agendados=False)
+            esgotados = set(reativar[ocupados:])
+            alterar = [u for u in alterar if u not in esgotados]
+
+        if alterar:
+            db.execute(
+                update(Inscricao)
+                .where(Inscricao.evento_id == evento_id, Inscricao.user_id.in_(alterar))
+                .values(status=payload.status)
+                .execution_options(synchronize_session=False)
+            )
+            ajustar_inscricoes(
+                db, evento_id, *_mudancas((estados[u] for u in alterar), payload.status)
+            )
+            alteracoes.registar(db, "inscricao", "atualizado", evento_id, payload.status, alterar)
+            if payload.status == "cancelado":
+                lista_espera.promover(db, evento_id)
+        db.commit()
+
+        alterados = set(alterar)
+        resultados = [
+            {
+                "user_id": u,
+                "resultado": "nao_encontrada" if u not in estados
+                else "esgotado" if u in esgotados
+                else "atualizada" if u in alterados else "inalterada",
+            }
+            for u in user_ids
+        ]
+        return {"evento_id": evento_id, "resultados": resultados}
+
+    @app.delete("/events/{evento_id}/inscricoes", response_model=InscricaoBatchResponse)
+    @db_endpoint
+    def delete_inscricoes_em_lote(
+        evento_id: int,
+        payload: InscricaoBatchUsers,
+        user=Depends(verify_token),
+        db: Session = Depends(get_db),
+    ):
+        """Apagar várias inscrições (apenas organizador do evento)."""
+        user = require_organizador(user)
+        _evento_do_organizador(
+            db, evento_id, user, "Apenas o organizador do evento pode apagar inscrições."
+        )
+
+        user_ids = list(dict.fromkeys(payload.user_ids))
+        estados = _estados_inscricoes(db, evento_id, user_ids)
+        if estados:
+            db.execute(
+                delete(Inscricao)
+                .where(Inscricao.evento_id == evento_id, Inscricao.user_id.in_(list(estados)))
+                .execution_options(synchronize_session=False)
+            )
+            ocupados = sum(1 for e in estados.values() if e.status != "cancelado")
+            libertar_lugares(db, evento_id, ocupados)
+            ajustar_inscricoes(db, evento_id, *_mudancas(estados.values(), None))
+            alteracoes.registar(db, "inscricao", "apagado", evento_id, user_ids=list(estados))
+            if ocupados:
+                lista_espera.promover(db, evento_id)
+        db.commit()
+
+        resultados = [
+            {"user_id": u, "resultado": "apagada" if u in estados else "nao_encontrada"}
+            for u in user_ids
+        ]
+        return {"evento_id": evento_id, "resultados": resultados}
+
+    # ==================== GRAPHQL ====================
+
+    if settings.graphql_enabled:
+        # Importado só aqui, para as instalações com o GraphQL desligado não carregarem o strawberry
+        from .graphql_schema import graphql_router
+
+        read_db = app_db.get_async_read_db if settings.db_async else get_read_db
+        app.include_router(graphql_router(read_db), prefix="/graphql")
+
     return app
 
 
@@ -0,0 +1,291 @@
+"""Métricas da aplicação no formato de texto do Prometheus (`GET /metrics`).
+
+- `http_request_duration_seconds{method,route,status}`: latência por rota (o template do
+  path, não o path concreto, para não multiplicar séries) e por código de resposta.
+- `db_statements_per_request{method,route}` e `db_time_per_request_seconds{...}`: quantas
+  queries cada pedido fez e quanto tempo passou na base de dados. Comparando com a
+  latência total percebe-se se um pedido lento é MySQL ou código Python (JWT, serialização).
+- `db_statement_duration_seconds{method,route}`: duração de cada query.
+- `db_pool_*`: ligações em uso, overflow e tamanho do pool do engine de `app.db`.
+- `changes_subscribers`: pedidos de long-poll e streams SSE à escuta do feed de alterações.
+- `lifecycle_batch_duration_seconds`, `lifecycle_lag_seconds` e `lifecycle_leader`: lotes
+  do ciclo de vida dos eventos (app/ciclo_vida.py), atraso do evento terminado mais antigo
+  por fechar e se este worker tem o lease (só aparecem depois do primeiro ciclo).
+
+Os eventos `before/after_cursor_execute` do SQLAlchemy acumulam a contagem e o tempo no
+`RequestStats` do pedido atual (um contextvar, que a threadpool e o `run_sync` herdam).
+Cada observação é um bisect e dois incrementos sob um lock, sem dependências externas.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+STATEMENT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Pedidos que não corresponderam a nenhuma rota (404) partilham uma única série
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    return ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Histograma com buckets fixos, uma série por combinação de labels."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets: tuple):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [contagens por bucket (+Inf no fim), soma]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [
+                (labels, list(counts), total) for labels, (counts, total) in self._series.items()
+            ]
+        for labels, counts, total in sorted(snapshot):
+            base = _labels(self.labelnames, labels)
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'{sep}le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{{{base}{le}}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Gauge:
+    """Gauge calculado no momento da recolha (`callback` devolve o valor ou None)."""
+
+    def __init__(self, name: str, help: str, callback: Callable[[], float | None]):
+        self.name = name
+        self.help = help
+        self.callback = callback
+
+    def collect(self) -> list[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {value}",
+        ]
+
+
+class RequestStats:
+    """Queries feitas durante um pedido (preenchido pelos eventos do engine)."""
+
+    __slots__ = ("db_seconds", "scope", "statements")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # O router do Starlette grava a rota encontrada no próprio scope do pedido
+        route = self.scope.get("route")
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Latência dos pedidos HTTP por rota e código de resposta.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+db_statements_per_request = Histogram(
+    "db_statements_per_request",
+    "Número de queries SQL executadas por pedido.",
+    ("method", "route"),
+    COUNT_BUCKETS,
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds",
+    "Tempo total passado em queries SQL por pedido.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds",
+    "Duração de cada query SQL.",
+    ("method", "route"),
+    STATEMENT_BUCKETS,
+)
+
+lifecycle_batch_duration = Histogram(
+    "lifecycle_batch_duration_seconds",
+    "Duração de cada lote de eventos terminados fechados pelo ciclo de vida.",
+    (),
+    LATENCY_BUCKETS,
+)
+
+HISTOGRAMS = (
+    http_request_duration,
+    db_statements_per_request,
+    db_time_per_request,
+    db_statement_duration,
+    lifecycle_batch_duration,
+)
+
+
+def _pool_value(key: str) -> Callable[[], float | None]:
+    def read():
+        from . import db as app_db
+
+        eng = app_db.engine if app_db.engine is not None else app_db.async_engine
+        status = app_db.pool_status(eng)
+        # StaticPool (SQLite em memória) não tem estas contagens
+        return None if status is None else status[key]
+
+    return read
+
+
+def _subscritores() -> float:
+    from .alteracoes import difusor
+
+    return difusor.subscritores
+
+
+def _ciclo_vida(atributo: str) -> Callable[[], float | None]:
+    def read():
+        from .ciclo_vida import agendador
+
+        value = getattr(agendador, atributo)
+        return None if value is None else float(value)
+
+    return read
+
+
+GAUGES = (
+    Gauge("db_pool_checked_out", "Ligações do pool em uso.", _pool_value("checked_out")),
+    Gauge("db_pool_overflow", "Ligações abertas além do pool_size.", _pool_value("overflow")),
+    Gauge("db_pool_size", "Tamanho configurado do pool.", _pool_value("size")),
+    Gauge("db_pool_capacity", "Máximo de ligações do pool.", _pool_value("capacity")),
+    Gauge("changes_subscribers", "Subscritores do feed de alterações.", _subscritores),
+    Gauge(
+        "lifecycle_lag_seconds",
+        "Há quanto tempo terminou o evento agendado mais antigo ainda por fechar.",
+        _ciclo_vida("atraso"),
+    ),
+    Gauge(
+        "lifecycle_leader",
+        "1 se este worker tem o lease do ciclo de vida.",
+        _ciclo_vida("lider"),
+    ),
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "_metrics_start", None)
+    if stats is None or start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats.statements += 1
+    stats.db_seconds += elapsed
+    db_statement_duration.observe(elapsed, stats.scope["method"], stats.route)
+
+
+def instrument_engine(eng: Engine) -> None:
+    """Regista os eventos de contagem/tempo de queries no engine (idempotente)."""
+    if not event.contains(eng, "before_cursor_execute", _before_cursor_execute):
+        event.listen(eng, "before_cursor_execute", _before_cursor_execute)
+        event.listen(eng, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede cada pedido HTTP e as queries que ele fez."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route = stats.route
+            http_request_duration.observe(elapsed, scope["method"], route, status_code)
+            db_statements_per_request.observe(stats.statements, scope["method"], route)
+            db_time_per_request.observe(stats.db_seconds, scope["method"], route)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.collect())
+    for gauge in GAUGES:
+        lines.extend(gauge.collect())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    for histogram in HISTOGRAMS:
+        histogram.clear()
@@ -0,0 +1,429 @@
+"""Migrações versionadas do esquema do events-service.
+
+Cada migração tem um número de versão e é aplicada uma única vez, ficando registada na
+tabela `schema_migrations`. O DDL e as cargas de dados de cada versão estão aqui,
+congelados como eram nessa versão: as migrações não importam `app.models` nem os módulos
+da aplicação, que podem mudar depois. Uma mudança de esquema é uma migração nova, e
+`tests/test_migrations.py` verifica que o resultado coincide com os modelos. As operações
+são idempotentes (criar se não existe), para uma base criada antes do registo de versões
+convergir para o mesmo esquema.
+
+Uso: `python -m app.migrations` aplica as migrações pendentes.
+"""
+
+import logging
+import math
+from collections.abc import Callable
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    Text,
+    func,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+# O `now()` do SQLite com microssegundos (app/db.py) também vale para o DDL daqui
+from . import db  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("nome", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+_EventoTipo = Enum("cultural", "academico", "lazer", name="evento_tipo")
+_EventoStatus = Enum("agendado", "concluido", "cancelado", name="evento_status")
+_InscricaoStatus = Enum("pendente", "concluido", "cancelado", name="inscricao_status")
+
+
+def _create_table(conn: Connection, table: Table) -> None:
+    table.create(conn, checkfirst=True)
+
+
+def _create_index(
+    conn: Connection, tabela: str, name: str, colunas: str, prefixo: str = ""
+) -> None:
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(tabela)}
+    if name not in existing:
+        conn.execute(text(f"CREATE {prefixo}INDEX {name} ON {tabela} ({colunas})"))
+
+
+def _add_column(conn: Connection, tabela: str, column: Column) -> None:
+    existing = {col["name"] for col in inspect(conn).get_columns(tabela)}
+    if column.name not in existing:
+        ddl = CreateColumn(column).compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {ddl}"))
+
+
+_eventos_v1 = Table(
+    "eventos",
+    _metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("nome", String(255), nullable=False),
+    Column("descricao", Text, nullable=False),
+    Column("data_inicio", DateTime, nullable=False),
+    Column("data_fim", DateTime, nullable=True),
+    Column("local", String(255), nullable=False),
+    Column("capacidade", Integer, nullable=False),
+    Column("preco", Float, nullable=False),
+    Column("tipo", _EventoTipo, nullable=False),
+    Column("imagem", String(1024), nullable=True),
+    Column("organizador_id", Integer, nullable=False),
+    Column("status", _EventoStatus, nullable=False),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+_inscricoes_v1 = Table(
+    "inscricoes",
+    _metadata,
+    Column("evento_id", Integer, primary_key=True, nullable=False),
+    Column("user_id", Integer, primary_key=True, nullable=False),
+    Column("status", _InscricaoStatus, nullable=False),
+    Column("valor_pago", Numeric(10, 2), nullable=False),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def _m001_tabelas_base(conn: Connection) -> None:
+    # Equivalente ao antigo Base.metadata.create_all
+    _create_table(conn, _eventos_v1)
+    _create_table(conn, _inscricoes_v1)
+
+
+def _m002_indices_listagens(conn: Connection) -> None:
+    for name, colunas in (
+        ("ix_eventos_tipo_status_data_inicio", "tipo, status, data_inicio, id"),
+        ("ix_eventos_status_data_inicio", "status, data_inicio"),
+        ("ix_eventos_data_inicio", "data_inicio, id"),
+    ):
+        _create_index(conn, "eventos", name, colunas)
+    for name, colunas in (
+        ("ix_inscricoes_evento_created_at", "evento_id, created_at, user_id"),
+        ("ix_inscricoes_user_id", "user_id"),
+    ):
+        _create_index(conn, "inscricoes", name, colunas)
+
+
+def _m003_lugares_ocupados(conn: Connection) -> None:
+    _add_column(
+        conn, "eventos", Column("lugares_ocupados", Integer, nullable=False, server_default="0")
+    )
+    conn.execute(
+        text(
+            "UPDATE eventos SET lugares_ocupados = ("
+            " SELECT COUNT(*) FROM inscricoes"
+            " WHERE inscricoes.evento_id = eventos.id AND inscricoes.status <> 'cancelado')"
+        )
+    )
+
+
+_contadores_eventos_v4 = Table(
+    "contadores_eventos",
+    _metadata,
+    Column("tipo", _EventoTipo, primary_key=True),
+    Column("status", _EventoStatus, primary_key=True),
+    Column("total", Integer, nullable=False),
+)
+
+_contadores_inscricoes_v4 = Table(
+    "contadores_inscricoes",
+    _metadata,
+    Column("evento_id", Integer, primary_key=True),
+    Column("status", _InscricaoStatus, primary_key=True),
+    Column("total", Integer, nullable=False),
+)
+
+
+def _m004_contadores(conn: Connection) -> None:
+    _create_table(conn, _contadores_eventos_v4)
+    _create_table(conn, _contadores_inscricoes_v4)
+    conn.execute(text("DELETE FROM contadores_eventos"))
+    conn.execute(
+        text(
+            "INSERT INTO contadores_eventos (tipo, status, total)"
+            " SELECT tipo, status, COUNT(*) FROM eventos GROUP BY tipo, status"
+        )
+    )
+    conn.execute(text("DELETE FROM contadores_inscricoes"))
+    conn.execute(
+        text(
+            "INSERT INTO contadores_inscricoes (evento_id, status, total)"
+            " SELECT evento_id, status, COUNT(*) FROM inscricoes GROUP BY evento_id, status"
+        )
+    )
+
+
+_FTS5_V5 = (
+    (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS eventos_fts USING fts5("
+        "nome, descricao, local, content='eventos', content_rowid='id')"
+    ),
+    (
+        "CREATE TRIGGER IF NOT EXISTS eventos_fts_ai AFTER INSERT ON eventos BEGIN "
+        "INSERT INTO eventos_fts(rowid, nome, descricao, local) "
+        "VALUES (new.id, new.nome, new.descricao, new.local); END"
+    ),
+    (
+        "CREATE TRIGGER IF NOT EXISTS eventos_fts_ad AFTER DELETE ON eventos BEGIN "
+        "INSERT INTO eventos_fts(eventos_fts, rowid, nome, descricao, local) "
+        "VALUES ('delete', old.id, old.nome, old.descricao, old.local); END"
+    ),
+    # Só quando muda o texto: reservas de lugares e mudanças de estado não tocam no índice
+    (
+        "CREATE TRIGGER IF NOT EXISTS eventos_fts_au AFTER UPDATE OF nome, descricao, local "
+        "ON eventos BEGIN "
+        "INSERT INTO eventos_fts(eventos_fts, rowid, nome, descricao, local) "
+        "VALUES ('delete', old.id, old.nome, old.descricao, old.local); "
+        "INSERT INTO eventos_fts(rowid, nome, descricao, local) "
+        "VALUES (new.id, new.nome, new.descricao, new.local); END"
+    ),
+    "INSERT INTO eventos_fts(eventos_fts) VALUES ('rebuild')",
+)
+
+
+def _m005_pesquisa_texto(conn: Connection) -> None:
+    if conn.dialect.name == "mysql":
+        _create_index(conn, "eventos", "ix_eventos_texto", "nome, descricao, local", "FULLTEXT ")
+    else:
+        # FTS5 com triggers de sincronização, e os eventos existentes indexados
+        for ddl in _FTS5_V5:
+            conn.execute(text(ddl))
+
+
+def _nivel_duracao_v6(data_inicio, data_fim) -> int:
+    # Classes de duração da versão 6 (app/intervalos.py na altura): 2^nivel minutos, até 20
+    if data_fim is None or data_fim <= data_inicio:
+        return 0
+    minutos = math.ceil((data_fim - data_inicio).total_seconds() / 60)
+    return min(minutos.bit_length(), 20)
+
+
+def _m006_janelas_datas(conn: Connection) -> None:
+    _add_column(
+        conn, "eventos", Column("duracao_nivel", Integer, nullable=False, server_default="0")
+    )
+    rows = conn.execute(
+        select(_eventos_v1.c.id, _eventos_v1.c.data_inicio, _eventos_v1.c.data_fim).where(
+            _eventos_v1.c.data_fim.isnot(None)
+        )
+    ).all()
+    valores = [
+        {"b_id": row.id, "b_nivel": _nivel_duracao_v6(row.data_inicio, row.data_fim)}
+        for row in rows
+    ]
+    if valores:
+        # updated_at mantém-se: o nível é derivado das datas, não uma edição do evento
+        conn.execute(
+            text(
+                "UPDATE eventos SET duracao_nivel = :b_nivel, updated_at = updated_at"
+                " WHERE id = :b_id"
+            ),
+            valores,
+        )
+    _create_index(
+        conn, "eventos", "ix_eventos_duracao_data_inicio", "duracao_nivel, data_inicio, id"
+    )
+
+
+_geracoes_listas_v7 = Table(
+    "geracoes_listas",
+    _metadata,
+    Column("nome", String(50), primary_key=True),
+    Column("geracao", Integer, nullable=False),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def _m007_validadores_http(conn: Connection) -> None:
+    _add_column(conn, "eventos", Column("versao", Integer, nullable=False, server_default="1"))
+    _create_table(conn, _geracoes_listas_v7)
+    existe = conn.execute(text("SELECT nome FROM geracoes_listas WHERE nome = 'eventos'")).first()
+    if not existe:
+        conn.execute(text("INSERT INTO geracoes_listas (nome, geracao) VALUES ('eventos', 0)"))
+
+
+_estatisticas_inscricoes_v8 = Table(
+    "estatisticas_inscricoes",
+    _metadata,
+    Column("organizador_id", Integer, primary_key=True),
+    Column("evento_id", Integer, primary_key=True),
+    Column("status", _InscricaoStatus, primary_key=True),
+    Column("total", Integer, nullable=False),
+    Column("valor_pago", Numeric(14, 2), nullable=False),
+)
+
+
+def _m008_estatisticas_inscricoes(conn: Connection) -> None:
+    _create_table(conn, _estatisticas_inscricoes_v8)
+    conn.execute(text("DELETE FROM estatisticas_inscricoes"))
+    conn.execute(
+        text(
+            "INSERT INTO estatisticas_inscricoes"
+            " (organizador_id, evento_id, status, total, valor_pago)"
+            " SELECT eventos.organizador_id, inscricoes.evento_id, inscricoes.status, COUNT(*),"
+            " COALESCE(SUM(inscricoes.valor_pago), 0)"
+            " FROM inscricoes JOIN eventos ON eventos.id = inscricoes.evento_id"
+            " GROUP BY eventos.organizador_id, inscricoes.evento_id, inscricoes.status"
+        )
+    )
+
+
+_alteracoes_v9 = Table(
+    "alteracoes",
+    _metadata,
+    Column("seq", Integer, primary_key=True, autoincrement=True),
+    Column("entidade", String(16), nullable=False),
+    Column("acao", String(16), nullable=False),
+    Column("evento_id", Integer, nullable=False),
+    Column("user_id", Integer, nullable=True),
+    Column("status", String(16), nullable=True),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Index("ix_alteracoes_created_at", "created_at"),
+)
+
+
+def _m009_alteracoes(conn: Connection) -> None:
+    _create_table(conn, _alteracoes_v9)
+
+
+_arrendamentos_v10 = Table(
+    "arrendamentos",
+    _metadata,
+    Column("nome", String(50), primary_key=True),
+    Column("dono", String(255), nullable=True),
+    Column("expira_em", DateTime, nullable=True),
+)
+
+
+def _m010_ciclo_vida(conn: Connection) -> None:
+    _create_index(conn, "eventos", "ix_eventos_status_data_fim", "status, data_fim")
+    _create_table(conn, _arrendamentos_v10)
+    existe = conn.execute(
+        text("SELECT nome FROM arrendamentos WHERE nome = 'ciclo_vida_eventos'")
+    ).first()
+    if not existe:
+        conn.execute(text("INSERT INTO arrendamentos (nome) VALUES ('ciclo_vida_eventos')"))
+
+
+_lista_espera_v11 = Table(
+    "lista_espera",
+    _metadata,
+    Column("evento_id", Integer, primary_key=True),
+    Column("user_id", Integer, primary_key=True),
+    Column("senha", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Index("ix_lista_espera_evento_senha", "evento_id", "senha", unique=True),
+)
+
+_filas_espera_v11 = Table(
+    "filas_espera",
+    _metadata,
+    Column("evento_id", Integer, primary_key=True),
+    Column("ultima_senha", Integer, nullable=False),
+    Column("em_espera", Integer, nullable=False),
+)
+
+_nos_filas_espera_v11 = Table(
+    "nos_filas_espera",
+    _metadata,
+    Column("evento_id", Integer, primary_key=True),
+    Column("no", BigInteger, primary_key=True, autoincrement=False),
+    Column("total", Integer, nullable=False),
+)
+
+
+def _m011_lista_espera(conn: Connection) -> None:
+    for table in (_lista_espera_v11, _filas_espera_v11, _nos_filas_espera_v11):
+        _create_table(conn, table)
+
+
+def _m012_alteracoes_seq_bigint(conn: Connection) -> None:
+    # No SQLite INTEGER PRIMARY KEY já tem 64 bits
+    if conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE alteracoes MODIFY seq BIGINT NOT NULL AUTO_INCREMENT"))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "tabelas_base", _m001_tabelas_base),
+    (2, "indices_listagens", _m002_indices_listagens),
+    (3, "lugares_ocupados", _m003_lugares_ocupados),
+    (4, "contadores", _m004_contadores),
+    (5, "pesquisa_texto", _m005_pesquisa_texto),
+    (6, "janelas_datas", _m006_janelas_datas),
+    (7, "validadores_http", _m007_validadores_http),
+    (8, "estatisticas_inscricoes", _m008_estatisticas_inscricoes),
+    (9, "alteracoes", _m009_alteracoes),
+    (10, "ciclo_vida", _m010_ciclo_vida),
+    (11, "lista_espera", _m011_lista_espera),
+    (12, "alteracoes_seq_bigint", _m012_alteracoes_seq_bigint),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    """Versão do esquema aplicada na base de dados (0 se nunca foi migrada)."""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    version = conn.execute(select(func.max(schema_migrations.c.version))).scalar()
+    return version or 0
+
+
+def upgrade(conn: Connection) -> int:
+    """Aplica as migrações pendentes e devolve a versão final."""
+    # Caso normal no arranque: esquema já atualizado, sem lock nem DDL
+    version = current_version(conn)
+    if version >= LATEST_VERSION:
+        conn.rollback()
+        return version
+    is_mysql = conn.dialect.name == "mysql"
+    if is_mysql:
+        # Vários workers a arrancar ao mesmo tempo: só um migra de cada vez. 0 é o tempo
+        # esgotado e NULL um erro; migrar sem o lock correria em paralelo com outro worker
+        locked = conn.execute(text("SELECT GET_LOCK('events_schema_migrations', 60)")).scalar()
+        if locked != 1:
+            conn.rollback()
+            raise RuntimeError("Lock das migrações não obtido ao fim de 60 s; migração abortada")
+    try:
+        _create_table(conn, schema_migrations)
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+        for version, nome, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            logger.info(f"A aplicar migração {version:03d}_{nome}")
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, nome=nome))
+            conn.commit()
+    finally:
+        if is_mysql:
+            conn.execute(text("SELECT RELEASE_LOCK('events_schema_migrations')"))
+    return current_version(conn)
+
+
+if __name__ == "__main__":
+    from .db import create_sync_engine
+
+    with create_sync_engine().connect() as connection:
+        print(f"Esquema na versão {upgrade(connection)}")
@@ -1,8 +1,10 @@
 from sqlalchemy import (
+    BigInteger,
     Column,
     DateTime,
     Enum,
     Float,
+    Index,
     Integer,
     Numeric,
     String,
@@ -33,10 +35,32 @@ class Evento(Base):
     imagem = Column(String(1024), nullable=True)
     organizador_id = Column(Integer, nullable=False)
     status = Column(EventoStatus, nullable=False, default="agendado")
+    # Inscrições não canceladas; mantido por app/lugares.py na mesma transação
+    lugares_ocupados = Column(Integer, nullable=False, default=0, server_default="0")
+    # Classe da duração (0 = pontual); mantido em app/intervalos.py para as janelas de datas
+    duracao_nivel = Column(Integer, nullable=False, default=0, server_default="0")
+    # Incrementada em cada edição; com o id forma o ETag (updated_at só tem segundos)
+    versao = Column(Integer, nullable=False, default=1, server_default="1")
 
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Listagem com filtros tipo/status ordenada por (data_inicio, id)
+        Index("ix_eventos_tipo_status_data_inicio", "tipo", "status", "data_inicio", "id"),
+        Index("ix_eventos_status_data_inicio", "status", "data_inicio"),
+        # Listagem sem filtros
+        Index("ix_eventos_data_inicio", "data_inicio", "id"),
+        # Sobreposição com uma janela de datas, por classe de duração (app/intervalos.py)
+        Index("ix_eventos_duracao_data_inicio", "duracao_nivel", "data_inicio", "id"),
+        # Eventos agendados já terminados, fechados em lotes por app/ciclo_vida.py
+        Index("ix_eventos_status_data_fim", "status", "data_fim"),
+        # Pesquisa de texto (app/search.py); no SQLite é a tabela FTS5 `eventos_fts`
+        Index(
+            "ix_eventos_texto", "nome", "descricao", "local", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+    )
+
 
 class Inscricao(Base):
     """
@@ -53,3 +77,123 @@ class Inscricao(Base):
 
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # user_id desempata a ordenação por created_at (cursor de paginação)
+        Index("ix_inscricoes_evento_created_at", "evento_id", "created_at", "user_id"),
+        Index("ix_inscricoes_user_id", "user_id"),
+    )
+
+
+class ContadorEventos(Base):
+    """Total de eventos por (tipo, status), mantido na mesma transação de cada escrita."""
+    __tablename__ = "contadores_eventos"
+
+    tipo = Column(EventoTipo, primary_key=True)
+    status = Column(EventoStatus, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+
+class ContadorInscricoes(Base):
+    """Total de inscrições por (evento_id, status), mantido como ContadorEventos."""
+    __tablename__ = "contadores_inscricoes"
+
+    evento_id = Column(Integer, primary_key=True)
+    status = Column(InscricaoStatus, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+
+class GeracaoListas(Base):
+    """Geração das listagens de eventos, avançada na mesma transação de cada escrita."""
+    __tablename__ = "geracoes_listas"
+
+    nome = Column(String(50), primary_key=True)
+    geracao = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+
+class EstatisticaInscricoes(Base):
+    """Inscrições e valor pago por (organizador_id, evento_id, status), para as estatísticas.
+
+    Mantida como ContadorInscricoes, na mesma transação de cada escrita (app/estatisticas.py).
+    """
+    __tablename__ = "estatisticas_inscricoes"
+
+    organizador_id = Column(Integer, primary_key=True)
+    evento_id = Column(Integer, primary_key=True)
+    status = Column(InscricaoStatus, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    valor_pago = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class Alteracao(Base):
+    """Outbox das alterações a eventos e inscrições, escrito na mesma transação de cada
+    escrita e servido pelo feed `GET /events/changes` (ver app/alteracoes.py)."""
+    __tablename__ = "alteracoes"
+
+    # BIGINT: o outbox recebe uma linha por escrita (e por utilizador nos lotes); no SQLite
+    # só INTEGER PRIMARY KEY é autoincrementado, e já tem 64 bits
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entidade = Column(String(16), nullable=False)
+    acao = Column(String(16), nullable=False)
+    evento_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    status = Column(String(16), nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Compactação: o corte por idade não varre a tabela
+        Index("ix_alteracoes_created_at", "created_at"),
+    )
+
+
+class Arrendamento(Base):
+    """Lease de uma tarefa em segundo plano: só o `dono` a corre até `expira_em`.
+
+    Vários workers tentam ficar com ela; ver `ciclo_vida.arrendar`.
+    """
+    __tablename__ = "arrendamentos"
+
+    nome = Column(String(50), primary_key=True)
+    dono = Column(String(255), nullable=True)
+    expira_em = Column(DateTime, nullable=True)
+
+
+class EsperaInscricao(Base):
+    """Lugar de um estudante na lista de espera de um evento esgotado (app/lista_espera.py).
+
+    `senha` é atribuída por ordem de chegada em cada evento; a fila é servida por `senha`.
+    """
+    __tablename__ = "lista_espera"
+
+    evento_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    senha = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Cabeça da fila: as senhas mais baixas do evento
+        Index("ix_lista_espera_evento_senha", "evento_id", "senha", unique=True),
+    )
+
+
+class FilaEspera(Base):
+    """Última senha atribuída e pessoas em espera, por evento."""
+    __tablename__ = "filas_espera"
+
+    evento_id = Column(Integer, primary_key=True)
+    ultima_senha = Column(Integer, nullable=False, default=0)
+    em_espera = Column(Integer, nullable=False, default=0)
+
+
+class NoFilaEspera(Base):
+    """Nós da árvore de Fenwick das senhas em espera de cada evento.
+
+    O nó `no` conta as senhas em `(no - lowbit(no), no]`; a posição de uma senha é a soma
+    de no máximo 33 nós, lidos pela chave primária.
+    """
+    __tablename__ = "nos_filas_espera"
+
+    evento_id = Column(Integer, primary_key=True)
+    no = Column(BigInteger, primary_key=True, autoincrement=False)
+    total = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: Any) -> str:
+    """Gera um cursor opaco a partir da chave de ordenação da última linha."""
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    data = json.dumps(raw, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Descodifica um cursor no par (data, id) que o gerou."""
+    try:
+        first, second = _decode(cursor)
+        if not isinstance(second, int):
+            raise TypeError(second)
+        return datetime.fromisoformat(first), second
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+
+def decode_score_cursor(cursor: str) -> tuple[float, int]:
+    """Descodifica um cursor no par (relevância, id) de uma página de pesquisa."""
+    try:
+        score, last_id = _decode(cursor)
+        if not isinstance(score, (int, float)) or not isinstance(last_id, int):
+            raise TypeError(last_id)
+        return float(score), last_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
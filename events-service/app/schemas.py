@@ -1,13 +1,19 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Literal, Optional
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
+
+from .datas import para_utc
 
 
 EventoTipo = Literal["cultural", "academico", "lazer"]
 EventoStatus = Literal["agendado", "concluido", "cancelado"]
 InscricaoStatus = Literal["pendente", "concluido", "cancelado"]
+# Como calcular `total` nas listagens: COUNT(*), contadores mantidos, ou não calcular
+CountMode = Literal["exact", "estimated", "none"]
+# Datas recebidas pela API, em UTC sem fuso horário (ver app/datas.py)
+DataHora = Annotated[datetime, AfterValidator(para_utc)]
 
 
 # ==================== SCHEMAS DE EVENTO ====================
@@ -15,12 +21,12 @@ InscricaoStatus = Literal["pendente", "concluido", "cancelado"]
 class EventoBase(BaseModel):
     nome: str
     descricao: str
-    data_inicio: datetime
-    data_fim: Optional[datetime] = None
+    data_inicio: DataHora
+    data_fim: DataHora | None = None
     local: str
     capacidade: int = Field(ge=1)
     preco: float = Field(default=0, ge=0)
-    imagem: Optional[str] = None
+    imagem: str | None = None
     tipo: EventoTipo
 
 
@@ -29,16 +35,16 @@ class EventoCreate(EventoBase):
 
 
 class EventoUpdate(BaseModel):
-    nome: Optional[str] = None
-    descricao: Optional[str] = None
-    data_inicio: Optional[datetime] = None
-    data_fim: Optional[datetime] = None
-    local: Optional[str] = None
-    capacidade: Optional[int] = Field(default=None, ge=1)
-    preco: Optional[float] = Field(default=None, ge=0)
-    tipo: Optional[EventoTipo] = None
-    imagem: Optional[str] = None
-    status: Optional[EventoStatus] = None
+    nome: str | None = None
+    descricao: str | None = None
+    data_inicio: DataHora | None = None
+    data_fim: DataHora | None = None
+    local: str | None = None
+    capacidade: int | None = Field(default=None, ge=1)
+    preco: float | None = Field(default=None, ge=0)
+    tipo: EventoTipo | None = None
+    imagem: str | None = None
+    status: EventoStatus | None = None
 
 
 class EventoOut(BaseModel):
@@ -46,12 +52,12 @@ class EventoOut(BaseModel):
     nome: str
     descricao: str
     data_inicio: datetime
-    data_fim: Optional[datetime]
+    data_fim: datetime | None
     local: str
     capacidade: int
     preco: float
     tipo: EventoTipo
-    imagem: Optional[str]
+    imagem: str | None
     organizador_id: int
     status: EventoStatus
     created_at: datetime
@@ -62,10 +68,17 @@ class EventoOut(BaseModel):
 
 
 class PaginatedEventos(BaseModel):
-    total: int
-    totalPages: int
-    currentPage: int
+    total: int | None
+    totalPages: int | None
+    currentPage: int | None
     data: list[EventoOut]
+    nextCursor: str | None = None
+
+
+class CursorPaginatedEventos(BaseModel):
+    # Pesquisa e próximos eventos: só por cursor e sem total (contar custaria a consulta toda)
+    data: list[EventoOut]
+    nextCursor: str | None = None
 
 
 # ==================== SCHEMAS DE INSCRIÇÃO ====================
@@ -92,7 +105,63 @@ class InscricaoUpdateStatus(BaseModel):
 
 
 class PaginatedInscricoes(BaseModel):
-    total: int
-    totalPages: int
-    currentPage: int
+    total: int | None
+    totalPages: int | None
+    currentPage: int | None
     data: list[InscricaoOut]
+    nextCursor: str | None = None
+
+
+class EsperaOut(BaseModel):
+    evento_id: int
+    user_id: int
+    # 1 = o próximo a ser inscrito quando se libertar um lugar; 0 = já inscrito (um lugar
+    # libertou-se enquanto entrava na fila)
+    posicao: int
+    em_espera: int
+
+
+# ==================== SCHEMAS DE OPERAÇÕES EM LOTE ====================
+
+class InscricaoBatchUsers(BaseModel):
+    user_ids: list[int] = Field(min_length=1, max_length=5000)
+
+
+class InscricaoBatchStatus(InscricaoBatchUsers):
+    status: Literal["concluido", "cancelado"]
+
+
+class InscricaoBatchItem(BaseModel):
+    user_id: int
+    resultado: Literal[
+        "inscrita",
+        "atualizada",
+        "inalterada",
+        "apagada",
+        "nao_encontrada",
+        "ja_inscrito",
+        "esgotado",
+    ]
+
+
+class InscricaoBatchResponse(BaseModel):
+    evento_id: int
+    resultados: list[InscricaoBatchItem]
+
+
+# ==================== SCHEMAS DO FEED DE ALTERAÇÕES ====================
+
+class AlteracaoOut(BaseModel):
+    seq: int
+    entidade: Literal["evento", "inscricao"]
+    acao: Literal["criado", "atualizado", "apagado"]
+    evento_id: int
+    user_id: int | None
+    status: str | None
+    created_at: datetime
+
+
+class AlteracoesPage(BaseModel):
+    changes: list[AlteracaoOut]
+    # `since` do pedido seguinte
+    next: int
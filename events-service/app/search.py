@@ -0,0 +1,88 @@
+"""Pesquisa de texto integral sobre o nome, a descrição e o local dos eventos.
+
+No MySQL usa o índice FULLTEXT `ix_eventos_texto` (MATCH ... AGAINST em modo de linguagem
+natural), que o InnoDB mantém a cada INSERT/UPDATE/DELETE. No SQLite usa a tabela virtual
+FTS5 `eventos_fts`, de conteúdo externo, mantida pelos triggers criados na migração 005;
+a relevância é o BM25 com mais peso no nome e no local do que na descrição. Nos dois casos
+os resultados vêm ordenados por (relevância desc, id) e a paginação é por cursor sobre
+esse par, sem OFFSET.
+"""
+
+import re
+from collections.abc import Sequence
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    Select,
+    Table,
+    Text,
+    and_,
+    asc,
+    desc,
+    func,
+    literal_column,
+    or_,
+    select,
+    type_coerce,
+)
+from sqlalchemy.dialects.mysql import match
+
+from .models import Evento
+
+# Pesos BM25 por coluna da tabela FTS5 (nome, descricao, local)
+PESOS_BM25 = (10.0, 1.0, 5.0)
+
+eventos_fts = Table(
+    "eventos_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("nome", Text),
+    Column("descricao", Text),
+    Column("local", Text),
+)
+
+# Como o `innodb_ft_min_token_size` do MySQL: "de", "ao"... não entram na pesquisa
+MIN_PALAVRA = 3
+
+
+def termos(q: str) -> list[str]:
+    """Palavras da pesquisa; pontuação, operadores e palavras curtas são ignorados."""
+    return [p for p in re.findall(r"\w+", q.lower()) if len(p) >= MIN_PALAVRA]
+
+
+def pesquisa(dialect: str, palavras: Sequence[str], columns) -> tuple[Select, object]:
+    """SELECT de `columns` + `score` dos eventos que contêm alguma das palavras.
+
+    Devolve também a expressão da relevância, para a ordenação e o cursor.
+    """
+    if dialect == "mysql":
+        against = match(Evento.nome, Evento.descricao, Evento.local, against=" ".join(palavras))
+        against = against.in_natural_language_mode()
+        relevancia = type_coerce(against, Float)
+        stmt = select(*columns, relevancia.label("score")).where(against)
+        return stmt, relevancia
+
+    tabela = literal_column("eventos_fts")
+    # Cada palavra entre aspas: a pesquisa não é interpretada como sintaxe FTS5
+    consulta = " OR ".join(f'"{p}"' for p in palavras)
+    relevancia = -func.bm25(tabela, *PESOS_BM25, type_=Float)
+    stmt = (
+        select(*columns, relevancia.label("score"))
+        .select_from(Evento.__table__)
+        .join(eventos_fts, eventos_fts.c.rowid == Evento.id)
+        .where(tabela.op("MATCH")(consulta))
+    )
+    return stmt, relevancia
+
+
+def pagina(stmt: Select, relevancia, limit: int, depois: tuple[float, int] | None) -> Select:
+    """Ordena por (relevância desc, id) e continua depois do par do cursor."""
+    if depois is not None:
+        score, last_id = depois
+        stmt = stmt.where(
+            or_(relevancia < score, and_(relevancia == score, Evento.id > last_id))
+        )
+    return stmt.order_by(desc(relevancia), asc(Evento.id)).limit(limit)
@@ -0,0 +1,112 @@
+"""Serialização rápida das listagens e do detalhe de eventos/inscrições.
+
+Em vez de carregar instâncias ORM, validá-las com `EventoOut.model_validate` e deixar o
+FastAPI validar de novo a resposta inteira contra o `response_model`, os handlers
+selecionam só as colunas do schema de saída e convertem cada tuplo num dict já em modo
+JSON com conversores pré-calculados a partir do schema (`datetime` -> ISO 8601, `Decimal`
+-> string, `float` -> float). A resposta é um `JSONResponse`, que o FastAPI devolve tal
+como está: o JSON produzido é byte a byte o mesmo que o caminho com `response_model`.
+
+Os schemas continuam a ser a fonte de verdade (nomes, ordem e tipos dos campos) e
+continuam declarados como `response_model` para a documentação OpenAPI.
+"""
+
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, get_args
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .models import Alteracao, Evento, Inscricao
+from .schemas import AlteracaoOut, EventoOut, InscricaoOut
+
+
+def _json_converter(annotation) -> Callable[[Any], Any] | None:
+    """Conversão equivalente ao `model_dump(mode="json")` do pydantic para o tipo do campo."""
+    types = set(get_args(annotation)) or {annotation}
+    if datetime in types:
+        return datetime.isoformat
+    if Decimal in types:
+        return str
+    if float in types:
+        return float
+    return None
+
+
+class RowSerializer:
+    """Converte linhas com as colunas de `schema` (pela mesma ordem) em dicts JSON.
+
+    Com `fields`, só esses campos do schema: as colunas selecionadas e o JSON produzido
+    encolhem juntos.
+    """
+
+    def __init__(self, schema: type[BaseModel], entity, fields: Iterable[str] | None = None):
+        pedidos = set(schema.model_fields if fields is None else fields)
+        self.fields = tuple(name for name in schema.model_fields if name in pedidos)
+        self.columns = tuple(getattr(entity, name) for name in self.fields)
+        self._converters = tuple(
+            (name, converter)
+            for name, field in schema.model_fields.items()
+            if name in pedidos and (converter := _json_converter(field.annotation)) is not None
+        )
+        self._schema = schema
+        self._entity = entity
+        self._projecoes: dict[frozenset, RowSerializer] = {}
+
+    def projecao(self, fields: Iterable[str]) -> "RowSerializer":
+        """Serializador só com `fields`, criado uma vez por combinação de campos."""
+        chave = frozenset(fields)
+        projecao = self._projecoes.get(chave)
+        if projecao is None:
+            projecao = self._projecoes[chave] = RowSerializer(self._schema, self._entity, chave)
+        return projecao
+
+    def colunas(self, *extras: str) -> tuple:
+        """`columns` seguidas das colunas `extras` que não estão já na projeção.
+
+        As extras (chaves de cursor, validadores) ficam no fim da linha, onde a
+        serialização não as vê, e lêem-se pelo nome (`row.data_inicio`).
+        """
+        return self.columns + tuple(
+            getattr(self._entity, name) for name in extras if name not in self.fields
+        )
+
+    def __call__(self, row: Sequence) -> dict:
+        data = dict(zip(self.fields, row))
+        for name, converter in self._converters:
+            value = data[name]
+            if value is not None:
+                data[name] = converter(value)
+        return data
+
+    def many(self, rows: Iterable[Sequence]) -> list[dict]:
+        return [self(row) for row in rows]
+
+
+evento_out = RowSerializer(EventoOut, Evento)
+inscricao_out = RowSerializer(InscricaoOut, Inscricao)
+alteracao_out = RowSerializer(AlteracaoOut, Alteracao)
+
+
+def campos_evento(fields: str | None) -> RowSerializer:
+    """Serializador de eventos para o parâmetro `?fields=a,b` (o `id` vem sempre)."""
+    if not fields:
+        return evento_out
+    pedidos = {nome.strip() for nome in fields.split(",") if nome.strip()}
+    desconhecidos = pedidos - set(evento_out.fields)
+    if desconhecidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}.",
+        )
+    return evento_out.projecao(pedidos | {"id"})
+
+
+def json_response(
+    content: Any, status_code: int = 200, headers: dict[str, str] | None = None
+) -> JSONResponse:
+    """Resposta com conteúdo já em modo JSON; o FastAPI não a volta a validar."""
+    return JSONResponse(content, status_code=status_code, headers=headers)
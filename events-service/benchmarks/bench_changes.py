@@ -0,0 +1,151 @@
+"""Benchmark do feed de alterações contra clientes a fazer polling de `GET /events`.
+
+Um escritor edita eventos a `--writes-per-second`; `--subscribers` clientes querem saber
+das alterações. No modo `polling` cada cliente pede `GET /events` com `If-None-Match` a
+cada `--poll-interval` segundos; no modo `feed` cada cliente faz long-poll de
+`GET /events/changes`. Mede o atraso até cada cliente ver cada escrita e, do lado do
+servidor (`instrumented_app`), pedidos e queries SQL por segundo, incluindo as leituras
+do outbox em segundo plano:
+
+    python benchmarks/bench_changes.py --subscribers 500 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+from jose import jwt
+
+from common import default_database_url, percentile, run_server, seed_events
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+SECRET = "bench_secret"
+ADMIN = {"Authorization": "Bearer " + jwt.encode({"id": 1, "tipo": "admin"}, SECRET)}
+
+
+async def _escrever(client, args, escritas: list[tuple], fim: float) -> None:
+    i = 0
+    while time.perf_counter() < fim:
+        i += 1
+        inicio = time.perf_counter()
+        r = await client.patch(
+            f"/events/{1 + i % args.events}", json={"nome": f"Evento {i}"}, headers=ADMIN
+        )
+        r.raise_for_status()
+        escritas.append((inicio, time.perf_counter()))
+        await asyncio.sleep(1 / args.writes_per_second)
+
+
+async def _polling(client, args, fim: float) -> list[tuple[float, float]]:
+    """Pedidos (início, fim) de um cliente que faz polling com ETag."""
+    pedidos, etag = [], None
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        headers = {"If-None-Match": etag} if etag else {}
+        r = await client.get("/events", params={"limit": 20, "count": "none"}, headers=headers)
+        etag = r.headers.get("etag", etag)
+        pedidos.append((inicio, time.perf_counter()))
+        await asyncio.sleep(args.poll_interval)
+    return pedidos
+
+
+async def _feed(client, args, since: int, fim: float) -> dict[int, float]:
+    """Momento em que o cliente recebeu cada `seq`."""
+    recebidas = {}
+    while time.perf_counter() < fim:
+        r = await client.get("/events/changes", params={"since": since, "wait": 5})
+        agora = time.perf_counter()
+        body = r.json()
+        for alteracao in body["changes"]:
+            recebidas[alteracao["seq"]] = agora
+        since = body["next"]
+    return recebidas
+
+
+# Atrasos contados desde o envio da escrita (o feed pode entregar antes da resposta ao PATCH)
+
+
+def _atrasos_polling(escritas: list[tuple], clientes: list[list]) -> list[float]:
+    # Uma escrita é vista pelo primeiro pedido que começou depois de ela terminar
+    atrasos = []
+    for pedidos in clientes:
+        for enviada, terminada in escritas:
+            fim = next((f for inicio, f in pedidos if inicio >= terminada), None)
+            if fim is not None:
+                atrasos.append(fim - enviada)
+    return atrasos
+
+
+def _atrasos_feed(escritas: list[tuple], clientes: list[dict], inicio: int) -> list[float]:
+    # Um único escritor: a escrita i é a alteração inicio + i + 1
+    return [
+        recebidas[inicio + i + 1] - enviada
+        for recebidas in clientes
+        for i, (enviada, _) in enumerate(escritas)
+        if inicio + i + 1 in recebidas
+    ]
+
+
+async def _run(base_url: str, args, modo: str) -> dict:
+    limits = httpx.Limits(max_connections=args.subscribers + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Abre as ligações antes de medir
+        await asyncio.gather(*(client.get("/health/live") for _ in range(args.subscribers)))
+        inicio = (await client.get("/events/changes", params={"wait": 0})).json()["next"]
+        await client.post("/__bench/reset")
+        comeco = time.perf_counter()
+        fim = comeco + args.duration
+        escritas: list[tuple] = []
+        if modo == "polling":
+            tarefas = [_polling(client, args, fim) for _ in range(args.subscribers)]
+        else:
+            tarefas = [_feed(client, args, inicio, fim) for _ in range(args.subscribers)]
+        *clientes, _ = await asyncio.gather(*tarefas, _escrever(client, args, escritas, fim))
+        elapsed = time.perf_counter() - comeco
+        stats = (await client.get("/__bench/stats")).json()
+
+    if modo == "polling":
+        atrasos = _atrasos_polling(escritas, clientes)
+    else:
+        atrasos = _atrasos_feed(escritas, clientes, inicio)
+    leituras = {k: v for k, v in stats.items() if k != "PATCH /events/{id}"}
+    return {
+        "writes": len(escritas),
+        "requests_per_s": round(sum(v["requests"] for v in leituras.values()) / elapsed, 1),
+        "queries_per_s": round(sum(v["queries"] for v in leituras.values()) / elapsed, 1),
+        "delay_p50_ms": round(percentile(atrasos, 50) * 1000, 1),
+        "delay_p99_ms": round(percentile(atrasos, 99) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("changes"))
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--writes-per-second", type=float, default=5.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    seed_events(args.database_url, args.events)
+    # Sem controlo de admissão: mede-se o handler (bench_admission.py mede a admissão)
+    env = {"DATABASE_URL": args.database_url, "JWT_SECRET": SECRET, "ADMISSION_ENABLED": "0"}
+    results = {"subscribers": args.subscribers, "runs": {}}
+    with run_server(env, app="instrumented_app:app") as base_url:
+        for modo in ("polling", "feed"):
+            results["runs"][modo] = asyncio.run(_run(base_url, args, modo))
+            print(f"{modo:<8} {results['runs'][modo]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Microbenchmark de `verify_token`: verificação a frio (jose.jwt.decode) vs a quente (cache).
+
+    python benchmarks/bench_jwt.py --iterations 20000
+"""
+
+import argparse
+import json
+import time
+import timeit
+
+import common  # noqa: F401  (coloca a raiz do serviço no sys.path)
+
+# isort: split
+from jose import jwt
+
+from app import auth
+from app.config import settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    token = jwt.encode(
+        {"id": 1, "tipo": "organizador", "exp": int(time.time()) + 3600},
+        settings.jwt_secret,
+        algorithm="HS256",
+    )
+    header = f"Bearer {token}"
+
+    def cold():
+        auth._token_cache.clear()
+        auth.verify_token(header)
+
+    def warm():
+        auth.verify_token(header)
+
+    results = {}
+    for name, fn in (("cold", cold), ("warm", warm)):
+        fn()
+        seconds = min(timeit.repeat(fn, number=args.iterations, repeat=3))
+        results[name] = {"us_per_call": round(seconds / args.iterations * 1e6, 2)}
+        print(f"{name:>5}: {results[name]['us_per_call']} µs/chamada")
+    results["speedup"] = round(results["cold"]["us_per_call"] / results["warm"]["us_per_call"], 1)
+    print(f"speedup: {results['speedup']}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
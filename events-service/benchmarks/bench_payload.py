@@ -0,0 +1,109 @@
+"""Benchmark do tamanho das respostas: páginas completas vs `?fields=` e compressão.
+
+Para cada combinação de campos (todos, ou só os de uma listagem) e `Accept-Encoding`
+(identity, gzip, br) mede os bytes transferidos por página de `GET /events` e, sob carga,
+pedidos/s e latências. A cache de leituras fica desligada para cada pedido ir à base de
+dados com o SELECT projetado.
+
+    python benchmarks/bench_payload.py --events 100000 --limit 50
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import random
+import statistics
+
+import httpx
+
+from common import default_database_url, drive, run_server, seed_events
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+CAMPOS = {"completo": None, "listagem": "nome,data_inicio,local"}
+CODIFICACOES = ("identity", "gzip", "br")
+
+
+def _params(rng, campos, limit: int) -> dict:
+    params = {"page": rng.randint(1, 50), "limit": limit, "count": "none"}
+    if campos:
+        params["fields"] = campos
+    return params
+
+
+def _descomprimir(corpo: bytes, codificacao: str) -> bytes:
+    if codificacao == "gzip":
+        return gzip.decompress(corpo)
+    if codificacao == "br":
+        import brotli
+
+        return brotli.decompress(corpo)
+    return corpo
+
+
+def wire_bytes(base_url: str, campos, codificacao: str, limit: int, samples: int) -> dict:
+    """Bytes do corpo como chegam (comprimidos) e do JSON descomprimido, em média."""
+    rng = random.Random(0)
+    transferidos, json_bytes = [], []
+    with httpx.Client(base_url=base_url) as client:
+        for _ in range(samples):
+            with client.stream(
+                "GET",
+                "/events",
+                params=_params(rng, campos, limit),
+                headers={"Accept-Encoding": codificacao},
+            ) as r:
+                corpo = b"".join(r.iter_raw())
+            transferidos.append(len(corpo))
+            codificada = r.headers.get("content-encoding", "identity")
+            json_bytes.append(len(_descomprimir(corpo, codificada)))
+    return {
+        "bytes": round(statistics.mean(transferidos)),
+        "json_bytes": round(statistics.mean(json_bytes)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("payload"))
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    seed_events(args.database_url, args.events)
+    env = {"DATABASE_URL": args.database_url, "CACHE_BACKEND": "none"}
+    results = {"events": args.events, "limit": args.limit, "runs": {}}
+    with run_server(env) as base_url:
+        for nome, campos in CAMPOS.items():
+            for codificacao in CODIFICACOES:
+
+                def make_request(rng, campos=campos, codificacao=codificacao):
+                    return (
+                        "GET",
+                        "/events",
+                        {
+                            "params": _params(rng, campos, args.limit),
+                            "headers": {"Accept-Encoding": codificacao},
+                        },
+                    )
+
+                run = wire_bytes(base_url, campos, codificacao, args.limit, args.samples)
+                run.update(
+                    asyncio.run(drive(base_url, make_request, args.concurrency, args.duration))
+                )
+                results["runs"][f"{nome}/{codificacao}"] = run
+                print(f"{nome + '/' + codificacao:<20} {run}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Teste de carga das inscrições num evento disputado (abertura de bilheteira).
+
+Cria um evento com `--capacity` lugares e dispara `--students` inscrições concorrentes
+(uma por estudante). Verifica que o número de inscrições aceites e guardadas é exatamente
+a capacidade (zero oversell) e reporta a latência p50/p99:
+
+    python benchmarks/bench_registration.py --capacity 100 --students 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from jose import jwt
+
+from common import default_database_url, percentile, run_server, seed_events
+
+SECRET = "bench_secret"
+
+
+def _header(payload: dict) -> dict:
+    return {"Authorization": "Bearer " + jwt.encode(payload, SECRET, algorithm="HS256")}
+
+
+async def _run(base_url: str, args) -> dict:
+    organizador = _header({"id": 1, "tipo": "organizador"})
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        r = await client.post(
+            "/events",
+            headers=organizador,
+            json={
+                "nome": "Concerto",
+                "descricao": "Abertura de bilheteira",
+                "data_inicio": "2031-01-01T21:00:00",
+                "local": "Porto",
+                "capacidade": args.capacity,
+                "tipo": "cultural",
+            },
+        )
+        r.raise_for_status()
+        evento_id = r.json()["id"]
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: list[float] = []
+        codes: dict[int, int] = {}
+
+        async def inscrever(user_id: int):
+            async with semaphore:
+                start = time.perf_counter()
+                r = await client.post(
+                    f"/events/{evento_id}/inscrever",
+                    headers=_header({"id": user_id, "tipo": "estudante"}),
+                )
+                latencies.append(time.perf_counter() - start)
+                codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(inscrever(1000 + i) for i in range(args.students)))
+        elapsed = time.perf_counter() - start
+
+        # count=exact conta as linhas: os contadores mantidos são parte do que se verifica
+        r = await client.get(
+            f"/events/{evento_id}/inscritos", params={"count": "exact"}, headers=organizador
+        )
+        guardadas = r.json()["total"]
+
+    return {
+        "capacity": args.capacity,
+        "students": args.students,
+        "status_codes": codes,
+        "accepted": codes.get(201, 0),
+        "stored": guardadas,
+        "oversell": max(0, guardadas - args.capacity),
+        "rps": round(args.students / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("registration"))
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    seed_events(args.database_url, 0)
+    # Sem controlo de admissão: mede-se o handler (bench_admission.py mede a admissão)
+    env = {"DATABASE_URL": args.database_url, "JWT_SECRET": SECRET, "ADMISSION_ENABLED": "0"}
+    with run_server(env, workers=args.workers) as base_url:
+        result = asyncio.run(_run(base_url, args))
+    print(json.dumps(result, indent=2))
+    if result["oversell"] or result["accepted"] != min(args.capacity, args.students):
+        raise SystemExit("Inscrições aceites não coincidem com a capacidade")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Microbenchmark da serialização de páginas de `GET /events`: ORM + response_model vs tuplos.
+
+Mede, por tamanho de página, a query e a serialização completa até aos bytes da resposta:
+
+- `orm`: `select(Evento)`, `EventoOut.model_validate(...).model_dump(mode="json")` por linha,
+  seguido da validação/serialização do `PaginatedEventos` que o FastAPI fazia e do
+  `JSONResponse` (o caminho anterior).
+- `rows`: `select` das colunas de `EventoOut` e `app.serialization.evento_out` (o atual).
+
+    python benchmarks/bench_serialization.py --events 5000 --page-sizes 10 50 100
+"""
+
+import argparse
+import functools
+import json
+import os
+import timeit
+
+from common import default_database_url, seed_events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("serialization"))
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    seed_events(args.database_url, args.events)
+
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import asc, select
+
+    from app.db import SessionLocal, init_engine
+    from app.models import Evento
+    from app.schemas import EventoOut, PaginatedEventos
+    from app.serialization import evento_out
+
+    init_engine()
+    db = SessionLocal()
+    order = (asc(Evento.data_inicio), asc(Evento.id))
+
+    def page(data):
+        return {
+            "total": args.events,
+            "totalPages": 1,
+            "currentPage": 1,
+            "data": data,
+            "nextCursor": None,
+        }
+
+    def orm(limit):
+        rows = db.execute(select(Evento).order_by(*order).limit(limit)).scalars().all()
+        data = [EventoOut.model_validate(r).model_dump(mode="json") for r in rows]
+        body = PaginatedEventos.model_validate(page(data)).model_dump(mode="json")
+        db.expunge_all()
+        return JSONResponse(body).body
+
+    def tuples(limit):
+        rows = db.execute(select(*evento_out.columns).order_by(*order).limit(limit)).all()
+        return JSONResponse(page(evento_out.many(rows))).body
+
+    results = {}
+    for limit in args.page_sizes:
+        assert orm(limit) == tuples(limit), "serialização diferente"
+        entry = {}
+        for name, fn in (("orm", orm), ("rows", tuples)):
+            seconds = min(
+                timeit.repeat(functools.partial(fn, limit), number=args.iterations, repeat=3)
+            )
+            entry[f"{name}_us_per_page"] = round(seconds / args.iterations * 1e6, 1)
+        entry["speedup"] = round(entry["orm_us_per_page"] / entry["rows_us_per_page"], 2)
+        results[limit] = entry
+        print(f"limit={limit:>4}: {entry}")
+    db.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Benchmark da lista de espera com `--waitlisted` estudantes em espera por evento.
+
+Enche `--queues` eventos esgotados com filas de 100 000 senhas (por omissão) e mede, em
+processo, a posição na fila pela árvore de Fenwick (app/lista_espera.py) e por um
+COUNT(*) das senhas até à nossa, à cabeça, a meio e no fim da fila. Depois mede pelo
+serviço `GET /events/{id}/lista-espera/me`, entradas no fim da fila e cancelamentos de
+inscrições, cada um a promover a cabeça da fila na mesma transação:
+
+    python benchmarks/bench_waitlist.py --waitlisted 100000 --queues 2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+import httpx
+from jose import jwt
+from sqlalchemy import create_engine, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from common import default_database_url, drive, percentile, run_server, seed_events
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+SECRET = "bench_secret"
+ADMIN = {"Authorization": "Bearer " + jwt.encode({"id": 1, "tipo": "admin"}, SECRET)}
+PRIMEIRO_EM_ESPERA = 1_000_000
+
+
+def _estudante(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + jwt.encode({"id": user_id, "tipo": "estudante"}, SECRET)}
+
+
+def seed_waitlists(database_url: str, eventos: list[int], n: int, batch: int = 20_000) -> None:
+    """Esgota cada evento (um inscrito, capacidade 1) e põe `n` estudantes na sua fila.
+
+    Refeito em cada execução: a anterior cancelou inscrições e promoveu parte da fila.
+    """
+    from app import lista_espera
+    from app.models import EsperaInscricao, Evento, Inscricao
+
+    eng = create_engine(database_url)
+    with eng.begin() as conn:
+        conn.execute(delete(Inscricao).where(Inscricao.evento_id.in_(eventos)))
+        for evento_id in eventos:
+            lista_espera.remover_evento(conn, evento_id)
+            conn.execute(
+                update(Evento)
+                .where(Evento.id == evento_id)
+                .values(capacidade=1, lugares_ocupados=1)
+            )
+            conn.execute(
+                insert(Inscricao),
+                [{"evento_id": evento_id, "user_id": 1, "status": "pendente", "valor_pago": 0}],
+            )
+            for inicio in range(0, n, batch):
+                conn.execute(
+                    insert(EsperaInscricao),
+                    [
+                        {"evento_id": evento_id, "user_id": PRIMEIRO_EM_ESPERA + i, "senha": i + 1}
+                        for i in range(inicio, min(n, inicio + batch))
+                    ],
+                )
+        lista_espera.reconstruir(conn)
+    eng.dispose()
+
+
+def in_process(database_url: str, evento_id: int, n: int, runs: int) -> dict:
+    from app import lista_espera
+    from app.models import EsperaInscricao
+
+    eng = create_engine(database_url)
+    results = {}
+    with eng.connect() as conn:
+        db = Session(bind=conn)
+        for nome, senha in (("cabeca", 1), ("meio", n // 2), ("fim", n)):
+
+            def arvore(senha=senha):
+                return lista_espera.posicao(db, evento_id, senha)
+
+            def contagem(senha=senha):
+                return conn.execute(
+                    select(func.count()).where(
+                        EsperaInscricao.evento_id == evento_id, EsperaInscricao.senha <= senha
+                    )
+                ).scalar_one()
+
+            assert arvore() == contagem() == senha
+            amostras = {}
+            for label, fn in (("arvore_ms", arvore), ("contagem_ms", contagem)):
+                tempos = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    fn()
+                    tempos.append(time.perf_counter() - start)
+                amostras[label] = round(statistics.median(tempos) * 1000, 3)
+            results[nome] = amostras
+            print(f"{nome:>7}: {amostras}")
+        db.close()
+    eng.dispose()
+    return results
+
+
+async def cancellations(base_url: str, evento_id: int, n: int) -> dict:
+    """Cancela `n` inscrições seguidas; cada uma promove o próximo da fila."""
+    latencias = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        inscrito = 1
+        for i in range(n):
+            start = time.perf_counter()
+            r = await client.patch(
+                f"/events/{evento_id}/inscricoes/{inscrito}",
+                json={"status": "cancelado"},
+                headers=ADMIN,
+            )
+            latencias.append(time.perf_counter() - start)
+            r.raise_for_status()
+            inscrito = PRIMEIRO_EM_ESPERA + i
+        r = await client.get(
+            f"/events/{evento_id}/lista-espera/me", headers=_estudante(PRIMEIRO_EM_ESPERA + n)
+        )
+        assert r.json()["posicao"] == 1, r.text
+    return {
+        "requests": n,
+        "p50_ms": round(percentile(latencias, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencias, 99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("waitlist"))
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--queues", type=int, default=2)
+    parser.add_argument("--waitlisted", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--cancellations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    seed_events(args.database_url, args.events)
+    eventos = list(range(1, args.queues + 1))
+    seed_waitlists(args.database_url, eventos, args.waitlisted)
+    results = {
+        "waitlisted": args.waitlisted,
+        "in_process": in_process(args.database_url, eventos[0], args.waitlisted, args.runs),
+    }
+
+    # Sem controlo de admissão: mede-se o handler (bench_admission.py mede a admissão)
+    env = {"DATABASE_URL": args.database_url, "JWT_SECRET": SECRET, "ADMISSION_ENABLED": "0"}
+    http = {}
+    novos = iter(range(PRIMEIRO_EM_ESPERA + args.waitlisted, 10**9))
+    with run_server(env) as base_url:
+
+        def posicao(rng):
+            user_id = PRIMEIRO_EM_ESPERA + rng.randrange(args.cancellations, args.waitlisted)
+            path = f"/events/{rng.choice(eventos)}/lista-espera/me"
+            return "GET", path, {"headers": _estudante(user_id)}
+
+        def entrar(rng):
+            path = f"/events/{rng.choice(eventos)}/lista-espera"
+            return "POST", path, {"headers": _estudante(next(novos))}
+
+        for nome, make_request in (("position", posicao), ("join", entrar)):
+            http[nome] = asyncio.run(drive(base_url, make_request, args.concurrency, args.duration))
+            print(f"{nome:>13}: {http[nome]}")
+        http["cancel_promote"] = asyncio.run(
+            cancellations(base_url, eventos[-1], args.cancellations)
+        )
+        print(f"{'cancel_promote':>13}: {http['cancel_promote']}")
+    results["http"] = http
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark das janelas de datas (`GET /events?from=&to=`) para vários tamanhos de janela.
+
+Para cada tamanho mede, em processo, a primeira página pelo índice por nível de duração
+(app/intervalos.py) e pela condição de sobreposição direta, que só pode usar o índice de
+data_inicio, e a contagem exata da janela. Depois mede pedidos/s e latências pelo serviço,
+incluindo `GET /events/upcoming`.
+
+    python benchmarks/bench_windows.py --events 1000000 --windows 1h,1d,7d,30d,365d
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, asc, create_engine, func, select
+
+from common import default_database_url, drive, run_server, seed_events
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+UNIDADES = {"h": timedelta(hours=1), "d": timedelta(days=1)}
+INICIO_SEMEADO = datetime(2030, 1, 1)
+
+
+def parse_window(spec: str) -> timedelta:
+    return int(spec[:-1]) * UNIDADES[spec[-1]]
+
+
+def _median_ms(fn, inputs) -> float:
+    samples = []
+    for args in inputs:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def in_process(database_url: str, windows: list[str], runs: int) -> dict:
+    from app import intervalos
+    from app.models import Evento
+    from app.serialization import evento_out
+
+    base = select(*evento_out.columns)
+    fim = func.coalesce(Evento.data_fim, Evento.data_inicio)
+    rng = random.Random(0)
+    eng = create_engine(database_url)
+    results = {}
+    with eng.connect() as conn:
+        for spec in windows:
+            tamanho = parse_window(spec)
+            inputs = []
+            for _ in range(runs):
+                desde = INICIO_SEMEADO + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+                inputs.append((desde, desde + tamanho))
+
+            def indexada(desde, ate):
+                stmt, params = intervalos.janela(evento_out.columns, {}, None, desde, ate, 20)
+                conn.execute(stmt, params).all()
+
+            def direta(desde, ate):
+                stmt = base.where(and_(Evento.data_inicio <= ate, fim >= desde))
+                conn.execute(stmt.order_by(asc(Evento.data_inicio), asc(Evento.id)).limit(20)).all()
+
+            def contagem(desde, ate):
+                janela = intervalos.sobrepostos(select(Evento.id), desde, ate).subquery()
+                conn.execute(select(func.count()).select_from(janela)).scalar_one()
+
+            results[spec] = {
+                "indice_ms": _median_ms(indexada, inputs),
+                "direta_ms": _median_ms(direta, inputs),
+                "contagem_ms": _median_ms(contagem, inputs),
+            }
+            print(f"{spec:>6}: {results[spec]}")
+    eng.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("windows"))
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--windows", default="1h,1d,7d,30d,365d")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    windows = args.windows.split(",")
+    seed_events(args.database_url, args.events)
+    results = {
+        "events": args.events,
+        "in_process": in_process(args.database_url, windows, args.runs),
+    }
+
+    env = {"DATABASE_URL": args.database_url, "CACHE_BACKEND": "none"}
+    http = {}
+    with run_server(env) as base_url:
+        for spec in windows:
+            tamanho = parse_window(spec)
+
+            def make_request(rng, tamanho=tamanho):
+                desde = INICIO_SEMEADO + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+                params = {
+                    "from": desde.isoformat(),
+                    "to": (desde + tamanho).isoformat(),
+                    "limit": 20,
+                }
+                return "GET", "/events", {"params": params}
+
+            http[spec] = asyncio.run(drive(base_url, make_request, args.concurrency, args.duration))
+            print(f"{spec:>6}: {http[spec]}")
+        http["upcoming"] = asyncio.run(
+            drive(
+                base_url,
+                lambda rng: ("GET", "/events/upcoming", {"params": {"limit": 20}}),
+                args.concurrency,
+                args.duration,
+            )
+        )
+        print(f"{'upcoming':>6}: {http['upcoming']}")
+    results["http"] = http
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Utilitários partilhados pelos benchmarks do events-service.
+
+Os benchmarks correm o serviço real (uvicorn num subprocesso) contra uma base de dados
+local: um ficheiro SQLite por omissão ou o MySQL indicado em `--database-url`.
+"""
+
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def default_database_url(name: str) -> str:
+    path = Path(os.environ.get("TMPDIR", "/tmp")) / f"events_bench_{name}.db"
+    return f"sqlite:///{path}"
+
+
+@contextmanager
+def run_server(env: dict, port: int | None = None, workers: int = 1, app: str = "app.main:app"):
+    """Arranca `uvicorn <app>` com o ambiente indicado e espera que fique pronto."""
+    port = port or free_port()
+    pythonpath = os.pathsep.join(
+        p for p in (str(ROOT), str(BENCH_DIR), os.environ.get("PYTHONPATH")) if p
+    )
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", app,
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": pythonpath, **env},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("O servidor não arrancou")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def drive(base_url: str, make_request, concurrency: int, duration: float) -> dict:
+    """Corre `concurrency` clientes durante `duration` segundos.
+
+    `make_request(rng)` devolve `(method, path, kwargs)` para cada pedido.
+    """
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(seed: int):
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                method, path, kwargs = make_request(rng)
+                start = time.perf_counter()
+                try:
+                    r = await client.request(method, path, **kwargs)
+                    ok = r.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed)
+
+
+# Vocabulário dos eventos sintéticos, para a pesquisa de texto ter resultados realistas
+GENEROS = ("Concerto", "Workshop", "Palestra", "Festival", "Exposição", "Torneio", "Feira")
+TEMAS = (
+    "jazz", "fado", "python", "robótica", "fotografia", "xadrez", "cinema", "teatro",
+    "astronomia", "culinária", "vinho", "poesia", "dança", "startups", "história", "ciência",
+)
+PALAVRAS = (
+    "evento", "noite", "entrada", "livre", "aberto", "público", "estudantes", "convidados",
+    "música", "ao", "vivo", "oficina", "prática", "iniciação", "avançado", "centro", "cidade",
+)
+LOCAIS = ("Porto", "Lisboa", "Braga", "Coimbra")
+# Durações em minutos: pontuais, sessões de horas, eventos de dias e exposições de meses
+DURACOES = ((0, 0), (30, 480), (1440, 10080), (43200, 129600))
+PESOS_DURACOES = (60, 34, 5, 1)
+
+
+def _duracao(rng: random.Random) -> int:
+    low, high = rng.choices(DURACOES, weights=PESOS_DURACOES)[0]
+    return rng.randint(low, high)
+
+
+def seed_events(database_url: str, events: int, batch: int = 5000) -> None:
+    """Cria as tabelas e insere `events` eventos sintéticos (se ainda não existirem)."""
+    os.environ.setdefault("DATABASE_URL", database_url)
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import create_engine, func, insert, select
+
+    from app import contadores, estatisticas
+    from app.intervalos import nivel_duracao
+    from app.migrations import upgrade
+    from app.models import Evento
+
+    eng = create_engine(database_url)
+    with eng.connect() as conn:
+        upgrade(conn)
+    with eng.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(Evento.__table__)).scalar_one()
+        rng = random.Random(existing)
+        base = datetime(2030, 1, 1)
+        tipos = ("cultural", "academico", "lazer")
+        for start in range(existing, events, batch):
+            rows = []
+            for i in range(start, min(events, start + batch)):
+                inicio = base + timedelta(minutes=rng.randint(0, 525600))
+                duracao = _duracao(rng)
+                fim = inicio + timedelta(minutes=duracao) if duracao else None
+                rows.append({
+                    "nome": f"{rng.choice(GENEROS)} de {rng.choice(TEMAS)} {i}",
+                    "descricao": " ".join(rng.choices(PALAVRAS, k=3 * rng.randint(1, 20))),
+                    "data_inicio": inicio,
+                    "data_fim": fim,
+                    "duracao_nivel": nivel_duracao(inicio, fim),
+                    "local": rng.choice(LOCAIS),
+                    "capacidade": rng.randint(10, 500),
+                    "preco": rng.choice((0, 5, 10, 25)),
+                    "tipo": tipos[i % 3],
+                    "organizador_id": 1 + i % 50,
+                    "status": "agendado",
+                })
+            conn.execute(insert(Evento.__table__), rows)
+        if existing < events:
+            contadores.reconstruir(conn)
+            estatisticas.reconstruir(conn)
+    eng.dispose()
+
+
+def registration_layout(events: int, registrations: int) -> tuple[int, int]:
+    """Distribuição das inscrições: (eventos com inscrições, inscritos por evento).
+
+    A inscrição k pertence ao evento `1 + k % eventos` e ao utilizador
+    `1 + k // eventos`, por isso o evento e tem os utilizadores 1..inscritos (aprox.).
+    """
+    if not registrations:
+        return 0, 0
+    com_inscricoes = max(1, min(events, registrations // 100))
+    return com_inscricoes, registrations // com_inscricoes
+
+
+def seed_registrations(database_url: str, events: int, registrations: int, batch: int = 10_000):
+    """Insere inscrições sintéticas e recalcula lugares ocupados e contadores."""
+    os.environ.setdefault("DATABASE_URL", database_url)
+    from sqlalchemy import create_engine, func, insert, select, update
+
+    from app import contadores, estatisticas, lugares
+    from app.models import Evento, Inscricao
+
+    com_inscricoes, _ = registration_layout(events, registrations)
+    eng = create_engine(database_url)
+    with eng.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(Inscricao.__table__)).scalar_one()
+        for start in range(existing, registrations, batch):
+            rows = [
+                {
+                    "evento_id": 1 + k % com_inscricoes,
+                    "user_id": 1 + k // com_inscricoes,
+                    "status": "pendente",
+                    "valor_pago": 0,
+                }
+                for k in range(start, min(registrations, start + batch))
+            ]
+            conn.execute(insert(Inscricao.__table__), rows)
+        if existing < registrations:
+            lugares.recalcular_lugares(conn)
+            conn.execute(
+                update(Evento.__table__)
+                .where(Evento.lugares_ocupados > Evento.capacidade)
+                .values(capacidade=Evento.lugares_ocupados)
+            )
+            contadores.reconstruir(conn)
+            estatisticas.reconstruir(conn)
+    eng.dispose()
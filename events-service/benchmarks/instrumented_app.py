@@ -0,0 +1,67 @@
+"""A aplicação real com contagem de queries SQL por rota, para o benchmark suite.
+
+Envolve `app.main:app` num middleware ASGI que, por pedido, conta as queries executadas
+pelo engine (via evento `before_cursor_execute` e um contextvar) e acumula por rota.
+`GET /__bench/stats` devolve os totais e `POST /__bench/reset` limpa-os.
+"""
+
+import contextvars
+import json
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.main import app as real_app
+
+_queries: contextvars.ContextVar = contextvars.ContextVar("bench_queries", default=None)
+_stats: dict = defaultdict(lambda: {"requests": 0, "queries": 0})
+
+
+# Queries fora de pedidos (tarefas em segundo plano, como a leitura do outbox do feed)
+BACKGROUND = "(background)"
+
+
+def _count_query(*args, **kwargs):
+    counter = _queries.get()
+    if counter is not None:
+        counter[0] += 1
+    else:
+        _stats[BACKGROUND]["queries"] += 1
+
+
+# O engine da aplicação só é criado no lifespan: escuta todos os engines do processo
+event.listen(Engine, "before_cursor_execute", _count_query)
+
+
+async def _send_json(send, status: int, body) -> None:
+    payload = json.dumps(body).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def app(scope, receive, send):
+    if scope["type"] != "http":
+        return await real_app(scope, receive, send)
+    if scope["path"] == "/__bench/stats":
+        return await _send_json(send, 200, dict(_stats))
+    if scope["path"] == "/__bench/reset":
+        _stats.clear()
+        return await _send_json(send, 200, {})
+
+    counter = [0]
+    token = _queries.set(counter)
+    try:
+        await real_app(scope, receive, send)
+    finally:
+        _queries.reset(token)
+        route = scope.get("route")
+        key = f"{scope['method']} {route.path if route else scope['path']}"
+        _stats[key]["requests"] += 1
+        _stats[key]["queries"] += counter[0]
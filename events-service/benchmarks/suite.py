@@ -0,0 +1,526 @@
+"""Benchmark suite do events-service: todas as rotas, sob carga concorrente.
+
+Semeia uma base de dados local (SQLite por omissão, ou `--database-url` para MySQL) com o
+volume pedido, arranca a aplicação real com contagem de queries por rota
+(`instrumented_app.py`) e, para cada rota de `create_app()`, corre `--concurrency` clientes
+durante `--duration` segundos. Reporta throughput, latência p50/p95/p99 e queries por
+pedido, e guarda tudo em JSON para comparar execuções:
+
+    python benchmarks/suite.py --events 1000000 --registrations 10000000 --output run.json
+    python benchmarks/suite.py compare base.json run.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import httpx
+from jose import jwt
+
+from common import (
+    TEMAS,
+    default_database_url,
+    drive,
+    registration_layout,
+    run_server,
+    seed_events,
+    seed_registrations,
+)
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+SECRET = "bench_secret"
+BENCH_ORGANIZADOR = 999_999
+
+
+def _header(payload: dict) -> dict:
+    return {"Authorization": "Bearer " + jwt.encode(payload, SECRET, algorithm="HS256")}
+
+
+ADMIN = _header({"id": 1, "tipo": "admin"})
+
+# Uma página de eventos com os campos resolvidos por DataLoaders
+GRAPHQL_EVENTOS = """
+query ($tipo: String) {
+  eventos(limit: 20, tipo: $tipo) {
+    data { id nome dataInicio lugaresDisponiveis totalInscritos
+           inscricoes(limit: 5) { userId status } }
+    nextCursor
+  }
+}
+"""
+GRAPHQL_EVENTO = "query ($id: Int!) { evento(id: $id) { id nome totalInscritos } }"
+
+
+def _janela(rng, dias: int) -> dict:
+    """Parâmetros `from`/`to` de uma janela de `dias` dentro de 2030 (o ano semeado)."""
+    desde = datetime(2030, 1, 1) + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    return {"from": desde.isoformat(), "to": (desde + timedelta(days=dias)).isoformat()}
+
+
+@dataclass
+class Scenario:
+    """Como gerar pedidos para uma rota. `setup` prepara dados próprios (ex.: alvos a apagar)."""
+
+    route: str
+    make_request: Callable
+    setup: Callable | None = None
+
+
+class Dataset:
+    """Dados semeados e dados criados diretamente na base para cenários destrutivos."""
+
+    def __init__(self, args):
+        self.args = args
+        self.events = args.events
+        self.com_inscricoes, self.inscritos = registration_layout(args.events, args.registrations)
+        self.user_ids = itertools.count(10_000_000)
+
+    def _engine(self):
+        from sqlalchemy import create_engine
+
+        return create_engine(self.args.database_url)
+
+    def create_events(self, n: int, capacidade: int = 1_000_000) -> list[int]:
+        """Insere `n` eventos do organizador de benchmark e devolve os ids."""
+        from sqlalchemy import insert, select
+
+        from app.models import Evento
+
+        eng = self._engine()
+        marker = f"bench-{time.time_ns()}"
+        with eng.begin() as conn:
+            conn.execute(
+                insert(Evento.__table__),
+                [
+                    {
+                        "nome": marker,
+                        "descricao": "Evento criado pelo benchmark suite",
+                        "data_inicio": datetime(2031, 1, 1),
+                        "local": "Porto",
+                        "capacidade": capacidade,
+                        "preco": 0,
+                        "tipo": "cultural",
+                        "organizador_id": BENCH_ORGANIZADOR,
+                        "status": "agendado",
+                    }
+                    for _ in range(n)
+                ],
+            )
+            ids = conn.execute(select(Evento.id).where(Evento.nome == marker)).scalars().all()
+        eng.dispose()
+        return list(ids)
+
+    def list_etag(self) -> str:
+        """ETag atual das páginas de `GET /events` (geração das listagens)."""
+        from sqlalchemy.orm import Session
+
+        from app.contadores import geracao_eventos
+
+        eng = self._engine()
+        with Session(eng) as db:
+            geracao, _ = geracao_eventos(db)
+        eng.dispose()
+        return f'"g{geracao}"'
+
+    def create_registrations(self, evento_id: int, n: int) -> list[int]:
+        """Insere `n` inscrições num evento de benchmark e devolve os user_ids."""
+        from sqlalchemy import insert, update
+
+        from app.models import Evento, Inscricao
+
+        user_ids = [next(self.user_ids) for _ in range(n)]
+        eng = self._engine()
+        with eng.begin() as conn:
+            conn.execute(
+                insert(Inscricao.__table__),
+                [
+                    {"evento_id": evento_id, "user_id": u, "status": "pendente", "valor_pago": 0}
+                    for u in user_ids
+                ],
+            )
+            conn.execute(
+                update(Evento.__table__)
+                .where(Evento.id == evento_id)
+                .values(lugares_ocupados=Evento.lugares_ocupados + n)
+            )
+        eng.dispose()
+        return user_ids
+
+    def create_waitlist(self, n: int) -> tuple[int, list[int]]:
+        """Cria um evento esgotado com `n` estudantes na lista de espera."""
+        from sqlalchemy import insert
+
+        from app import lista_espera
+        from app.models import EsperaInscricao
+
+        evento_id = self.create_events(1, capacidade=1)[0]
+        self.create_registrations(evento_id, 1)
+        user_ids = [next(self.user_ids) for _ in range(n)]
+        eng = self._engine()
+        with eng.begin() as conn:
+            if user_ids:
+                conn.execute(
+                    insert(EsperaInscricao.__table__),
+                    [
+                        {"evento_id": evento_id, "user_id": u, "senha": i}
+                        for i, u in enumerate(user_ids, start=1)
+                    ],
+                )
+            lista_espera.reconstruir(conn)
+        eng.dispose()
+        return evento_id, user_ids
+
+    def random_event(self, rng) -> int:
+        return rng.randint(1, self.events)
+
+    def random_registration(self, rng) -> tuple[int, int]:
+        return rng.randint(1, self.com_inscricoes), rng.randint(1, max(1, self.inscritos))
+
+
+def _evento_json(rng) -> dict:
+    return {
+        "nome": f"Evento {rng.randint(1, 10**9)}",
+        "descricao": "Evento criado durante o benchmark",
+        "data_inicio": "2031-06-01T10:00:00",
+        "local": "Porto",
+        "capacidade": 100,
+        "tipo": rng.choice(("cultural", "academico", "lazer")),
+    }
+
+
+def build_scenarios(data: Dataset) -> list[Scenario]:
+    pool = 20_000  # alvos pré-criados para rotas que consomem dados
+
+    def pop(state):
+        return state.pop() if state else 0
+
+    def evento_com_inscricoes():
+        evento_id = data.create_events(1)[0]
+        return evento_id, data.create_registrations(evento_id, pool)
+
+    tipos = ("cultural", "academico", "lazer")
+    return [
+        Scenario("GET /health/live", lambda rng, s: ("GET", "/health/live", {})),
+        Scenario("GET /health/ready", lambda rng, s: ("GET", "/health/ready", {})),
+        Scenario("GET /metrics", lambda rng, s: ("GET", "/metrics", {})),
+        Scenario("GET /cache/stats", lambda rng, s: ("GET", "/cache/stats", {})),
+        Scenario(
+            "GET /events",
+            lambda rng, s: ("GET", "/events", {"params": {
+                "page": rng.randint(1, 50), "limit": 20,
+                **({"tipo": rng.choice(tipos)} if rng.random() < 0.5 else {}),
+            }}),
+        ),
+        Scenario(
+            # Mesma rota, só com os campos de uma listagem (SELECT projetado)
+            "GET /events?fields=",
+            lambda rng, s: ("GET", "/events", {"params": {
+                "page": rng.randint(1, 50), "limit": 20, "fields": "nome,data_inicio,local",
+            }}),
+        ),
+        Scenario(
+            # Revalidação de um catálogo inalterado: 304 sem ler a página
+            "GET /events If-None-Match",
+            lambda rng, s: ("GET", "/events", {
+                "params": {"page": rng.randint(1, 50), "limit": 20},
+                "headers": {"If-None-Match": s},
+            }),
+            setup=data.list_etag,
+        ),
+        Scenario(
+            # Mesma rota, com uma janela de datas (dia, semana ou mês) no ano semeado
+            "GET /events?from=&to=",
+            lambda rng, s: ("GET", "/events", {"params": {
+                **_janela(rng, rng.choice((1, 7, 30))), "limit": 20,
+                **({"tipo": rng.choice(tipos)} if rng.random() < 0.5 else {}),
+            }}),
+        ),
+        Scenario(
+            "GET /events/upcoming",
+            lambda rng, s: ("GET", "/events/upcoming", {"params": {"limit": 20}}),
+        ),
+        Scenario(
+            "GET /events/search",
+            lambda rng, s: ("GET", "/events/search", {"params": {
+                "q": " ".join(rng.sample(TEMAS, 2)), "limit": 20,
+                **({"tipo": rng.choice(tipos)} if rng.random() < 0.5 else {}),
+            }}),
+        ),
+        Scenario(
+            "GET /events/export",
+            lambda rng, s: ("GET", "/events/export", {"params": {"tipo": rng.choice(tipos)}}),
+        ),
+        Scenario(
+            "GET /events/{id}",
+            lambda rng, s: ("GET", f"/events/{data.random_event(rng)}", {}),
+        ),
+        Scenario(
+            # Eventos semeados nunca editados estão na versão 1
+            "GET /events/{id} If-None-Match",
+            lambda rng, s: ("GET", f"/events/{(i := data.random_event(rng))}", {
+                "headers": {"If-None-Match": f'"{i}.1"'},
+            }),
+        ),
+        Scenario(
+            "POST /events",
+            lambda rng, s: ("POST", "/events", {"json": _evento_json(rng), "headers": ADMIN}),
+        ),
+        Scenario(
+            "PATCH /events/{id}",
+            lambda rng, s: ("PATCH", f"/events/{data.random_event(rng)}", {
+                "json": {"nome": f"Evento {rng.randint(1, 10**9)}"}, "headers": ADMIN,
+            }),
+        ),
+        Scenario(
+            "DELETE /events/{id}",
+            lambda rng, s: ("DELETE", f"/events/{pop(s)}", {"headers": ADMIN}),
+            setup=lambda: data.create_events(pool),
+        ),
+        Scenario(
+            "POST /events/{id}/inscrever",
+            lambda rng, s: ("POST", f"/events/{s}/inscrever", {
+                "headers": _header({"id": next(data.user_ids), "tipo": "estudante"}),
+            }),
+            setup=lambda: data.create_events(1)[0],
+        ),
+        Scenario(
+            "POST /events/{id}/lista-espera",
+            lambda rng, s: ("POST", f"/events/{s[0]}/lista-espera", {
+                "headers": _header({"id": next(data.user_ids), "tipo": "estudante"}),
+            }),
+            setup=lambda: data.create_waitlist(0),
+        ),
+        Scenario(
+            "GET /events/{id}/lista-espera/me",
+            lambda rng, s: ("GET", f"/events/{s[0]}/lista-espera/me", {
+                "headers": _header({"id": rng.choice(s[1]), "tipo": "estudante"}),
+            }),
+            setup=lambda: data.create_waitlist(pool),
+        ),
+        Scenario(
+            "DELETE /events/{id}/lista-espera/me",
+            lambda rng, s: ("DELETE", f"/events/{s[0]}/lista-espera/me", {
+                "headers": _header({"id": pop(s[1]), "tipo": "estudante"}),
+            }),
+            setup=lambda: data.create_waitlist(pool),
+        ),
+        Scenario(
+            "GET /events/{evento_id}/inscritos",
+            lambda rng, s: ("GET", f"/events/{data.random_registration(rng)[0]}/inscritos", {
+                "params": {"page": rng.randint(1, 5), "limit": 20}, "headers": ADMIN,
+            }),
+        ),
+        Scenario(
+            "GET /events/{evento_id}/inscritos/export",
+            lambda rng, s: (
+                "GET", f"/events/{data.random_registration(rng)[0]}/inscritos/export",
+                {"headers": ADMIN},
+            ),
+        ),
+        Scenario(
+            "GET /events/{evento_id}/stats",
+            lambda rng, s: (
+                "GET", f"/events/{data.random_registration(rng)[0]}/stats", {"headers": ADMIN},
+            ),
+        ),
+        Scenario(
+            "GET /organizers/me/stats",
+            lambda rng, s: ("GET", "/organizers/me/stats", {
+                "headers": _header({"id": rng.randint(1, 50), "tipo": "organizador"}),
+            }),
+        ),
+        Scenario(
+            "PATCH /events/{evento_id}/inscricoes/{user_id}",
+            lambda rng, s: (
+                "PATCH", "/events/{}/inscricoes/{}".format(*data.random_registration(rng)),
+                {"json": {"status": rng.choice(("concluido", "cancelado"))}, "headers": ADMIN},
+            ),
+        ),
+        Scenario(
+            "DELETE /events/{evento_id}/inscricoes/{user_id}",
+            lambda rng, s: (
+                "DELETE", f"/events/{s[0]}/inscricoes/{pop(s[1])}", {"headers": ADMIN},
+            ),
+            setup=evento_com_inscricoes,
+        ),
+        Scenario(
+            "POST /events/{evento_id}/inscricoes",
+            lambda rng, s: ("POST", f"/events/{s}/inscricoes", {
+                "json": {"user_ids": [next(data.user_ids) for _ in range(100)]},
+                "headers": ADMIN,
+            }),
+            setup=lambda: data.create_events(1)[0],
+        ),
+        Scenario(
+            "PATCH /events/{evento_id}/inscricoes",
+            lambda rng, s: ("PATCH", f"/events/{data.random_registration(rng)[0]}/inscricoes", {
+                "json": {
+                    "user_ids": [rng.randint(1, max(1, data.inscritos)) for _ in range(50)],
+                    "status": rng.choice(("concluido", "cancelado")),
+                },
+                "headers": ADMIN,
+            }),
+        ),
+        Scenario(
+            "GET /graphql",
+            lambda rng, s: ("GET", "/graphql", {"params": {
+                "query": GRAPHQL_EVENTO,
+                "variables": json.dumps({"id": data.random_event(rng)}),
+            }}),
+        ),
+        Scenario(
+            "GET /events/changes",
+            lambda rng, s: ("GET", "/events/changes", {
+                "params": {"since": rng.randint(0, 1000), "limit": 100, "wait": 0},
+            }),
+        ),
+        Scenario(
+            "GET /events/changes/stream",
+            lambda rng, s: ("GET", "/events/changes/stream", {"params": {"since": 0}}),
+        ),
+        Scenario(
+            "POST /graphql",
+            lambda rng, s: ("POST", "/graphql", {"json": {
+                "query": GRAPHQL_EVENTOS,
+                "variables": {"tipo": rng.choice(tipos) if rng.random() < 0.5 else None},
+            }, "headers": ADMIN}),
+        ),
+        Scenario(
+            "DELETE /events/{evento_id}/inscricoes",
+            lambda rng, s: ("DELETE", f"/events/{s[0]}/inscricoes", {
+                "json": {"user_ids": [pop(s[1]) for _ in range(50)]}, "headers": ADMIN,
+            }),
+            setup=evento_com_inscricoes,
+        ),
+    ]
+
+
+def app_routes() -> set[str]:
+    from fastapi.routing import APIRoute
+
+    from app.main import create_app
+
+    return {
+        f"{method} {route.path}"
+        for route in create_app().routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+
+def run(args) -> dict:
+    seed_events(args.database_url, args.events)
+    seed_registrations(args.database_url, args.events, args.registrations)
+
+    data = Dataset(args)
+    scenarios = build_scenarios(data)
+    if args.routes:
+        scenarios = [s for s in scenarios if any(r in s.route for r in args.routes)]
+    uncovered = sorted(app_routes() - {s.route for s in build_scenarios(data)})
+    if uncovered:
+        print(f"Rotas sem cenário: {', '.join(uncovered)}", file=sys.stderr)
+
+    # Cada stream SSE fecha ao fim de 1s, para medir pedidos completos. Sem controlo de
+    # admissão: os cenários de escrita medem o handler (bench_admission.py mede a admissão)
+    env = {
+        "DATABASE_URL": args.database_url,
+        "JWT_SECRET": SECRET,
+        "CHANGES_STREAM_MAX_SECONDS": "1",
+        "ADMISSION_ENABLED": "0",
+    }
+    if args.db_async:
+        env["DB_ASYNC"] = "1"
+    results = {}
+    with run_server(env, workers=args.workers, app="instrumented_app:app") as base_url:
+        for scenario in scenarios:
+            state = scenario.setup() if scenario.setup else None
+            httpx.post(f"{base_url}/__bench/reset")
+            summary = asyncio.run(
+                drive(
+                    base_url,
+                    lambda rng, s=scenario, st=state: s.make_request(rng, st),
+                    args.concurrency,
+                    args.duration,
+                )
+            )
+            stats = httpx.get(f"{base_url}/__bench/stats").json().get(scenario.route)
+            if stats and stats["requests"]:
+                summary["queries_per_request"] = round(stats["queries"] / stats["requests"], 2)
+            results[scenario.route] = summary
+            print(f"{scenario.route:<52} {summary}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "database": args.database_url.split("://")[0],
+            "events": args.events,
+            "registrations": args.registrations,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers,
+            "db_async": args.db_async,
+            "python": platform.python_version(),
+        },
+        "uncovered_routes": uncovered,
+        "routes": results,
+    }
+
+
+def _delta(base: dict, new: dict, key: str) -> str:
+    if not base.get(key):
+        return f"{new.get(key, 0):>8}"
+    return f"{new.get(key, 0):>8} ({(new.get(key, 0) - base[key]) / base[key]:+.0%})"
+
+
+def compare(base_path: str, new_path: str) -> None:
+    with open(base_path) as f:
+        base = json.load(f)["routes"]
+    with open(new_path) as f:
+        new = json.load(f)["routes"]
+    print(f"{'rota':<52} {'rps':>18} {'p99 ms':>20} {'queries':>12}")
+    for route in sorted(set(base) & set(new)):
+        b, n = base[route], new[route]
+        print(
+            f"{route:<52} {_delta(b, n, 'rps'):>18} {_delta(b, n, 'p99_ms'):>20} "
+            f"{n.get('queries_per_request', '-'):>12}"
+        )
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(description="Compara dois resultados do suite")
+        parser.add_argument("base")
+        parser.add_argument("new")
+        args = parser.parse_args(sys.argv[2:])
+        compare(args.base, args.new)
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=default_database_url("suite"))
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--registrations", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos por rota")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--db-async", action="store_true")
+    parser.add_argument("--routes", nargs="*", help="corre só as rotas que contêm estes textos")
+    parser.add_argument("--output", help="ficheiro JSON para guardar os resultados")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
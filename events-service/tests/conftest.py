@@ -0,0 +1,105 @@
+"""Fixtures partilhadas pelos testes que precisam de uma base de dados real.
+
+`db_client` serve a aplicação sobre um ficheiro SQLite migrado com `app.migrations`,
+instalado com `app.db.init_engine` como engine da aplicação, uma vez em cada modo de
+`DB_ASYNC`. Os cabeçalhos (`ORGANIZADOR`, `estudante(...)`, ...) e `criar_evento` são
+os ajudantes comuns para preparar dados pela API.
+"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from . import events_service_shim  # noqa: F401
+
+
+def auth_header(payload: dict) -> dict:
+    from jose import jwt
+
+    token = jwt.encode(payload, os.environ["JWT_SECRET"], algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def evento_payload(**overrides) -> dict:
+    payload = {
+        "nome": "Evento 1",
+        "descricao": "Desc",
+        "data_inicio": "2030-01-01T10:00:00",
+        "local": "Porto",
+        "capacidade": 100,
+        "preco": 5,
+        "tipo": "cultural",
+    }
+    payload.update(overrides)
+    return payload
+
+
+ORGANIZADOR = auth_header({"id": 10, "tipo": "organizador"})
+ESTUDANTE = auth_header({"id": 5, "tipo": "estudante"})
+ADMIN = auth_header({"id": 99, "tipo": "admin"})
+
+
+def estudante(user_id: int) -> dict:
+    return auth_header({"id": user_id, "tipo": "estudante"})
+
+
+def criar_evento(client, **overrides) -> int:
+    r = client.post("/events", json=evento_payload(**overrides), headers=ORGANIZADOR)
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    from app.migrations import upgrade
+
+    eng = create_engine(
+        f"sqlite:///{tmp_path / 'events.db'}", connect_args={"check_same_thread": False}
+    )
+    with eng.connect() as conn:
+        upgrade(conn)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def db_async(request, monkeypatch):
+    """Corre o teste nos dois modos de `DB_ASYNC` (threadpool e AsyncSession)."""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "db_async", request.param)
+    return request.param
+
+
+@pytest.fixture
+def db_client(db_engine, db_async, monkeypatch):
+    from app import alteracoes
+    from app import db as app_db
+    from app import main as app_main
+    from app.cache import EventCache, MemoryCache
+    from app.config import settings
+
+    # O TestClient fecha o event loop no fim de cada pedido: um difusor que continuasse a
+    # ler o outbox depois do pedido ficaria com uma query do aiosqlite a meio
+    monkeypatch.setattr(alteracoes, "difusor", alteracoes.Difusor(100, 0.05, 0.3, ocioso=0))
+    if db_async:
+        # Mesmo ficheiro, servido pelo aiosqlite; `db_engine` continua a servir os asserts
+        app_db.init_engine(app_db.create_async_engine_lazy(str(db_engine.url)))
+    else:
+        app_db.init_engine(db_engine)
+    monkeypatch.setattr(app_main, "cache", EventCache(MemoryCache()))
+    # Os testes preparam dados pela API, em rajadas; tests/test_admissao.py liga-o
+    monkeypatch.setattr(settings, "admission_enabled", False)
+    yield TestClient(app_main.create_app())
+    app_db.reset_engine()
+
+
+@pytest.fixture
+def app_engine(db_client, db_engine):
+    """Engine síncrono onde correm as queries da aplicação, para contar statements."""
+    from app import db as app_db
+
+    eng = app_db.current_engine()
+    return getattr(eng, "sync_engine", eng)
@@ -6,9 +6,14 @@ is on sys.path before importing `app.*`.
 This avoids requiring installation as a package.
 """
 
+import os
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+# `app.config.settings` is read once, on first import, by whichever test module gets there
+# first; pin the secret the API tests sign their tokens with.
+os.environ.setdefault("JWT_SECRET", "test_secret")
@@ -0,0 +1,112 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .conftest import ORGANIZADOR, criar_evento, estudante, evento_payload
+
+
+def _admissao(monkeypatch, **overrides):
+    from app import admissao
+    from app.config import settings
+
+    opcoes = {"taxa": 100.0, "rajada": 100, "max_utilizadores": 100, "concorrencia": 10}
+    opcoes.update(overrides)
+    controlo = admissao.Admissao(**opcoes)
+    monkeypatch.setattr(settings, "admission_enabled", True)
+    monkeypatch.setattr(admissao, "controlo", controlo)
+    return controlo
+
+
+def test_token_bucket_refills_and_forgets_idle_keys():
+    from app.admissao import Baldes
+
+    baldes = Baldes(taxa=2.0, rajada=2, max_chaves=2)
+    assert [baldes.retirar("a", 0.0) for _ in range(3)] == [0, 0, 0.5]
+    # Meio segundo depois há uma ficha; um pedido recusado não gasta nada
+    assert baldes.retirar("a", 0.25) == 0.25
+    assert baldes.retirar("a", 0.5) == 0
+    baldes.retirar("b", 0.5)
+    baldes.retirar("c", 0.5)
+    assert len(baldes) == 2
+    assert baldes.retirar("a", 0.5) == 0
+
+
+def test_user_bucket_answers_429_per_user_and_route(db_client, monkeypatch):
+    _admissao(monkeypatch, taxa=0.5, rajada=2)
+    evento_id = criar_evento(db_client)
+    inscrever = f"/events/{evento_id}/inscrever"
+
+    codes = [db_client.post(inscrever, headers=estudante(1)).status_code for _ in range(2)]
+    assert codes == [201, 400]
+    r = db_client.post(inscrever, headers=estudante(1))
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "2"
+
+    # Outros utilizadores, outras rotas e leituras não contam para o mesmo balde
+    assert db_client.post(inscrever, headers=estudante(2)).status_code == 201
+    r = db_client.post(f"/events/{evento_id}/lista-espera", headers=estudante(1))
+    assert r.status_code == 400
+    assert db_client.get(f"/events/{evento_id}").status_code == 200
+    # Sem token válido não há balde: o handler responde 401
+    assert db_client.post(inscrever).status_code == 401
+
+
+def test_route_concurrency_sheds_with_503(db_client, monkeypatch):
+    from app import main as app_main
+
+    controlo = _admissao(monkeypatch, concorrencia=1, concorrencia_rotas={"POST /events": 0})
+    r = db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+    controlo.concorrencia_rotas = {}
+    evento_id = criar_evento(db_client)
+    dentro, continuar = threading.Event(), threading.Event()
+    reservar = app_main.reservar_lugares
+
+    def reservar_devagar(*args):
+        dentro.set()
+        continuar.wait(10)
+        return reservar(*args)
+
+    monkeypatch.setattr(app_main, "reservar_lugares", reservar_devagar)
+    inscrever = f"/events/{evento_id}/inscrever"
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        primeiro = pool.submit(db_client.post, inscrever, headers=estudante(1))
+        assert dentro.wait(10)
+        # A vaga da rota está ocupada: o segundo pedido sai logo, sem esperar
+        assert db_client.post(inscrever, headers=estudante(2)).status_code == 503
+        continuar.set()
+        assert primeiro.result().status_code == 201
+
+    # A vaga é devolvida também quando o handler falha
+    assert db_client.post(inscrever, headers=estudante(1)).status_code == 400
+    assert db_client.post(inscrever, headers=estudante(2)).status_code == 201
+    assert set(controlo.em_curso.values()) == {0}
+
+
+def test_shed_requests_do_not_spend_tokens(db_client, monkeypatch):
+    controlo = _admissao(monkeypatch, taxa=0.01, rajada=1)
+    evento_id = criar_evento(db_client)
+    inscrever = f"/events/{evento_id}/inscrever"
+
+    controlo.concorrencia_rotas = {"POST /events/{id}/inscrever": 0}
+    codes = [db_client.post(inscrever, headers=estudante(1)).status_code for _ in range(3)]
+    assert codes == [503, 503, 503]
+
+    # A única ficha do balde continua lá para quando houver vaga
+    controlo.concorrencia_rotas = {}
+    assert db_client.post(inscrever, headers=estudante(1)).status_code == 201
+    assert db_client.post(inscrever, headers=estudante(1)).status_code == 429
+
+
+def test_saturated_pool_sheds_writes_but_not_reads(db_client, monkeypatch):
+    from app import db as app_db
+
+    _admissao(monkeypatch, max_uso_pool=0.75)
+    evento_id = criar_evento(db_client)
+    monkeypatch.setattr(app_db, "pool_status", lambda eng: {"usage": 0.8})
+
+    r = db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+    assert r.status_code == 503 and "Retry-After" in r.headers
+    assert db_client.get(f"/events/{evento_id}").status_code == 200
+    assert db_client.get("/events").status_code == 200
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from .conftest import ADMIN, ESTUDANTE, ORGANIZADOR, evento_payload
+
+
+@pytest.fixture
+def difusor(db_client, monkeypatch):
+    from app import alteracoes
+
+    novo = alteracoes.Difusor(capacidade=100, intervalo=0.05, espera_buracos=0.3, ocioso=0)
+    monkeypatch.setattr(alteracoes, "difusor", novo)
+    return novo
+
+
+def _resumo(alteracoes: list[dict]) -> list[tuple]:
+    return [(a["entidade"], a["acao"], a["evento_id"], a["user_id"]) for a in alteracoes]
+
+
+def test_every_write_lands_in_the_feed(db_client, difusor):
+    db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    db_client.patch("/events/1", json={"status": "cancelado"}, headers=ORGANIZADOR)
+    db_client.patch("/events/1", json={"status": "agendado"}, headers=ORGANIZADOR)
+    db_client.post("/events/1/inscrever", headers=ESTUDANTE)
+    db_client.post("/events/1/inscricoes", json={"user_ids": [6, 7]}, headers=ADMIN)
+    db_client.patch(
+        "/events/1/inscricoes", json={"user_ids": [6, 7], "status": "concluido"}, headers=ADMIN
+    )
+    db_client.patch("/events/1/inscricoes/5", json={"status": "cancelado"}, headers=ADMIN)
+    db_client.request("DELETE", "/events/1/inscricoes", json={"user_ids": [6]}, headers=ADMIN)
+    db_client.delete("/events/1/inscricoes/7", headers=ADMIN)
+    db_client.delete("/events/1", headers=ORGANIZADOR)
+
+    body = db_client.get("/events/changes", params={"since": 0, "wait": 0}, headers=ADMIN).json()
+    assert [a["seq"] for a in body["changes"]] == list(range(1, 13))
+    assert body["next"] == 12
+    assert _resumo(body["changes"]) == [
+        ("evento", "criado", 1, None),
+        ("evento", "atualizado", 1, None),
+        ("evento", "atualizado", 1, None),
+        ("inscricao", "criado", 1, 5),
+        ("inscricao", "criado", 1, 6),
+        ("inscricao", "criado", 1, 7),
+        ("inscricao", "atualizado", 1, 6),
+        ("inscricao", "atualizado", 1, 7),
+        ("inscricao", "atualizado", 1, 5),
+        ("inscricao", "apagado", 1, 6),
+        ("inscricao", "apagado", 1, 7),
+        ("evento", "apagado", 1, None),
+    ]
+    assert [a["status"] for a in body["changes"][:3]] == ["agendado", "cancelado", "agendado"]
+
+    # Sem token de admin o feed não expõe quem se inscreveu
+    publico = db_client.get("/events/changes", params={"since": 3, "limit": 2, "wait": 0})
+    assert publico.headers["cache-control"] == "no-store"
+    assert _resumo(publico.json()["changes"]) == [
+        ("inscricao", "criado", 1, None),
+        ("inscricao", "criado", 1, None),
+    ]
+    assert publico.json()["next"] == 5
+
+    # Uma escrita que falha não deixa alteração
+    db_client.post("/events/1/inscrever", headers=ESTUDANTE)
+    body = db_client.get("/events/changes", params={"since": 12, "wait": 0}).json()
+    assert body == {"changes": [], "next": 12}
+
+
+def test_long_poll_wakes_on_commit(db_client, difusor):
+    db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+
+    def escrever():
+        time.sleep(0.3)
+        db_client.patch("/events/1", json={"nome": "Outro"}, headers=ORGANIZADOR)
+
+    escritor = threading.Thread(target=escrever)
+    escritor.start()
+    inicio = time.monotonic()
+    body = db_client.get("/events/changes", params={"since": 1, "wait": 5}).json()
+    escritor.join()
+    assert time.monotonic() - inicio < 2
+    assert _resumo(body["changes"]) == [("evento", "atualizado", 1, None)]
+    assert body["next"] == 2
+
+    # Sem alterações, devolve vazio ao fim da espera
+    body = db_client.get("/events/changes", params={"wait": 0.1}).json()
+    assert body == {"changes": [], "next": 2}
+
+
+def test_subscribers_share_one_outbox_read(db_client, db_engine, app_engine, difusor):
+    from app import alteracoes
+
+    consultas = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        if "FROM alteracoes" in statement:
+            consultas.append(statement)
+
+    async def cenario():
+        async def subscritor():
+            async with difusor.subscrever():
+                return await difusor.proximas(difusor.confirmado, 10, 2)
+
+        tarefas = [asyncio.create_task(subscritor()) for _ in range(50)]
+        await asyncio.sleep(0.1)
+        with db_engine.begin() as conn:
+            conn.execute(
+                insert(alteracoes.Alteracao),
+                [{"entidade": "evento", "acao": "criado", "evento_id": 1}],
+            )
+        return await asyncio.gather(*tarefas)
+
+    event.listen(app_engine, "before_cursor_execute", contar)
+    try:
+        resultados = asyncio.run(cenario())
+    finally:
+        event.remove(app_engine, "before_cursor_execute", contar)
+    assert all(_resumo(r) == [("evento", "criado", 1, None)] for r in resultados)
+    # Uma leitura do fim do outbox e poucas leituras periódicas, não uma por subscritor
+    assert len(consultas) < 10
+
+
+def test_gap_waits_for_open_transaction(db_client, db_engine, difusor):
+    from app.models import Alteracao
+
+    def escrever(seq: int):
+        with db_engine.begin() as conn:
+            conn.execute(
+                insert(Alteracao),
+                [{"seq": seq, "entidade": "evento", "acao": "criado", "evento_id": seq}],
+            )
+
+    async def cenario():
+        async with difusor.subscrever():
+            escrever(1)
+            escrever(3)
+            primeiras = await difusor.proximas(0, 10, 0.2)
+            # O 2 chega antes de o buraco expirar: entregue por ordem
+            escrever(2)
+            seguintes = await difusor.proximas(1, 10, 1)
+            escrever(5)
+            # O 4 ainda não chegou: saltado ao fim de espera_buracos
+            depois_do_buraco = await difusor.proximas(3, 10, 2)
+            # Chega depois: republicado no fim, também para quem retoma a partir do 5
+            escrever(4)
+            atrasada = await difusor.proximas(5, 10, 2)
+            return primeiras, seguintes, depois_do_buraco, atrasada
+
+    primeiras, seguintes, depois_do_buraco, atrasada = asyncio.run(cenario())
+    assert [a["seq"] for a in primeiras] == [1]
+    assert [a["seq"] for a in seguintes] == [2, 3]
+    assert [a["seq"] for a in depois_do_buraco] == [5]
+    assert [(a["seq"], a["evento_id"]) for a in atrasada] == [(6, 4)]
+    body = db_client.get("/events/changes", params={"since": 0, "wait": 0}).json()
+    assert [a["seq"] for a in body["changes"]] == [1, 2, 3, 5, 6]
+
+
+def test_late_commit_is_republished_once(db_engine):
+    from app import alteracoes
+    from app.models import Alteracao
+
+    linhas = [
+        {"seq": seq, "entidade": "evento", "acao": "criado", "evento_id": seq} for seq in (1, 3)
+    ]
+    with db_engine.begin() as conn:
+        conn.execute(insert(Alteracao), linhas)
+    with Session(db_engine) as db:
+        # Buraco de um rollback: nada a mudar
+        assert alteracoes.republicar(db, [(2, 2)]) == 0
+        # Dois processos saltaram o 1: o segundo já não encontra a linha original
+        assert alteracoes.republicar(db, [(1, 1)]) == 1
+        assert alteracoes.republicar(db, [(1, 1)]) == 0
+        assert [a["evento_id"] for a in alteracoes.ler(db, 0, None, 10)] == [3, 1]
+
+
+def test_sse_stream_resumes_from_last_event_id(db_client, difusor, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "changes_stream_max_seconds", 0.3)
+    monkeypatch.setattr(settings, "changes_heartbeat_seconds", 0.1)
+    db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    db_client.post("/events/1/inscrever", headers=ESTUDANTE)
+    db_client.delete("/events/1", headers=ORGANIZADOR)
+
+    r = db_client.get("/events/changes/stream", headers={"Last-Event-ID": "1", **ADMIN})
+    assert r.headers["content-type"].startswith("text/event-stream")
+    mensagens = [m for m in r.text.split("\n\n") if m.startswith("id:")]
+    assert mensagens[0].splitlines()[:2] == ["id: 2", "event: inscricao.criado"]
+    assert '"user_id": 5' in mensagens[0]
+    assert mensagens[1].splitlines()[:2] == ["id: 3", "event: evento.apagado"]
+    assert ": keep-alive" in r.text
+
+
+def test_compaction_in_batches(db_client, db_engine, difusor):
+    from app import alteracoes
+    from app.datas import agora
+    from app.models import Alteracao
+
+    for _ in range(5):
+        db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    with db_engine.begin() as conn:
+        conn.execute(
+            update(Alteracao)
+            .where(Alteracao.seq <= 3)
+            .values(created_at=agora() - timedelta(days=10))
+        )
+    with db_engine.connect() as conn:
+        assert alteracoes.compactar(conn, timedelta(days=3), lote=2) == 3
+        assert alteracoes.compactar(conn, timedelta(days=3), lote=2) == 0
+
+    assert db_client.get("/events/changes", params={"since": 1, "wait": 0}).status_code == 410
+    body = db_client.get("/events/changes", params={"since": 3, "wait": 0}).json()
+    assert [a["seq"] for a in body["changes"]] == [4, 5]
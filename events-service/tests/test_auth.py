@@ -0,0 +1,56 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from . import events_service_shim  # noqa: F401
+
+
+def _bearer(payload: dict, secret: str) -> str:
+    return "Bearer " + jwt.encode(payload, secret, algorithm="HS256")
+
+
+@pytest.fixture
+def auth():
+    from app import auth
+
+    auth._token_cache.clear()
+    yield auth
+    auth._token_cache.clear()
+
+
+def test_verified_claims_are_memoized(auth):
+    from app.config import settings
+
+    header = _bearer({"id": 1, "tipo": "organizador"}, settings.jwt_secret)
+    hits = auth._token_cache.hits
+    assert auth.verify_token(header)["id"] == 1
+    assert auth.verify_token(header)["id"] == 1
+    assert auth._token_cache.hits == hits + 1
+
+
+def test_cached_entry_expires_with_token(auth, monkeypatch):
+    from app.config import settings
+
+    agora = time.time()
+    monkeypatch.setattr(auth._token_cache, "relogio", lambda: agora)
+    header = _bearer({"id": 1, "exp": int(agora) + 60}, settings.jwt_secret)
+    auth.verify_token(header)
+    key = next(iter(auth._token_cache._data))
+    assert auth._token_cache.get(key) is not None
+
+    monkeypatch.setattr(auth._token_cache, "relogio", lambda: agora + 61)
+    assert auth._token_cache.get(key) is None
+
+
+def test_cache_is_cleared_when_secret_changes(auth, monkeypatch):
+    from app.config import settings
+
+    header = _bearer({"id": 1}, settings.jwt_secret)
+    auth.verify_token(header)
+
+    monkeypatch.setattr(settings, "jwt_secret", "rotated")
+    with pytest.raises(HTTPException) as exc:
+        auth.verify_token(header)
+    assert exc.value.status_code == 401
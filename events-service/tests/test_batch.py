@@ -0,0 +1,85 @@
+from .conftest import ADMIN, ORGANIZADOR, auth_header, criar_evento, estudante
+
+
+def _resultados(response) -> dict:
+    assert response.status_code == 200, response.text
+    return {item["user_id"]: item["resultado"] for item in response.json()["resultados"]}
+
+
+def test_batch_register_requires_admin(db_client):
+    evento_id = criar_evento(db_client, capacidade=5)
+    r = db_client.post(
+        f"/events/{evento_id}/inscricoes", json={"user_ids": [1]}, headers=ORGANIZADOR
+    )
+    assert r.status_code == 403
+
+
+def test_batch_register_reports_per_item_outcomes(db_client):
+    evento_id = criar_evento(db_client, capacidade=3)
+    db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+
+    r = db_client.post(
+        f"/events/{evento_id}/inscricoes", json={"user_ids": [1, 2, 3, 4, 2]}, headers=ADMIN
+    )
+    assert _resultados(r) == {1: "ja_inscrito", 2: "inscrita", 3: "inscrita", 4: "esgotado"}
+
+    r = db_client.get(f"/events/{evento_id}/inscritos", headers=ORGANIZADOR)
+    assert r.json()["total"] == 3
+
+
+def test_batch_status_update_and_delete(db_client):
+    evento_id = criar_evento(db_client, capacidade=3)
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [1, 2, 3]}, headers=ADMIN)
+
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1, 2, 7], "status": "cancelado"},
+        headers=ORGANIZADOR,
+    )
+    assert _resultados(r) == {1: "atualizada", 2: "atualizada", 7: "nao_encontrada"}
+
+    # Os dois lugares libertados são ocupados; a terceira reativação já não cabe
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [4]}, headers=ADMIN)
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1, 2, 3], "status": "concluido"},
+        headers=ORGANIZADOR,
+    )
+    assert _resultados(r) == {1: "atualizada", 2: "esgotado", 3: "atualizada"}
+
+    r = db_client.request(
+        "DELETE", f"/events/{evento_id}/inscricoes", json={"user_ids": [1, 9]}, headers=ORGANIZADOR
+    )
+    assert _resultados(r) == {1: "apagada", 9: "nao_encontrada"}
+    r = db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [5, 6]}, headers=ADMIN)
+    assert _resultados(r) == {5: "inscrita", 6: "esgotado"}
+
+
+def test_batch_reactivation_on_concluded_event(db_client):
+    evento_id = criar_evento(db_client, capacidade=2)
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [1]}, headers=ADMIN)
+    db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1], "status": "cancelado"},
+        headers=ORGANIZADOR,
+    )
+    r = db_client.patch(f"/events/{evento_id}", json={"status": "concluido"}, headers=ORGANIZADOR)
+    assert r.status_code == 200
+
+    # O evento já não aceita inscrições, mas a reativação só precisa de um lugar livre
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1], "status": "concluido"},
+        headers=ORGANIZADOR,
+    )
+    assert _resultados(r) == {1: "atualizada"}
+
+
+def test_batch_status_forbidden_for_other_organizer(db_client):
+    evento_id = criar_evento(db_client, capacidade=3)
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1], "status": "cancelado"},
+        headers=auth_header({"id": 11, "tipo": "organizador"}),
+    )
+    assert r.status_code == 403
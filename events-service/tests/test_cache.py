@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from . import events_service_shim  # noqa: F401
+
+
+class _RedisStandIn:
+    """Cliente local com o subconjunto da API redis-py usado pelo RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+        # Leituras respondem, escritas falham (p.ex. uma réplica promovida a meio)
+        self.read_only = False
+
+    def get(self, key):
+        self.thread = threading.get_ident()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.read_only:
+            raise ConnectionError("READONLY You can't write against a read only replica.")
+        self.data[key] = value.encode()
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    from app.cache import MemoryCache
+
+    backend = MemoryCache(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+    assert backend.get("c") == 3
+
+
+def test_memory_cache_entries_expire():
+    from app.cache import MemoryCache
+
+    backend = MemoryCache(ttl=0.01)
+    backend.set("a", 1)
+    time.sleep(0.02)
+    assert backend.get("a") is None
+
+
+def test_invalidation_bumps_list_generation():
+    from app.cache import EventCache, MemoryCache, RedisCache
+
+    for backend in (MemoryCache(), RedisCache(_RedisStandIn())):
+        cache = EventCache(backend)
+        cache.set_evento(1, cache.marca_evento(1), {"id": 1})
+        cache.set_evento(2, cache.marca_evento(2), {"id": 2})
+        cache.set_lista(cache.marca_listas(), ("cultural", None, 1, 10), {"total": 2})
+        assert cache.get_lista(cache.marca_listas(), ("cultural", None, 1, 10)) == {"total": 2}
+
+        cache.invalidate_evento(1)
+        assert cache.get_evento(1, cache.marca_evento(1)) is None
+        assert cache.get_evento(2, cache.marca_evento(2)) == {"id": 2}
+        assert cache.get_lista(cache.marca_listas(), ("cultural", None, 1, 10)) is None
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 2
+
+
+def test_reads_racing_a_write_are_not_cached():
+    from app.cache import EventCache, MemoryCache
+
+    cache = EventCache(MemoryCache())
+    # Leitura da base de dados a meio: a escrita invalida antes de a página ser guardada
+    marca_evento, marca_listas = cache.marca_evento(1), cache.marca_listas()
+    cache.invalidate_evento(1)
+    cache.set_evento(1, marca_evento, {"id": 1, "nome": "antigo"})
+    cache.set_lista(marca_listas, ("cultural",), {"total": 1})
+
+    assert cache.get_evento(1, cache.marca_evento(1)) is None
+    assert cache.get_lista(cache.marca_listas(), ("cultural",)) is None
+
+
+def test_failed_invalidation_stops_serving_until_retried():
+    from app.cache import EventCache, RedisCache
+
+    redis = _RedisStandIn()
+    cache = EventCache(RedisCache(redis))
+    cache.set_evento(1, cache.marca_evento(1), {"id": 1})
+    cache.set_lista(cache.marca_listas(), ("cultural",), {"total": 1})
+
+    # A invalidação não chega ao Redis: as entradas antigas continuam lá, mas não são servidas
+    redis.read_only = True
+    cache.invalidate_evento(1)
+    assert cache.get_evento(1, cache.marca_evento(1)) is None
+    assert cache.get_lista(cache.marca_listas(), ("cultural",)) is None
+    assert cache.stats()["hits"] == 0
+
+    # Repetida antes da leitura seguinte, logo que o Redis aceita escritas
+    redis.read_only = False
+    assert cache.get_evento(1, cache.marca_evento(1)) is None
+    assert cache.get_lista(cache.marca_listas(), ("cultural",)) is None
+    cache.set_evento(1, cache.marca_evento(1), {"id": 1, "nome": "novo"})
+    assert cache.get_evento(1, cache.marca_evento(1)) == {"id": 1, "nome": "novo"}
+
+
+def test_redis_cache_only_swallows_server_errors():
+    from app.cache import RedisCache
+
+    redis = _RedisStandIn()
+    backend = RedisCache(redis)
+    redis.read_only = True
+    assert backend.set("a", 1) is False
+    # Um erro de programação não passa por falha do servidor
+    with pytest.raises(TypeError):
+        backend.get(["não", "é", "uma", "chave"])
+
+
+def test_redis_calls_leave_the_event_loop_inside_run_sync():
+    from sqlalchemy.util.concurrency import greenlet_spawn
+
+    from app.cache import RedisCache
+
+    redis = _RedisStandIn()
+    backend = RedisCache(redis)
+
+    async def cenario():
+        # Como o corpo de um handler com DB_ASYNC, dentro de `AsyncSession.run_sync`
+        await greenlet_spawn(backend.get, "k")
+        dentro = redis.thread
+        backend.get("k")
+        return dentro, redis.thread
+
+    loop = threading.get_ident()
+    dentro, fora = asyncio.run(cenario())
+    assert dentro != loop
+    assert fora == loop
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from .conftest import ORGANIZADOR, criar_evento, estudante
+
+
+def test_registration_is_refused_when_sold_out(db_client):
+    evento_id = criar_evento(db_client, capacidade=1)
+
+    r = db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+    assert r.status_code == 201
+    assert r.json()["inscricao"]["valor_pago"] == "5.00"
+
+    r = db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(2))
+    assert r.status_code == 409
+    assert r.json()["detail"] == "Evento esgotado."
+
+
+def test_duplicate_registration_does_not_take_a_seat(db_client, db_engine):
+    from app.models import Evento
+
+    evento_id = criar_evento(db_client, capacidade=5)
+    assert db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1)).status_code == 201
+    r = db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+    assert r.status_code == 400
+
+    with db_engine.connect() as conn:
+        ocupados = conn.execute(
+            select(Evento.lugares_ocupados).where(Evento.id == evento_id)
+        ).scalar_one()
+    assert ocupados == 1
+
+
+def test_cancel_and_delete_release_seats(db_client):
+    evento_id = criar_evento(db_client, capacidade=1)
+    db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes/1", json={"status": "cancelado"}, headers=ORGANIZADOR
+    )
+    assert r.status_code == 200
+    assert db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(2)).status_code == 201
+
+    # Reativar a inscrição cancelada precisa de um lugar livre
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes/1", json={"status": "concluido"}, headers=ORGANIZADOR
+    )
+    assert r.status_code == 409
+
+    r = db_client.delete(f"/events/{evento_id}/inscricoes/2", headers=ORGANIZADOR)
+    assert r.status_code == 200
+    assert db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(3)).status_code == 201
+
+
+def test_reactivation_only_needs_a_free_seat(db_client, db_engine):
+    from app.models import Evento
+
+    evento_id = criar_evento(db_client, capacidade=1)
+    db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+    db_client.patch(
+        f"/events/{evento_id}/inscricoes/1", json={"status": "cancelado"}, headers=ORGANIZADOR
+    )
+    r = db_client.patch(f"/events/{evento_id}", json={"status": "concluido"}, headers=ORGANIZADOR)
+    assert r.status_code == 200
+
+    # O evento já não aceita inscrições, mas a inscrição existente pode ser reativada
+    r = db_client.patch(
+        f"/events/{evento_id}/inscricoes/1", json={"status": "concluido"}, headers=ORGANIZADOR
+    )
+    assert r.status_code == 200
+    with db_engine.connect() as conn:
+        ocupados = conn.execute(
+            select(Evento.lugares_ocupados).where(Evento.id == evento_id)
+        ).scalar_one()
+    assert ocupados == 1
+
+
+def test_concurrent_registrations_never_oversell(db_client, db_engine):
+    from app.models import Inscricao
+
+    evento_id = criar_evento(db_client, capacidade=10)
+
+    def inscrever(user_id: int) -> int:
+        r = db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(user_id))
+        return r.status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        codes = list(pool.map(inscrever, range(1, 61)))
+
+    assert codes.count(201) == 10
+    assert codes.count(409) == 50
+    with db_engine.connect() as conn:
+        total = conn.execute(
+            select(func.count()).select_from(Inscricao).where(Inscricao.evento_id == evento_id)
+        ).scalar_one()
+    assert total == 10
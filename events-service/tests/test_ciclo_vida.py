@@ -0,0 +1,202 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .conftest import ESTUDANTE, ORGANIZADOR, criar_evento, estudante
+
+
+def _agendador(**overrides):
+    from app.ciclo_vida import Agendador
+
+    opcoes = {"intervalo": 60, "lote": 500, "lotes_por_ciclo": 20, "duracao_lease": 60}
+    opcoes.update(overrides)
+    return Agendador(**opcoes)
+
+
+def test_finished_events_are_closed_in_batches(db_client, db_engine):
+    from app import metrics
+    from app.models import Evento
+
+    sem_fim = criar_evento(db_client, data_inicio="2020-01-01T10:00:00")
+    a_decorrer = criar_evento(
+        db_client, data_inicio="2020-01-01T10:00:00", data_fim="2099-01-01T10:00:00"
+    )
+    com_fim = criar_evento(
+        db_client, data_inicio="2020-01-01T10:00:00", data_fim="2020-01-02T10:00:00"
+    )
+    futuro = criar_evento(db_client)
+    cancelado = criar_evento(db_client, data_inicio="2020-01-01T10:00:00")
+    db_client.patch(f"/events/{cancelado}", json={"status": "cancelado"}, headers=ORGANIZADOR)
+    outro = criar_evento(db_client, tipo="lazer", data_inicio="2021-06-01T10:00:00")
+    inicio = db_client.get("/events/changes", params={"wait": 0}).json()["next"]
+
+    metrics.lifecycle_batch_duration.clear()
+    agendador = _agendador(lote=2)
+    invalidados = []
+    with Session(db_engine) as db:
+        assert agendador.ciclo(db, invalidados.extend) == 3
+    assert agendador.lider is True
+    assert agendador.atraso == 0
+    assert sorted(invalidados) == [sem_fim, com_fim, outro]
+    # Um lote cheio e um com o que sobrou
+    assert "lifecycle_batch_duration_seconds_count{} 2" in metrics.render()
+
+    with Session(db_engine) as db:
+        estados = dict(db.execute(select(Evento.id, Evento.status)).all())
+        versoes = dict(db.execute(select(Evento.id, Evento.versao)).all())
+    assert estados == {
+        sem_fim: "concluido",
+        a_decorrer: "agendado",
+        com_fim: "concluido",
+        futuro: "agendado",
+        cancelado: "cancelado",
+        outro: "concluido",
+    }
+    assert versoes[sem_fim] == 2 and versoes[futuro] == 1
+
+    # Contadores das listagens e outbox na mesma transação
+    assert db_client.get("/events", params={"status": "agendado"}).json()["total"] == 2
+    assert db_client.get("/events", params={"status": "concluido"}).json()["total"] == 3
+    alteracoes = db_client.get("/events/changes", params={"since": inicio, "wait": 0}).json()
+    assert sorted(a["evento_id"] for a in alteracoes["changes"]) == [sem_fim, com_fim, outro]
+    assert {(a["acao"], a["status"]) for a in alteracoes["changes"]} == {
+        ("atualizado", "concluido")
+    }
+
+    r = db_client.post(f"/events/{sem_fim}/inscrever", headers=ESTUDANTE)
+    assert r.status_code == 400
+
+    # Nada por fechar: nenhum lote escreve
+    with Session(db_engine) as db:
+        assert agendador.ciclo(db) == 0
+
+
+def test_closing_an_event_clears_its_waitlist(db_client, db_engine):
+    from app.models import EsperaInscricao, FilaEspera, NoFilaEspera
+
+    terminado = criar_evento(db_client, capacidade=1, data_inicio="2020-01-01T10:00:00")
+    futuro = criar_evento(db_client, capacidade=1)
+    for evento_id in (terminado, futuro):
+        db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+        for user_id in (2, 3):
+            r = db_client.post(f"/events/{evento_id}/lista-espera", headers=estudante(user_id))
+            assert r.status_code == 201
+
+    with Session(db_engine) as db:
+        assert _agendador().ciclo(db) == 1
+        for model in (EsperaInscricao, FilaEspera, NoFilaEspera):
+            restantes = db.execute(select(model.evento_id).distinct()).scalars().all()
+            assert restantes == [futuro]
+
+    # Sem fila, ninguém fica com uma posição que nunca vai ser promovida
+    r = db_client.get(f"/events/{terminado}/lista-espera/me", headers=estudante(2))
+    assert r.status_code == 404
+    r = db_client.get(f"/events/{futuro}/lista-espera/me", headers=estudante(3))
+    assert r.json()["posicao"] == 2
+
+
+@pytest.fixture
+def fuso_local(monkeypatch):
+    """Processo com a hora local em UTC-10, para apanhar comparações com `datetime.now()`."""
+    monkeypatch.setenv("TZ", "Etc/GMT+10")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_finished_events_use_utc_outside_utc(db_client, db_engine, fuso_local):
+    from app.datas import agora
+
+    assert datetime.now() < agora() - timedelta(hours=9)
+    # Terminou há cinco horas em UTC; na hora local ainda faltariam cinco
+    fim = (agora() - timedelta(hours=5)).replace(microsecond=0)
+    terminado = criar_evento(
+        db_client,
+        data_inicio=(fim - timedelta(hours=1)).isoformat(),
+        data_fim=fim.isoformat(),
+    )
+    seguinte = criar_evento(db_client, data_inicio=(agora() + timedelta(hours=1)).isoformat())
+
+    proximos = db_client.get("/events/upcoming").json()["data"]
+    assert [e["id"] for e in proximos] == [seguinte]
+    agendador = _agendador()
+    with Session(db_engine) as db:
+        assert agendador.ciclo(db) == 1
+    assert db_client.get(f"/events/{terminado}").json()["status"] == "concluido"
+
+
+def test_lease_keeps_a_single_worker_closing_events(db_client, db_engine):
+    from app import ciclo_vida
+    from app.datas import agora
+    from app.models import Arrendamento
+
+    primeiro, segundo = _agendador(), _agendador()
+    with Session(db_engine) as db:
+        assert primeiro.ciclo(db) == 0
+        criar_evento(db_client, data_inicio="2020-01-01T10:00:00")
+        assert segundo.ciclo(db) == 0
+        assert segundo.lider is False and segundo.atraso is None
+        # O dono renova o lease a cada ciclo
+        assert primeiro.ciclo(db) == 1
+
+        # Um worker que morreu: o lease expira e passa para outro
+        criar_evento(db_client, data_inicio="2020-01-01T10:00:00")
+        db.execute(update(Arrendamento).values(expira_em=agora() - timedelta(seconds=1)))
+        db.commit()
+        assert segundo.ciclo(db) == 1
+        assert primeiro.ciclo(db) == 0 and primeiro.lider is False
+
+        # Um worker que termina liberta o lease
+        ciclo_vida.libertar(db, ciclo_vida.NOME, segundo.dono)
+        assert primeiro.ciclo(db) == 0 and primeiro.lider is True
+
+
+def test_lag_reports_the_oldest_event_left_open(db_client, db_engine, monkeypatch):
+    from app import ciclo_vida, metrics
+
+    criar_evento(db_client, data_inicio="2020-01-01T10:00:00")
+    criar_evento(db_client, data_inicio="2020-01-01T10:00:00", data_fim="2020-01-03T10:00:00")
+    agendador = _agendador(lote=1, lotes_por_ciclo=1)
+    monkeypatch.setattr(ciclo_vida, "agendador", agendador)
+
+    with Session(db_engine) as db:
+        assert agendador.ciclo(db) == 1
+    # Ficou por fechar um evento que terminou há anos
+    assert agendador.atraso > 365 * 24 * 3600
+    texto = metrics.render()
+    assert f"lifecycle_lag_seconds {agendador.atraso}" in texto
+    assert "lifecycle_leader 1.0" in texto
+
+    with Session(db_engine) as db:
+        assert agendador.ciclo(db) == 1
+    assert agendador.atraso == 0
+
+
+def test_lifespan_runs_the_scheduler(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app import ciclo_vida
+    from app import db as app_db
+    from app import main as app_main
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'ciclo.db'}")
+    monkeypatch.setattr(ciclo_vida, "agendador", _agendador(intervalo=0.05))
+    try:
+        with TestClient(app_main.create_app()) as client:
+            deadline = time.monotonic() + 10
+            while client.get("/health/ready").status_code != 200:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+            evento = criar_evento(client, data_inicio="2020-01-01T10:00:00")
+            while client.get(f"/events/{evento}").json()["status"] != "concluido":
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+        # O lease fica livre quando o worker termina
+        assert ciclo_vida.agendador.lider is None
+    finally:
+        app_db.reset_engine()
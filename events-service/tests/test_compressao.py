@@ -0,0 +1,123 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from sqlalchemy import event
+
+from .conftest import ORGANIZADOR, evento_payload
+
+
+@pytest.fixture
+def catalogo(db_client):
+    for i in range(30):
+        payload = evento_payload(nome=f"Evento {i}", descricao="Descrição longa. " * 40)
+        db_client.post("/events", json=payload, headers=ORGANIZADOR)
+    return db_client
+
+
+def test_negotiation():
+    from app.compressao import negociar
+
+    assert negociar("gzip, deflate, br") == "br"
+    assert negociar("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negociar("br;q=0, gzip") == "gzip"
+    assert negociar("*") == "br"
+    assert negociar("gzip;q=0, *;q=0.1") == "br"
+    assert negociar("deflate, identity") is None
+    assert negociar("") is None
+
+
+@pytest.mark.parametrize(
+    "codificacao, descomprimir",
+    [("gzip", gzip.decompress), ("br", brotli.decompress)],
+)
+def test_large_responses_are_compressed(catalogo, codificacao, descomprimir):
+    params = {"limit": 30}
+    with catalogo.stream(
+        "GET", "/events", params=params, headers={"Accept-Encoding": codificacao}
+    ) as r:
+        bruto = b"".join(r.iter_raw())
+    assert r.headers["content-encoding"] == codificacao
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"].startswith('W/"')
+    assert int(r.headers["content-length"]) == len(bruto)
+    assert len(json.loads(descomprimir(bruto))["data"]) == 30
+
+    # O ETag fraco continua a validar a representação
+    r = catalogo.get(
+        "/events",
+        params=params,
+        headers={"Accept-Encoding": codificacao, "If-None-Match": r.headers["etag"]},
+    )
+    assert r.status_code == 304
+
+    r = catalogo.get("/events", params=params, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert len(bruto) * 5 < len(r.content)
+
+
+def test_small_responses_are_not_compressed(catalogo):
+    r = catalogo.get(
+        "/events", params={"limit": 1, "fields": "nome"}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in r.headers
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert not r.headers["etag"].startswith("W/")
+
+
+def test_streamed_export_is_compressed_per_chunk(catalogo):
+    with catalogo.stream("GET", "/events/export", headers={"Accept-Encoding": "gzip"}) as r:
+        assert r.headers["content-encoding"] == "gzip"
+        assert "content-length" not in r.headers
+        linhas = [json.loads(linha) for linha in r.iter_lines()]
+    assert [e["nome"] for e in linhas] == [f"Evento {i}" for i in range(30)]
+
+
+def test_fields_project_the_select(catalogo, app_engine):
+    executados = []
+
+    def guardar(conn, cursor, statement, parameters, context, executemany):
+        executados.append(statement)
+
+    event.listen(app_engine, "before_cursor_execute", guardar)
+    try:
+        body = catalogo.get(
+            "/events", params={"fields": "nome,local", "limit": 2, "count": "none"}
+        ).json()
+        pagina = catalogo.get(
+            "/events", params={"fields": "nome", "cursor": body["nextCursor"], "limit": 2}
+        ).json()
+        detalhe = catalogo.get("/events/5", params={"fields": "data_inicio"}).json()
+    finally:
+        event.remove(app_engine, "before_cursor_execute", guardar)
+
+    assert body["data"] == [
+        {"id": 1, "nome": "Evento 0", "local": "Porto"},
+        {"id": 2, "nome": "Evento 1", "local": "Porto"},
+    ]
+    assert pagina["data"] == [{"id": 3, "nome": "Evento 2"}, {"id": 4, "nome": "Evento 3"}]
+    assert detalhe == {"id": 5, "data_inicio": "2030-01-01T10:00:00"}
+    consultas_eventos = [s for s in executados if "FROM eventos" in s]
+    assert consultas_eventos
+    assert not any("descricao" in s for s in consultas_eventos)
+
+
+def test_fields_on_cached_detail_and_search(catalogo):
+    completo = catalogo.get("/events/1").json()
+    assert "descricao" in completo
+    # Segunda leitura vem da cache, projetada
+    assert catalogo.get("/events/1", params={"fields": "nome,preco"}).json() == {
+        "id": 1,
+        "nome": "Evento 0",
+        "preco": 5.0,
+    }
+
+    r = catalogo.get("/events/search", params={"q": "Evento", "fields": "nome", "limit": 1})
+    assert r.json()["data"][0].keys() == {"id", "nome"}
+    r = catalogo.get("/events/upcoming", params={"fields": "tipo"})
+    assert r.status_code == 200
+
+    r = catalogo.get("/events", params={"fields": "nome,senha"})
+    assert r.status_code == 400
+    assert "senha" in r.json()["detail"]
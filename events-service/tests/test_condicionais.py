@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import event
+
+from .conftest import ESTUDANTE, ORGANIZADOR, evento_payload
+
+
+@pytest.fixture
+def statements(app_engine):
+    executados = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        executados.append(statement)
+
+    event.listen(app_engine, "before_cursor_execute", contar)
+    yield executados
+    event.remove(app_engine, "before_cursor_execute", contar)
+
+
+@pytest.fixture
+def sem_cache(monkeypatch):
+    from app import main as app_main
+    from app.cache import EventCache
+
+    monkeypatch.setattr(app_main, "cache", EventCache(None))
+
+
+def test_event_detail_validators(db_client):
+    db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+
+    r = db_client.get("/events/1")
+    etag, modificado = r.headers["etag"], r.headers["last-modified"]
+    assert etag == '"1.1"'
+    assert modificado.endswith(" GMT")
+    assert r.headers["cache-control"] == "public, max-age=0, must-revalidate"
+
+    # A segunda leitura vem da cache, com os mesmos validadores
+    for headers in ({"If-None-Match": etag}, {"If-None-Match": f'"x", W/{etag}'}):
+        r = db_client.get("/events/1", headers=headers)
+        assert r.status_code == 304
+        assert r.content == b""
+        assert r.headers["etag"] == etag
+    assert db_client.get("/events/1", headers={"If-None-Match": '"1.0"'}).status_code == 200
+    assert db_client.get("/events/1", headers={"If-Modified-Since": modificado}).status_code == 304
+
+    # Duas edições no mesmo segundo mudam o ETag; inscrições não mudam o evento
+    db_client.post("/events/1/inscrever", headers=ESTUDANTE)
+    assert db_client.get("/events/1", headers={"If-None-Match": etag}).status_code == 304
+    db_client.patch("/events/1", json={"nome": "Outro"}, headers=ORGANIZADOR)
+    db_client.patch("/events/1", json={"nome": "Outro ainda"}, headers=ORGANIZADOR)
+    r = db_client.get("/events/1", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] == '"1.3"'
+    assert r.json()["nome"] == "Outro ainda"
+
+    assert db_client.get("/events/9", headers={"If-None-Match": etag}).status_code == 404
+
+
+def test_event_304_reads_only_the_validators(db_client, sem_cache, statements):
+    db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    etag = db_client.get("/events/1").headers["etag"]
+
+    statements.clear()
+    r = db_client.get("/events/1", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert len(statements) == 1
+    assert "descricao" not in statements[0]
+
+
+def test_event_list_validators(db_client):
+    db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    r = db_client.get("/events", params={"tipo": "cultural"})
+    etag = r.headers["etag"]
+    assert "last-modified" in r.headers
+
+    for params in ({"tipo": "cultural"}, {"limit": 1}):
+        r = db_client.get("/events", params=params, headers={"If-None-Match": etag})
+        assert r.status_code == 304
+
+    # Qualquer escrita num evento muda o ETag de todas as páginas
+    db_client.patch("/events/1", json={"local": "Braga"}, headers=ORGANIZADOR)
+    r = db_client.get("/events", params={"tipo": "cultural"}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["data"][0]["local"] == "Braga"
+    novo = r.headers["etag"]
+    assert novo != etag
+
+    db_client.delete("/events/1", headers=ORGANIZADOR)
+    r = db_client.get("/events", params={"tipo": "cultural"}, headers={"If-None-Match": novo})
+    assert r.status_code == 200
+    assert r.json()["data"] == []
+
+
+def test_event_list_304_skips_the_page_query(db_client, sem_cache, statements):
+    for _ in range(3):
+        db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR)
+    r = db_client.get("/events", params={"limit": 2})
+    cursor, etag = r.json()["nextCursor"], r.headers["etag"]
+
+    statements.clear()
+    r = db_client.get("/events", params={"cursor": cursor}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert len(statements) == 1
+    assert "geracoes_listas" in statements[0]
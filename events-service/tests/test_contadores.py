@@ -0,0 +1,67 @@
+from sqlalchemy.orm import Session
+
+from .conftest import ADMIN, ORGANIZADOR, estudante, evento_payload
+
+
+def _totais(client, path: str, **params) -> dict:
+    return {
+        mode: client.get(path, params={**params, "count": mode}, headers=ORGANIZADOR).json()[
+            "total"
+        ]
+        for mode in ("exact", "estimated")
+    }
+
+
+def test_event_counters_follow_every_write(db_client):
+    ids = [
+        db_client.post("/events", json=evento_payload(tipo=tipo), headers=ORGANIZADOR).json()["id"]
+        for tipo in ("cultural", "cultural", "lazer")
+    ]
+    assert _totais(db_client, "/events") == {"exact": 3, "estimated": 3}
+
+    db_client.patch(
+        f"/events/{ids[0]}", json={"tipo": "lazer", "status": "cancelado"}, headers=ORGANIZADOR
+    )
+    db_client.delete(f"/events/{ids[2]}", headers=ORGANIZADOR)
+
+    assert _totais(db_client, "/events", tipo="cultural") == {"exact": 1, "estimated": 1}
+    assert _totais(db_client, "/events", tipo="lazer") == {"exact": 1, "estimated": 1}
+    assert _totais(db_client, "/events", status="cancelado") == {"exact": 1, "estimated": 1}
+
+    r = db_client.get("/events", params={"count": "none", "limit": 1})
+    body = r.json()
+    assert body["total"] is None and body["totalPages"] is None
+    assert body["nextCursor"] is not None
+
+
+def test_registration_counters_follow_every_write(db_client, db_engine):
+    from app import contadores
+
+    evento_id = db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR).json()["id"]
+    path = f"/events/{evento_id}/inscritos"
+    db_client.post(
+        f"/events/{evento_id}/inscrever", headers=estudante(1)
+    )
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [2, 3, 4]}, headers=ADMIN)
+    assert _totais(db_client, path) == {"exact": 4, "estimated": 4}
+
+    db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1, 2], "status": "cancelado"},
+        headers=ORGANIZADOR,
+    )
+    db_client.patch(
+        f"/events/{evento_id}/inscricoes/3", json={"status": "concluido"}, headers=ORGANIZADOR
+    )
+    db_client.delete(f"/events/{evento_id}/inscricoes/4", headers=ORGANIZADOR)
+    db_client.request(
+        "DELETE", f"/events/{evento_id}/inscricoes", json={"user_ids": [1]}, headers=ORGANIZADOR
+    )
+    assert _totais(db_client, path) == {"exact": 2, "estimated": 2}
+
+    with Session(db_engine) as db:
+        antes = contadores.total_inscricoes(db, evento_id)
+    with db_engine.begin() as conn:
+        contadores.reconstruir(conn)
+    with Session(db_engine) as db:
+        assert contadores.total_inscricoes(db, evento_id) == antes == 2
@@ -0,0 +1,89 @@
+from sqlalchemy.orm import Session
+
+from .conftest import ADMIN, ORGANIZADOR, auth_header, estudante, evento_payload
+
+OUTRO_ORGANIZADOR = auth_header({"id": 11, "tipo": "organizador"})
+
+
+def _stats(client, path: str, headers=ORGANIZADOR) -> dict:
+    r = client.get(path, headers=headers)
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_stats_follow_every_registration_write(db_client, db_engine):
+    from app import estatisticas
+
+    a = db_client.post("/events", json=evento_payload(preco=5), headers=ORGANIZADOR).json()["id"]
+    b = db_client.post("/events", json=evento_payload(preco=12.5), headers=ORGANIZADOR).json()["id"]
+    db_client.post(f"/events/{a}/inscrever", headers=estudante(1))
+    db_client.post(f"/events/{a}/inscricoes", json={"user_ids": [2, 3, 4]}, headers=ADMIN)
+    db_client.post(f"/events/{b}/inscricoes", json={"user_ids": [1, 2]}, headers=ADMIN)
+
+    db_client.patch(
+        f"/events/{a}/inscricoes",
+        json={"user_ids": [1, 2], "status": "cancelado"},
+        headers=ORGANIZADOR,
+    )
+    db_client.patch(f"/events/{a}/inscricoes/3", json={"status": "concluido"}, headers=ORGANIZADOR)
+    db_client.delete(f"/events/{a}/inscricoes/4", headers=ORGANIZADOR)
+    db_client.request(
+        "DELETE", f"/events/{a}/inscricoes", json={"user_ids": [1]}, headers=ORGANIZADOR
+    )
+
+    assert _stats(db_client, f"/events/{a}/stats") == {
+        "evento_id": a,
+        "por_status": {
+            "cancelado": {"total": 1, "valor_pago": "5.00"},
+            "concluido": {"total": 1, "valor_pago": "5.00"},
+        },
+        "total": 2,
+        "valor_pago": "5.00",
+    }
+    organizador = _stats(db_client, "/organizers/me/stats")
+    assert organizador == {
+        "organizador_id": 10,
+        "por_status": {
+            "cancelado": {"total": 1, "valor_pago": "5.00"},
+            "concluido": {"total": 1, "valor_pago": "5.00"},
+            "pendente": {"total": 2, "valor_pago": "25.00"},
+        },
+        "total": 4,
+        "valor_pago": "30.00",
+    }
+
+    # A reconstrução por conjuntos chega ao mesmo resultado
+    with db_engine.begin() as conn:
+        estatisticas.reconstruir(conn)
+    assert _stats(db_client, "/organizers/me/stats") == organizador
+
+
+def test_stats_permissions(db_client):
+    evento_id = db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR).json()["id"]
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [1]}, headers=ADMIN)
+
+    r = db_client.get(f"/events/{evento_id}/stats", headers=OUTRO_ORGANIZADOR)
+    assert r.status_code == 403
+    assert _stats(db_client, f"/events/{evento_id}/stats", ADMIN)["total"] == 1
+    assert db_client.get("/events/9/stats", headers=ORGANIZADOR).status_code == 404
+    assert db_client.get("/organizers/me/stats", headers=estudante(1)).status_code == 403
+
+    assert _stats(db_client, "/organizers/me/stats", OUTRO_ORGANIZADOR) == {
+        "organizador_id": 11,
+        "por_status": {},
+        "total": 0,
+        "valor_pago": "0.00",
+    }
+
+
+def test_deleted_event_leaves_the_stats(db_client, db_engine):
+    from app.models import EstatisticaInscricoes
+
+    evento_id = db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR).json()["id"]
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [1, 2]}, headers=ADMIN)
+    assert _stats(db_client, "/organizers/me/stats")["total"] == 2
+
+    db_client.delete(f"/events/{evento_id}", headers=ORGANIZADOR)
+    assert _stats(db_client, "/organizers/me/stats")["total"] == 0
+    with Session(db_engine) as db:
+        assert db.query(EstatisticaInscricoes).count() == 0
@@ -1,5 +1,4 @@
 import os
-from datetime import datetime, timezone
 
 import pytest
 from fastapi.testclient import TestClient
@@ -12,67 +11,50 @@ def _set_test_jwt_secret(monkeypatch):
 
 
 @pytest.fixture
-def app(monkeypatch):
-    # Patch DB engine + Base.create_all so tests don't require MySQL
+def app(monkeypatch, db_engine):
+    # Serve from the migrated SQLite file of `db_engine` (tests/conftest.py) so tests
+    # don't require MySQL; startup migrations are skipped since it is already migrated.
     from . import events_service_shim  # noqa: F401
 
-    from app import main as app_main
-
-    monkeypatch.setattr(app_main.Base.metadata, "create_all", lambda bind=None: None)
-
-    class _FakeSession:
-        def __init__(self):
-            self._data = {}
-            self._next_id = 1
-
-        def execute(self, *args, **kwargs):
-            raise NotImplementedError("execute is not used in patched endpoints")
+    from sqlalchemy.orm import sessionmaker
 
-        def get(self, model, id):
-            return self._data.get(int(id))
-
-        def add(self, obj):
-            if getattr(obj, "id", None) is None:
-                obj.id = self._next_id
-                self._next_id += 1
-            now = datetime.now(timezone.utc)
-            obj.created_at = getattr(obj, "created_at", now)
-            obj.updated_at = now
-            self._data[int(obj.id)] = obj
-
-        def commit(self):
-            return None
+    from app import main as app_main
 
-        def refresh(self, obj):
-            return None
+    monkeypatch.setattr(app_main, "upgrade", lambda conn: 0)
 
-        def delete(self, obj):
-            self._data.pop(int(obj.id), None)
+    # Fresh read cache per test (every test database restarts ids at 1)
+    from app.cache import EventCache, MemoryCache
 
-        def close(self):
-            return None
+    monkeypatch.setattr(app_main, "cache", EventCache(MemoryCache()))
 
-    fake_db = _FakeSession()
+    test_session = sessionmaker(bind=db_engine, autoflush=False)
 
-    def _fake_get_db():
-        yield fake_db
+    def _test_get_db():
+        db = test_session()
+        try:
+            yield db
+        finally:
+            db.close()
 
     app = app_main.create_app()
 
-    # Patch endpoints to avoid SQLAlchemy querying
-    # We'll monkeypatch router functions directly for list endpoint.
-    # For create/update/delete/get-by-id we rely on fake_db.get/add/delete.
+    # Replace dependencies (reads and writes share the test database)
+    app.dependency_overrides[app_main.get_db] = _test_get_db
+    app.dependency_overrides[app_main.get_read_db] = _test_get_db
 
-    # Replace dependency
-    app.dependency_overrides[app_main.get_db] = _fake_get_db
+    # Patch list endpoint implementation to return empty list consistently. The route has
+    # to be replaced: its request handler already captured the original endpoint.
+    app.router.routes = [
+        route
+        for route in app.router.routes
+        if not (
+            getattr(route, "path", None) == "/events" and "GET" in getattr(route, "methods", set())
+        )
+    ]
 
-    # Patch list endpoint implementation to return empty list consistently
-    for route in app.router.routes:
-        if getattr(route, "path", None) == "/events" and "GET" in getattr(route, "methods", set()):
-            async def _list_stub(*args, **kwargs):
-                return {"total": 0, "totalPages": 0, "currentPage": 1, "data": []}
-
-            route.endpoint = _list_stub
+    @app.get("/events")
+    async def _list_stub():
+        return {"total": 0, "totalPages": 0, "currentPage": 1, "data": []}
 
     return app
 
@@ -166,3 +148,32 @@ def test_update_requires_owner_or_admin(client):
     )
     assert r2.status_code == 200
     assert r2.json()["nome"] == "Novo"
+
+
+def test_get_event_is_cached_and_invalidated_on_update(app, client):
+    from app import main as app_main
+
+    token = _make_token({"id": 10, "tipo": "organizador"})
+    payload = {
+        "nome": "Evento 1",
+        "descricao": "Desc",
+        "data_inicio": "2030-01-01T10:00:00Z",
+        "local": "Porto",
+        "capacidade": 100,
+        "tipo": "cultural",
+    }
+    event_id = client.post(
+        "/events", json=payload, headers={"Authorization": f"Bearer {token}"}
+    ).json()["id"]
+
+    assert client.get(f"/events/{event_id}").json()["nome"] == "Evento 1"
+    assert client.get(f"/events/{event_id}").json()["nome"] == "Evento 1"
+    assert app_main.cache.stats()["hits"] == 1
+
+    r = client.patch(
+        f"/events/{event_id}",
+        json={"nome": "Novo"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+    assert client.get(f"/events/{event_id}").json()["nome"] == "Novo"
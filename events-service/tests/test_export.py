@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+from .conftest import ADMIN, ORGANIZADOR, auth_header, evento_payload
+
+
+def test_export_events_ndjson_and_csv(db_client):
+    for i in range(3):
+        db_client.post(
+            "/events",
+            json=evento_payload(nome=f"Evento {i}", data_inicio=f"2030-01-0{3 - i}T10:00:00"),
+            headers=ORGANIZADOR,
+        )
+
+    r = db_client.get("/events/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    linhas = [json.loads(line) for line in r.text.splitlines()]
+    assert [e["nome"] for e in linhas] == ["Evento 2", "Evento 1", "Evento 0"]
+    assert linhas[0]["data_inicio"] == "2030-01-01T10:00:00"
+
+    r = db_client.get("/events/export", params={"format": "csv", "tipo": "lazer"})
+    rows = list(csv.reader(io.StringIO(r.text)))
+    assert rows[0][:2] == ["id", "nome"]
+    assert len(rows) == 1
+
+    assert db_client.get("/events/export", params={"format": "xml"}).status_code == 422
+
+
+def test_export_registrations_requires_event_organizer(db_client):
+    evento_id = db_client.post("/events", json=evento_payload(), headers=ORGANIZADOR).json()["id"]
+    db_client.post(f"/events/{evento_id}/inscricoes", json={"user_ids": [1, 2, 3]}, headers=ADMIN)
+
+    r = db_client.get(
+        f"/events/{evento_id}/inscritos/export",
+        headers=auth_header({"id": 11, "tipo": "organizador"}),
+    )
+    assert r.status_code == 403
+
+    r = db_client.get(
+        f"/events/{evento_id}/inscritos/export", params={"format": "csv"}, headers=ORGANIZADOR
+    )
+    rows = list(csv.reader(io.StringIO(r.text)))
+    assert rows[0] == ["evento_id", "user_id", "status", "valor_pago", "created_at", "updated_at"]
+    assert sorted(int(row[1]) for row in rows[1:]) == [1, 2, 3]
+    assert rows[1][3] == "5.00"
@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import event
+
+from .conftest import ADMIN, ORGANIZADOR, auth_header, evento_payload
+
+OUTRO = auth_header({"id": 11, "tipo": "organizador"})
+
+QUERY_COMPLETA = """
+query ($limit: Int!) {
+  eventos(limit: $limit) {
+    data {
+      id
+      nome
+      lugaresDisponiveis
+      totalInscritos
+      inscricoes(limit: 5) { userId status evento { id nome } }
+    }
+    nextCursor
+  }
+}
+"""
+
+
+def _graphql(client, query: str, headers=None, **variables) -> dict:
+    r = client.post("/graphql", json={"query": query, "variables": variables}, headers=headers)
+    assert r.status_code == 200
+    return r.json()
+
+
+@pytest.fixture
+def statements(app_engine):
+    """Lista dos statements SQL executados durante o teste."""
+    executados = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        executados.append(statement)
+
+    event.listen(app_engine, "before_cursor_execute", contar)
+    yield executados
+    event.remove(app_engine, "before_cursor_execute", contar)
+
+
+def _criar_eventos(client, n: int) -> list[int]:
+    ids = []
+    for i in range(n):
+        payload = evento_payload(nome=f"Evento {i}", data_inicio=f"2030-01-01T{i % 24:02d}:00:00")
+        ids.append(client.post("/events", json=payload, headers=ORGANIZADOR).json()["id"])
+        client.post(f"/events/{ids[-1]}/inscricoes", json={"user_ids": [1, 2, 3]}, headers=ADMIN)
+    return ids
+
+
+@pytest.mark.parametrize("n", [5, 50])
+def test_nested_fields_are_batched(db_client, statements, n):
+    _criar_eventos(db_client, n)
+
+    statements.clear()
+    body = _graphql(db_client, QUERY_COMPLETA, headers=ORGANIZADOR, limit=n)
+
+    assert "errors" not in body
+    data = body["data"]["eventos"]["data"]
+    assert len(data) == n
+    for evento in data:
+        assert evento["totalInscritos"] == 3
+        assert evento["lugaresDisponiveis"] == 97
+        assert [i["userId"] for i in evento["inscricoes"]] == [3, 2, 1]
+        assert {i["evento"]["id"] for i in evento["inscricoes"]} == {evento["id"]}
+    # Página, totais e inscrições: o mesmo número de statements para 5 ou 50 eventos
+    assert len(statements) == 3
+
+
+def test_inscricoes_require_the_organizer(db_client):
+    _criar_eventos(db_client, 2)
+    query = "{ evento(id: 1) { nome inscricoes { userId } } }"
+
+    for headers in (None, OUTRO):
+        body = _graphql(db_client, query, headers=headers)
+        assert body["data"]["evento"] == {"nome": "Evento 0", "inscricoes": None}
+        assert body["errors"][0]["path"] == ["evento", "inscricoes"]
+
+    body = _graphql(db_client, query, headers=ADMIN)
+    assert "errors" not in body
+    assert len(body["data"]["evento"]["inscricoes"]) == 3
+
+
+def test_eventos_pages_and_filters(db_client):
+    ids = _criar_eventos(db_client, 7)
+    db_client.patch(f"/events/{ids[0]}", json={"tipo": "lazer"}, headers=ORGANIZADOR)
+    query = """
+    query ($cursor: String) {
+      eventos(limit: 3, cursor: $cursor, tipo: "cultural") { data { id } nextCursor }
+    }
+    """
+
+    vistos, cursor = [], None
+    while True:
+        pagina = _graphql(db_client, query, cursor=cursor)["data"]["eventos"]
+        vistos += [e["id"] for e in pagina["data"]]
+        cursor = pagina["nextCursor"]
+        if not cursor:
+            break
+    assert vistos == ids[1:]
+
+    janela = '{ eventos(from: "2030-01-01T02:00:00", to: "2030-01-01T03:30:00") { data { id } } }'
+    assert _graphql(db_client, janela)["data"]["eventos"]["data"] == [{"id": 3}, {"id": 4}]
+
+    body = _graphql(db_client, "{ eventos(limit: 1000) { data { id } } }")
+    assert body["data"] is None and "limit" in body["errors"][0]["message"]
+    body = _graphql(db_client, '{ eventos(cursor: "???") { data { id } } }')
+    assert body["data"] is None and body["errors"]
+
+
+def test_depth_and_complexity_limits(db_client, statements):
+    profunda = (
+        "{ evento(id: 1) { inscricoes { evento { inscricoes { evento { inscricoes"
+        " { evento { id } } } } } } } }"
+    )
+    body = _graphql(db_client, profunda, headers=ADMIN)
+    assert "depth" in body["errors"][0]["message"]
+
+    cara = "{ eventos(limit: 100) { data { inscricoes(limit: 100) { userId status } } } }"
+    body = _graphql(db_client, cara, headers=ADMIN)
+    assert "complexa" in body["errors"][0]["message"]
+
+    # Limites em variáveis contam como o máximo
+    variavel = """
+    query ($n: Int!) { eventos(limit: $n) { data { inscricoes(limit: $n) { userId } } } }
+    """
+    body = _graphql(db_client, variavel, headers=ADMIN, n=1)
+    assert "complexa" in body["errors"][0]["message"]
+
+    # E também os literais fora de [1, 100]: um limite negativo não anula a subárvore
+    for limite in (-1, 0, 1000):
+        fora = (
+            f"{{ eventos(limit: {limite}) {{ data "
+            "{ inscricoes(limit: 100) { userId } } } }"
+        )
+        body = _graphql(db_client, fora, headers=ADMIN)
+        assert "complexa" in body["errors"][0]["message"]
+
+    # Rejeitadas na validação, antes de qualquer acesso à base de dados
+    assert statements == []
@@ -0,0 +1,137 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+
+from . import events_service_shim  # noqa: F401
+
+
+def _pooled_engine(tmp_path, monkeypatch, **overrides):
+    from app import db as app_db
+    from app.config import settings
+
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    eng = create_engine(url, **app_db._engine_kwargs(url))
+    app_db._configure_pool(eng)
+    return eng
+
+
+def test_health_endpoints(db_client):
+    assert db_client.get("/health/live").json() == {"status": "ok"}
+
+    r = db_client.get("/health/ready")
+    assert r.status_code == 200
+    assert r.json()["status"] == "ready"
+    assert r.json()["database"] == "ok"
+
+
+def test_readiness_fails_when_pool_is_saturated(tmp_path, monkeypatch):
+    from app.health import readiness
+
+    eng = _pooled_engine(tmp_path, monkeypatch, db_pool_size=2, db_max_overflow=0)
+    ready, detail = asyncio.run(readiness(eng))
+    assert ready and detail["pool"]["checked_out"] == 0
+
+    conns = [eng.connect(), eng.connect()]
+    ready, detail = asyncio.run(readiness(eng))
+    assert not ready
+    assert detail["pool"]["usage"] == 1.0
+    assert detail["database"] == "skipped"
+
+    for conn in conns:
+        conn.close()
+    assert asyncio.run(readiness(eng))[0]
+    eng.dispose()
+
+
+def test_pool_status_uses_the_engine_pool_limits(tmp_path, monkeypatch):
+    from sqlalchemy.pool import QueuePool
+
+    from app import db as app_db
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "db_max_overflow", 20)
+    url = f"sqlite:///{tmp_path / 'outro.db'}"
+    eng = create_engine(url, poolclass=QueuePool, pool_size=5, max_overflow=0)
+    with eng.connect():
+        assert app_db.pool_status(eng) == {
+            "size": 5, "checked_out": 1, "overflow": 0, "capacity": 5, "usage": 0.2
+        }
+    eng.dispose()
+
+
+def test_readiness_fails_when_the_ping_times_out(tmp_path, monkeypatch):
+    from app import db as app_db
+    from app.health import readiness
+
+    async def sem_resposta(eng):
+        await asyncio.sleep(1)
+
+    eng = _pooled_engine(tmp_path, monkeypatch, health_check_timeout_seconds=0.01)
+    monkeypatch.setattr(app_db, "ping_database", sem_resposta)
+    ready, detail = asyncio.run(readiness(eng))
+    assert not ready
+    assert (detail["database"], detail["reason"]) == ("error", "TimeoutError")
+    eng.dispose()
+
+
+def test_idle_pre_ping_replaces_dead_connections(tmp_path, monkeypatch):
+    eng = _pooled_engine(
+        tmp_path,
+        monkeypatch,
+        db_pool_size=1,
+        db_max_overflow=0,
+        db_pool_pre_ping="idle",
+        db_pool_pre_ping_idle_seconds=0,
+    )
+    with eng.connect() as conn:
+        raw = conn.connection.dbapi_connection
+        conn.execute(text("SELECT 1"))
+    # O servidor fechou a ligação enquanto estava parada no pool
+    raw.close()
+
+    with eng.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert conn.connection.dbapi_connection is not raw
+    eng.dispose()
+
+
+def test_app_serves_liveness_while_database_is_unreachable(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app import db as app_db
+    from app import main as app_main
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "database_url", "mysql+pymysql://u:p@127.0.0.1:1/events")
+    monkeypatch.setattr(settings, "db_connect_max_backoff_seconds", 0.05)
+    try:
+        with TestClient(app_main.create_app()) as client:
+            assert client.get("/health/live").status_code == 200
+            r = client.get("/health/ready")
+            assert r.status_code == 503
+            assert r.json()["database"] == "starting"
+    finally:
+        app_db.reset_engine()
+
+
+def test_startup_migrates_in_background_then_becomes_ready(tmp_path, monkeypatch):
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from app import db as app_db
+    from app import main as app_main
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'startup.db'}")
+    try:
+        with TestClient(app_main.create_app()) as client:
+            deadline = time.monotonic() + 10
+            while client.get("/health/ready").status_code != 200:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+            assert client.get("/events").json()["data"] == []
+    finally:
+        app_db.reset_engine()
@@ -0,0 +1,225 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from . import events_service_shim  # noqa: F401
+from .conftest import ADMIN, evento_payload
+
+BASE = datetime(2030, 1, 1)
+
+
+def test_nivel_duracao():
+    from app.intervalos import MAX_NIVEL, nivel_duracao
+
+    assert nivel_duracao(BASE, None) == 0
+    assert nivel_duracao(BASE, BASE) == 0
+    assert nivel_duracao(BASE, BASE + timedelta(seconds=30)) == 1
+    assert nivel_duracao(BASE, BASE + timedelta(minutes=2)) == 2
+    assert nivel_duracao(BASE, BASE + timedelta(minutes=3)) == 2
+    assert nivel_duracao(BASE, BASE + timedelta(hours=2)) == 7
+    assert nivel_duracao(BASE, BASE + timedelta(days=365 * 10)) == MAX_NIVEL
+
+
+@pytest.fixture
+def aleatorios(db_engine, db_client):
+    """300 eventos com durações de todos os níveis; devolve {id: (inicio, fim)}."""
+    from app.intervalos import nivel_duracao
+    from app.models import Evento
+
+    rng = random.Random(17)
+    intervalos = {}
+    rows = []
+    for i in range(1, 301):
+        inicio = BASE + timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+        minutos = rng.choice((0, 0, rng.randint(1, 600), rng.randint(1, 20_000), 10**7))
+        fim = inicio + timedelta(minutes=minutos) if minutos else None
+        intervalos[i] = (inicio, fim or inicio)
+        rows.append(
+            {
+                "id": i,
+                "nome": f"Evento {i}",
+                "descricao": "Desc",
+                "data_inicio": inicio,
+                "data_fim": fim,
+                "duracao_nivel": nivel_duracao(inicio, fim),
+                "local": "Porto",
+                "capacidade": 10,
+                "preco": 0,
+                "tipo": ("cultural", "lazer")[i % 2],
+                "organizador_id": 1,
+                "status": "agendado",
+            }
+        )
+    with db_engine.begin() as conn:
+        conn.execute(insert(Evento.__table__), rows)
+    return intervalos
+
+
+def _esperados(intervalos, desde, ate, ids=None):
+    """Sobreposição calculada à mão, na ordem (data_inicio, id) da listagem."""
+    return [
+        i
+        for i, (inicio, fim) in sorted(intervalos.items(), key=lambda kv: (kv[1][0], kv[0]))
+        if (desde is None or fim >= desde) and (ate is None or inicio <= ate)
+        if ids is None or i in ids
+    ]
+
+
+def _params(desde, ate) -> dict:
+    params = {}
+    if desde is not None:
+        params["from"] = desde.isoformat()
+    if ate is not None:
+        params["to"] = ate.isoformat()
+    return params
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_window_matches_overlap(db_client, aleatorios, seed):
+    rng = random.Random(seed)
+    desde = BASE + timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+    ate = desde + timedelta(minutes=rng.choice((0, 90, 60 * 24, 60 * 24 * 14)))
+    if seed == 0:
+        ate = None
+    if seed == 1:
+        desde = None
+
+    params = {**_params(desde, ate), "limit": 100, "count": "exact"}
+    vistos = []
+    while True:
+        body = db_client.get("/events", params=params).json()
+        vistos += [e["id"] for e in body["data"]]
+        if not body["nextCursor"]:
+            break
+        params["cursor"] = body["nextCursor"]
+
+    esperados = _esperados(aleatorios, desde, ate)
+    assert vistos == esperados
+    assert body["total"] == len(esperados)
+
+
+def test_window_offset_pages_and_filters(db_client, aleatorios):
+    desde, ate = BASE + timedelta(days=10), BASE + timedelta(days=12)
+    lazer = {i for i in aleatorios if i % 2 == 1}
+    esperados = _esperados(aleatorios, desde, ate, lazer)
+
+    vistos = []
+    for page in range(1, 20):
+        params = {**_params(desde, ate), "tipo": "lazer", "page": page, "limit": 7}
+        body = db_client.get("/events", params=params).json()
+        vistos += [e["id"] for e in body["data"]]
+        if not body["nextCursor"]:
+            break
+    assert vistos == esperados
+    # Os contadores não distinguem datas
+    assert body["total"] is None
+
+
+def test_window_treats_missing_end_as_point(db_client):
+    payloads = [
+        evento_payload(nome="pontual", data_inicio="2030-01-01T10:00:00"),
+        evento_payload(
+            nome="manhã", data_inicio="2030-01-01T09:00:00", data_fim="2030-01-01T12:00:00"
+        ),
+        evento_payload(
+            nome="festival", data_inicio="2029-12-28T00:00:00", data_fim="2030-01-03T00:00:00"
+        ),
+    ]
+    for payload in payloads:
+        assert db_client.post("/events", json=payload, headers=ADMIN).status_code == 201
+
+    def nomes(desde, ate):
+        params = {"from": desde, "to": ate}
+        return [e["nome"] for e in db_client.get("/events", params=params).json()["data"]]
+
+    assert nomes("2030-01-01T10:30:00", "2030-01-01T11:00:00") == ["festival", "manhã"]
+    assert nomes("2030-01-01T10:00:00", "2030-01-01T10:00:00") == [
+        "festival",
+        "manhã",
+        "pontual",
+    ]
+    assert nomes("2030-01-02T00:00:00", "2030-01-05T00:00:00") == ["festival"]
+
+    # Encurtar o festival muda o seu nível e tira-o da janela
+    db_client.patch("/events/3", json={"data_fim": "2029-12-29T00:00:00"}, headers=ADMIN)
+    assert nomes("2030-01-02T00:00:00", "2030-01-05T00:00:00") == []
+
+    r = db_client.get("/events", params={"from": "2030-01-02T00:00:00", "to": "2030-01-01"})
+    assert r.status_code == 400
+
+
+def test_upcoming_lists_events_not_yet_finished(db_client):
+    from app.datas import agora as relogio
+
+    agora = relogio().replace(microsecond=0)
+    payloads = [
+        evento_payload(nome="passado", data_inicio=(agora - timedelta(days=2)).isoformat()),
+        evento_payload(
+            nome="a decorrer",
+            data_inicio=(agora - timedelta(days=1)).isoformat(),
+            data_fim=(agora + timedelta(days=1)).isoformat(),
+        ),
+        evento_payload(nome="amanhã", data_inicio=(agora + timedelta(days=1)).isoformat()),
+        evento_payload(nome="cancelado", data_inicio=(agora + timedelta(days=2)).isoformat()),
+        evento_payload(nome="depois", data_inicio=(agora + timedelta(days=3)).isoformat()),
+    ]
+    for payload in payloads:
+        assert db_client.post("/events", json=payload, headers=ADMIN).status_code == 201
+    db_client.patch("/events/4", json={"status": "cancelado"}, headers=ADMIN)
+
+    body = db_client.get("/events/upcoming", params={"limit": 2}).json()
+    assert [e["nome"] for e in body["data"]] == ["a decorrer", "amanhã"]
+    body = db_client.get(
+        "/events/upcoming", params={"limit": 2, "cursor": body["nextCursor"]}
+    ).json()
+    assert [e["nome"] for e in body["data"]] == ["depois"]
+    assert body["nextCursor"] is None
+
+
+def test_mixed_timezones_are_normalized_to_utc(db_client):
+    r = db_client.post(
+        "/events",
+        json=evento_payload(data_inicio="2030-01-01T10:00:00Z", data_fim="2030-01-01T12:00:00"),
+        headers=ADMIN,
+    )
+    assert r.status_code == 201
+    assert (r.json()["data_inicio"], r.json()["data_fim"]) == (
+        "2030-01-01T10:00:00",
+        "2030-01-01T12:00:00",
+    )
+    r = db_client.post(
+        "/events",
+        json=evento_payload(data_inicio="2030-01-01T10:00:00+01:00", data_fim="2030-01-01T10:30"),
+        headers=ADMIN,
+    )
+    assert r.status_code == 201
+    assert r.json()["data_inicio"] == "2030-01-01T09:00:00"
+    sem_fuso = db_client.post("/events", json=evento_payload(), headers=ADMIN).json()["id"]
+
+    # Um evento guardado sem fuso recebe uma data_fim com fuso
+    r = db_client.patch(
+        f"/events/{sem_fuso}", json={"data_fim": "2030-01-01T13:00:00+02:00"}, headers=ADMIN
+    )
+    assert r.status_code == 200
+    assert r.json()["data_fim"] == "2030-01-01T11:00:00"
+
+    janela = {"from": "2030-01-01T10:45:00Z", "to": "2030-01-01T11:00:00"}
+    r = db_client.get("/events", params=janela)
+    assert r.status_code == 200
+    assert [e["id"] for e in r.json()["data"]] == [1, sem_fuso]
+    r = db_client.get("/events/search", params={"q": "Evento", **janela})
+    assert r.status_code == 200
+    assert sorted(e["id"] for e in r.json()["data"]) == [1, sem_fuso]
+    # 10:30+02:00 é 08:30 UTC, antes de 09:00
+    r = db_client.get(
+        "/events", params={"from": "2030-01-01T09:00:00", "to": "2030-01-01T10:30:00+02:00"}
+    )
+    assert r.status_code == 400
+
+    query = (
+        '{ eventos(from: "2030-01-01T12:45:00+02:00", to: "2030-01-01T11:00:00") { data { id } } }'
+    )
+    r = db_client.post("/graphql", json={"query": query})
+    assert r.json()["data"]["eventos"]["data"] == [{"id": 1}, {"id": sem_fuso}]
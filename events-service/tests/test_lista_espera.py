@@ -0,0 +1,173 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .conftest import ADMIN, ORGANIZADOR, estudante, evento_payload
+
+
+def _entrar(client, evento_id: int, user_id: int):
+    return client.post(f"/events/{evento_id}/lista-espera", headers=estudante(user_id))
+
+
+def _posicao(client, evento_id: int, user_id: int):
+    r = client.get(f"/events/{evento_id}/lista-espera/me", headers=estudante(user_id))
+    return r.json()["posicao"] if r.status_code == 200 else r.status_code
+
+
+def _inscritos(client, evento_id: int) -> dict[int, str]:
+    r = client.get(f"/events/{evento_id}/inscritos", params={"limit": 100}, headers=ORGANIZADOR)
+    return {i["user_id"]: i["status"] for i in r.json()["data"]}
+
+
+def test_waitlist_promotes_in_order_when_seats_free_up(db_client):
+    evento = db_client.post("/events", json=evento_payload(capacidade=2), headers=ORGANIZADOR)
+    evento_id = evento.json()["id"]
+
+    # Com lugares livres inscreve-se diretamente
+    assert _entrar(db_client, evento_id, 1).status_code == 409
+    for user_id in (1, 2):
+        db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(user_id))
+    assert (
+        db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(3)).status_code == 409
+    )
+
+    for posicao, user_id in enumerate((3, 4, 5, 6), start=1):
+        r = _entrar(db_client, evento_id, user_id)
+        assert r.status_code == 201
+        assert r.json() == {
+            "evento_id": evento_id,
+            "user_id": user_id,
+            "posicao": posicao,
+            "em_espera": posicao,
+        }
+    # Repetir o pedido não muda a senha
+    r = _entrar(db_client, evento_id, 4)
+    assert r.status_code == 200 and r.json()["posicao"] == 2
+    assert _entrar(db_client, evento_id, 1).status_code == 400
+
+    # Sair do meio da fila adianta quem está atrás
+    r = db_client.delete(f"/events/{evento_id}/lista-espera/me", headers=estudante(4))
+    assert r.status_code == 200
+    assert [_posicao(db_client, evento_id, u) for u in (3, 4, 5, 6)] == [1, 404, 2, 3]
+
+    db_client.patch(
+        f"/events/{evento_id}/inscricoes/1", json={"status": "cancelado"}, headers=ORGANIZADOR
+    )
+    assert _inscritos(db_client, evento_id) == {1: "cancelado", 2: "pendente", 3: "pendente"}
+    db_client.delete(f"/events/{evento_id}/inscricoes/2", headers=ORGANIZADOR)
+    assert _inscritos(db_client, evento_id) == {1: "cancelado", 3: "pendente", 5: "pendente"}
+    assert [_posicao(db_client, evento_id, u) for u in (3, 5, 6)] == [404, 404, 1]
+
+    # Promoções contam nas estatísticas e no feed de alterações, sem ultrapassar a capacidade
+    stats = db_client.get(f"/events/{evento_id}/stats", headers=ORGANIZADOR).json()
+    assert stats["por_status"]["pendente"]["total"] == 2
+    changes = db_client.get("/events/changes", params={"since": 0, "wait": 0}, headers=ADMIN)
+    criadas = [
+        a["user_id"]
+        for a in changes.json()["changes"]
+        if (a["entidade"], a["acao"]) == ("inscricao", "criado")
+    ]
+    assert criadas == [1, 2, 3, 5]
+    assert (
+        db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(7)).status_code == 409
+    )
+
+
+def test_capacity_increase_and_batch_cancel_promote(db_client):
+    evento = db_client.post("/events", json=evento_payload(capacidade=1), headers=ORGANIZADOR)
+    evento_id = evento.json()["id"]
+    db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+    for user_id in range(2, 8):
+        _entrar(db_client, evento_id, user_id)
+
+    db_client.patch(f"/events/{evento_id}", json={"capacidade": 3}, headers=ORGANIZADOR)
+    assert set(_inscritos(db_client, evento_id)) == {1, 2, 3}
+
+    db_client.patch(
+        f"/events/{evento_id}/inscricoes",
+        json={"user_ids": [1, 2], "status": "cancelado"},
+        headers=ORGANIZADOR,
+    )
+    db_client.request(
+        "DELETE", f"/events/{evento_id}/inscricoes", json={"user_ids": [3]}, headers=ORGANIZADOR
+    )
+    inscritos = _inscritos(db_client, evento_id)
+    assert [u for u, s in sorted(inscritos.items()) if s == "pendente"] == [4, 5, 6]
+    assert _posicao(db_client, evento_id, 7) == 1
+
+    # Apagar o evento apaga a fila
+    db_client.delete(f"/events/{evento_id}", headers=ORGANIZADOR)
+    assert _posicao(db_client, evento_id, 7) == 404
+
+
+def test_seat_freed_while_joining_is_not_left_empty(db_client, monkeypatch):
+    from app import lista_espera
+
+    evento = db_client.post("/events", json=evento_payload(capacidade=1), headers=ORGANIZADOR)
+    evento_id = evento.json()["id"]
+    db_client.post(f"/events/{evento_id}/inscrever", headers=estudante(1))
+
+    dentro, continuar = threading.Event(), threading.Event()
+    entrar = lista_espera.entrar
+
+    def entrar_devagar(*args):
+        dentro.set()
+        continuar.wait(10)
+        return entrar(*args)
+
+    monkeypatch.setattr(lista_espera, "entrar", entrar_devagar)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # O estudante 2 viu o evento esgotado; o cancelamento chega antes de entrar na fila
+        espera = pool.submit(_entrar, db_client, evento_id, 2)
+        assert dentro.wait(10)
+        cancelar = pool.submit(
+            db_client.patch,
+            f"/events/{evento_id}/inscricoes/1",
+            json={"status": "cancelado"},
+            headers=ORGANIZADOR,
+        )
+        # Com bloqueios de linha o cancelamento espera pelo commit da entrada
+        wait([cancelar], timeout=0.5)
+        continuar.set()
+        assert cancelar.result().status_code == 200
+        r = espera.result()
+
+    assert r.status_code == 201
+    assert r.json()["posicao"] == 0 and r.json()["em_espera"] == 0
+    assert _inscritos(db_client, evento_id) == {1: "cancelado", 2: "pendente"}
+    assert _posicao(db_client, evento_id, 2) == 404
+
+
+def test_positions_match_a_full_count(db_client, db_engine):
+    from app import lista_espera
+    from app.models import EsperaInscricao, NoFilaEspera
+
+    evento = db_client.post("/events", json=evento_payload(capacidade=1), headers=ORGANIZADOR)
+    evento_id = evento.json()["id"]
+    rng = random.Random(7)
+    with Session(db_engine) as db:
+        for user_id in range(1, 301):
+            lista_espera.entrar(db, evento_id, user_id)
+            if rng.random() < 0.3:
+                lista_espera.sair(db, evento_id, rng.randint(1, user_id))
+        db.commit()
+
+        senhas = sorted(
+            db.execute(select(EsperaInscricao.user_id, EsperaInscricao.senha)).all(),
+            key=lambda linha: linha.senha,
+        )
+        for esperada, linha in enumerate(senhas, start=1):
+            assert lista_espera.posicao(db, evento_id, linha.senha) == esperada
+        nos = set(db.execute(select(NoFilaEspera.no, NoFilaEspera.total)).all())
+
+    # A reconstrução a partir da fila dá a mesma árvore (sem os nós a zero)
+    with db_engine.begin() as conn:
+        lista_espera.reconstruir(conn)
+    with Session(db_engine) as db:
+        reconstruidos = set(db.execute(select(NoFilaEspera.no, NoFilaEspera.total)).all())
+        consulta = lista_espera.consultar(db, evento_id, senhas[-1].user_id)
+    assert reconstruidos == {(no, total) for no, total in nos if total}
+    assert consulta["posicao"] == consulta["em_espera"] == len(senhas)
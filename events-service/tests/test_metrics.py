@@ -0,0 +1,63 @@
+from . import events_service_shim  # noqa: F401
+from .conftest import ADMIN, evento_payload
+
+
+def test_histogram_renders_cumulative_buckets():
+    from app.metrics import Histogram
+
+    h = Histogram("latencia", "Ajuda.", ("route",), (0.1, 1.0))
+    h.observe(0.05, '/a"b')
+    h.observe(0.5, '/a"b')
+    h.observe(5.0, '/a"b')
+
+    lines = h.collect()
+    assert lines[:2] == ["# HELP latencia Ajuda.", "# TYPE latencia histogram"]
+    assert 'latencia_bucket{route="/a\\"b",le="0.1"} 1' in lines
+    assert 'latencia_bucket{route="/a\\"b",le="1.0"} 2' in lines
+    assert 'latencia_bucket{route="/a\\"b",le="+Inf"} 3' in lines
+    assert 'latencia_sum{route="/a\\"b"} 5.55' in lines
+    assert 'latencia_count{route="/a\\"b"} 3' in lines
+
+
+def test_metrics_endpoint_reports_route_latency_and_sql(db_client, app_engine):
+    from app import metrics
+
+    metrics.instrument_engine(app_engine)
+    metrics.reset()
+
+    created = db_client.post("/events", json=evento_payload(), headers=ADMIN)
+    assert created.status_code == 201
+    assert db_client.get(f"/events/{created.json()['id']}").status_code == 200
+    assert db_client.get("/events").status_code == 200
+    assert db_client.get("/nao-existe").status_code == 404
+
+    r = db_client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text.splitlines()
+
+    assert (
+        'http_request_duration_seconds_count{method="POST",route="/events",status="201"} 1' in body
+    )
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/events/{id}",status="200"} 1'
+        in body
+    )
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="<unmatched>",status="404"} 1'
+        in body
+    )
+    # A listagem faz pelo menos uma query (página) e fica registada na sua rota
+    assert 'db_statements_per_request_count{method="GET",route="/events"} 1' in body
+    sums = {
+        line.split(" ")[0]: float(line.split(" ")[1])
+        for line in body
+        if line.startswith(("db_statements_per_request_sum", "db_time_per_request_seconds_sum"))
+    }
+    assert sums['db_statements_per_request_sum{method="GET",route="/events"}'] >= 1
+    assert sums['db_time_per_request_seconds_sum{method="GET",route="/events"}'] > 0
+    assert sums['db_statements_per_request_sum{method="GET",route="<unmatched>"}'] == 0
+    assert any(
+        line.startswith('db_statement_duration_seconds_count{method="GET",route="/events"}')
+        for line in body
+    )
@@ -0,0 +1,156 @@
+"""Migrações e planos de execução das listagens.
+
+Corre sobre SQLite em memória; com `EVENTS_TEST_MYSQL_URL` definido repete a verificação
+dos planos com EXPLAIN no MySQL.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import and_, asc, create_engine, desc, inspect, or_, select, text
+from sqlalchemy.pool import StaticPool
+
+from . import events_service_shim  # noqa: F401
+
+
+@pytest.fixture
+def migrated_conn():
+    from app.migrations import upgrade
+
+    url = os.environ.get("EVENTS_TEST_MYSQL_URL")
+    if url:
+        eng = create_engine(url)
+    else:
+        eng = create_engine("sqlite://", poolclass=StaticPool)
+    with eng.connect() as conn:
+        upgrade(conn)
+        yield conn
+    eng.dispose()
+
+
+def _list_queries():
+    from datetime import datetime
+
+    from app.models import Evento, Inscricao
+
+    base = select(Evento).order_by(asc(Evento.data_inicio), asc(Evento.id)).limit(10)
+    after = or_(
+        Evento.data_inicio > datetime(2030, 1, 1),
+        and_(Evento.data_inicio == datetime(2030, 1, 1), Evento.id > 5),
+    )
+    return [
+        (base.where(Evento.tipo == "cultural", Evento.status == "agendado"),
+         "ix_eventos_tipo_status_data_inicio"),
+        (base.where(Evento.status == "agendado"), "ix_eventos_status_data_inicio"),
+        (base.where(after), "ix_eventos_data_inicio"),
+        (select(Inscricao).where(Inscricao.evento_id == 1)
+         .order_by(desc(Inscricao.created_at), desc(Inscricao.user_id)).limit(10),
+         "ix_inscricoes_evento_created_at"),
+        (select(Inscricao).where(Inscricao.user_id == 1), "ix_inscricoes_user_id"),
+    ]
+
+
+def _plan(conn, stmt) -> str:
+    sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return " ".join(row[-1] for row in rows)
+    rows = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return " ".join(f"{row['key']} {row['Extra']}" for row in rows)
+
+
+def test_upgrade_is_idempotent(migrated_conn):
+    from app.migrations import LATEST_VERSION, current_version, upgrade
+
+    assert current_version(migrated_conn) == LATEST_VERSION
+    assert upgrade(migrated_conn) == LATEST_VERSION
+    names = {ix["name"] for ix in inspect(migrated_conn).get_indexes("eventos")}
+    assert "ix_eventos_tipo_status_data_inicio" in names
+
+
+def test_migrations_converge_to_the_models(migrated_conn):
+    """As migrações congeladas produzem o esquema dos modelos atuais (falta uma migração?)."""
+    from app import models  # noqa: F401
+    from app.db import Base
+
+    # Índice FULLTEXT só no MySQL; no SQLite a pesquisa usa a tabela FTS5
+    so_mysql = set() if migrated_conn.dialect.name == "mysql" else {"ix_eventos_texto"}
+    schema = inspect(migrated_conn)
+    for table in Base.metadata.sorted_tables:
+        colunas = {c["name"]: c["nullable"] for c in schema.get_columns(table.name)}
+        assert colunas == {c.name: c.nullable for c in table.columns}, table.name
+        indices = {
+            ix["name"]: (tuple(ix["column_names"]), bool(ix["unique"]))
+            for ix in schema.get_indexes(table.name)
+        }
+        esperados = {
+            ix.name: (tuple(c.name for c in ix.columns), ix.unique)
+            for ix in table.indexes
+            if ix.name not in so_mysql
+        }
+        assert indices == esperados, table.name
+
+
+def test_migration_lock_timeout_aborts(monkeypatch):
+    from app import migrations
+
+    class Resultado:
+        def scalar(self):
+            return 0
+
+    class LigacaoMySQL:
+        dialect = type("Dialeto", (), {"name": "mysql"})()
+
+        def __init__(self):
+            self.executados = []
+
+        def execute(self, stmt, *args):
+            self.executados.append(str(stmt))
+            return Resultado()
+
+        def rollback(self):
+            pass
+
+    monkeypatch.setattr(migrations, "current_version", lambda conn: 0)
+    conn = LigacaoMySQL()
+    with pytest.raises(RuntimeError):
+        migrations.upgrade(conn)
+    # Nada migrado nem libertado: o lock é de outro worker
+    assert conn.executados == ["SELECT GET_LOCK('events_schema_migrations', 60)"]
+
+
+@pytest.mark.parametrize("index", range(5))
+def test_list_queries_use_indexes(migrated_conn, index):
+    stmt, expected = _list_queries()[index]
+    plan = _plan(migrated_conn, stmt)
+    assert expected in plan
+    assert "filesort" not in plan and "TEMP B-TREE" not in plan
+
+
+def test_search_uses_fulltext_index(migrated_conn):
+    from app import search
+    from app.serialization import evento_out
+
+    stmt, relevancia = search.pesquisa(
+        migrated_conn.dialect.name, ["jazz", "porto"], evento_out.columns
+    )
+    plan = _plan(migrated_conn, search.pagina(stmt, relevancia, 10, None))
+    if migrated_conn.dialect.name == "sqlite":
+        assert "eventos_fts VIRTUAL TABLE INDEX" in plan
+        assert "SEARCH eventos USING INTEGER PRIMARY KEY" in plan
+    else:
+        assert "ix_eventos_texto" in plan
+
+
+def test_window_query_uses_interval_index(migrated_conn):
+    from datetime import datetime
+
+    from app import intervalos
+    from app.serialization import evento_out
+
+    stmt, params = intervalos.janela(
+        evento_out.columns, {}, None, datetime(2030, 1, 1), datetime(2030, 1, 8), 10
+    )
+    plan = _plan(migrated_conn, stmt.params(params))
+    # Um intervalo do índice por nível de duração
+    assert plan.count("ix_eventos_duracao_data_inicio") == intervalos.MAX_NIVEL + 1
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.pagination import decode_cursor, encode_cursor
+
+from . import events_service_shim  # noqa: F401
+from .conftest import ADMIN, ORGANIZADOR, criar_evento
+
+
+def test_cursor_roundtrip():
+    when = datetime(2030, 1, 1, 10, 0, 0, 123000)
+    cursor = encode_cursor(when, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (when, 42)
+
+
+@pytest.mark.parametrize(
+    "cursor", ["zzz", encode_cursor("x", 1), encode_cursor(datetime(2030, 1, 1), "1")]
+)
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_inscritos_cursor_walk_breaks_ties_by_user_id(db_client, db_engine):
+    from app.models import Inscricao
+
+    evento_id = criar_evento(db_client, capacidade=10)
+    r = db_client.post(
+        f"/events/{evento_id}/inscricoes", json={"user_ids": list(range(1, 8))}, headers=ADMIN
+    )
+    assert r.status_code == 200
+    # Dois grupos com o mesmo created_at: dentro de cada um só o user_id ordena
+    grupos = (([1, 2, 3], datetime(2030, 1, 1)), ([4, 5, 6, 7], datetime(2030, 1, 2)))
+    with db_engine.begin() as conn:
+        for user_ids, when in grupos:
+            conn.execute(
+                update(Inscricao)
+                .where(Inscricao.evento_id == evento_id, Inscricao.user_id.in_(user_ids))
+                .values(created_at=when)
+            )
+
+    vistos, params = [], {"limit": 2}
+    while True:
+        r = db_client.get(f"/events/{evento_id}/inscritos", params=params, headers=ORGANIZADOR)
+        assert r.status_code == 200
+        body = r.json()
+        vistos += [item["user_id"] for item in body["data"]]
+        if body["nextCursor"] is None:
+            break
+        params = {"limit": 2, "cursor": body["nextCursor"]}
+
+    assert vistos == [7, 6, 5, 4, 3, 2, 1]
+    assert len(body["data"]) == 1
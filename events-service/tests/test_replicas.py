@@ -0,0 +1,143 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+
+from . import events_service_shim  # noqa: F401
+from .conftest import ADMIN, auth_header, evento_payload
+
+
+def _replica(path, nome: str):
+    """Ficheiro SQLite migrado com um evento próprio, para distinguir quem respondeu."""
+    from app.migrations import upgrade
+    from app.models import Evento
+
+    eng = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with eng.connect() as conn:
+        upgrade(conn)
+    with eng.begin() as conn:
+        conn.execute(
+            insert(Evento.__table__).values(
+                nome=nome,
+                descricao="Desc",
+                data_inicio=datetime(2030, 1, 1, 10),
+                local="Porto",
+                capacidade=10,
+                preco=0,
+                tipo="cultural",
+                organizador_id=1,
+                status="agendado",
+            )
+        )
+    return eng
+
+
+@pytest.fixture
+def routed(db_engine, tmp_path, monkeypatch):
+    """Aplicação com o primário em `db_engine` e as réplicas indicadas pelo teste."""
+    from app import db as app_db
+    from app import main as app_main
+    from app.cache import EventCache
+
+    monkeypatch.setattr(app_main, "cache", EventCache(None))
+    monkeypatch.setattr(app_db, "recent_writers", app_db.RecentWriters(window=60))
+
+    def make(*replica_engines):
+        app_db.init_engine(db_engine, replica_engines=list(replica_engines))
+        return TestClient(app_main.create_app())
+
+    yield make
+    app_db.reset_engine()
+
+
+def test_reads_round_robin_across_replicas(routed, tmp_path):
+    client = routed(
+        _replica(tmp_path / "a.db", "réplica A"), _replica(tmp_path / "b.db", "réplica B")
+    )
+
+    nomes = [client.get("/events/1").json()["nome"] for _ in range(4)]
+    assert nomes == ["réplica A", "réplica B", "réplica A", "réplica B"]
+
+
+def test_writes_go_to_primary_and_writer_reads_stay_there(routed, tmp_path):
+    client = routed(_replica(tmp_path / "a.db", "réplica A"))
+    organizador = auth_header({"id": 7, "tipo": "organizador"})
+
+    created = client.post("/events", json=evento_payload(nome="No primário"), headers=organizador)
+    assert created.status_code == 201
+
+    # Quem escreveu lê o primário (vê o próprio evento); os outros leem a réplica
+    assert client.get("/events/1", headers=organizador).json()["nome"] == "No primário"
+    assert client.get("/events/1").json()["nome"] == "réplica A"
+    outro = auth_header({"id": 8, "tipo": "organizador"})
+    assert client.get("/events/1", headers=outro).json()["nome"] == "réplica A"
+
+
+def test_unreachable_replica_is_ejected(routed, tmp_path):
+    from app import db as app_db
+
+    down = create_engine(f"sqlite:///{tmp_path / 'nao-existe' / 'x.db'}")
+    client = routed(down, _replica(tmp_path / "a.db", "réplica A"))
+
+    nomes = [client.get("/events/1").json()["nome"] for _ in range(3)]
+    assert nomes == ["réplica A"] * 3
+    assert app_db.replicas.status() == {"total": 2, "healthy": 1}
+
+
+def test_without_healthy_replicas_reads_use_primary(routed, tmp_path):
+    down = create_engine(f"sqlite:///{tmp_path / 'nao-existe' / 'x.db'}")
+    client = routed(down)
+    assert client.post("/events", json=evento_payload(), headers=ADMIN).status_code == 201
+
+    assert client.get("/events/1").json()["nome"] == "Evento 1"
+
+
+def test_replica_reads_do_not_fill_the_cache(routed, tmp_path, monkeypatch):
+    from app import main as app_main
+    from app.cache import EventCache, MemoryCache
+
+    cache = EventCache(MemoryCache())
+    monkeypatch.setattr(app_main, "cache", cache)
+    client = routed(_replica(tmp_path / "a.db", "réplica A"))
+    assert client.post("/events", json=evento_payload(), headers=ADMIN).status_code == 201
+
+    # A réplica ainda não tem a escrita: o que leu não pode ser servido a quem lê o primário
+    for _ in range(2):
+        assert client.get("/events/1").json()["nome"] == "réplica A"
+        assert client.get("/events").status_code == 200
+    assert cache.stats()["hits"] == 0
+    for _ in range(2):
+        assert client.get("/events/1", headers=ADMIN).json()["nome"] == "Evento 1"
+    assert cache.stats()["hits"] == 1
+
+
+class _RedisStandIn:
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def set(self, key, value, px=None):
+        if self.down:
+            raise ConnectionError("redis em baixo")
+        self.data[key] = value
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis em baixo")
+        return self.data.get(key)
+
+
+def test_redis_recent_writers_are_shared_between_workers():
+    from app.db import RedisRecentWriters
+
+    redis = _RedisStandIn()
+    worker_a, worker_b = RedisRecentWriters(redis, 5), RedisRecentWriters(redis, 5)
+    worker_a.mark(7)
+    assert worker_b.active(7)
+    assert not worker_b.active(8)
+
+    # Sem Redis não se sabe quem escreveu: as leituras vão para o primário
+    redis.down = True
+    worker_a.mark(8)
+    assert worker_b.active(8)
@@ -0,0 +1,89 @@
+import pytest
+
+from . import events_service_shim  # noqa: F401
+from .conftest import ADMIN, evento_payload
+
+
+@pytest.fixture
+def catalogo(db_client):
+    eventos = [
+        ("Concerto de Jazz", "Noite de música ao vivo", "Porto", "cultural"),
+        ("Workshop de Python", "Introdução à programação", "Lisboa", "academico"),
+        ("Festival de Blues", "Blues e jazz até de manhã", "Braga", "lazer"),
+        ("Teatro de rua", "Espetáculo no centro histórico", "Porto", "cultural"),
+        ("Jam session de jazz", "Traga o seu instrumento", "Coimbra", "lazer"),
+        # Sem as palavras pesquisadas: num catálogo tão pequeno o IDF do BM25 depende delas
+        ("Feira do livro", "Livros usados", "Faro", "cultural"),
+        ("Palestra sobre o clima", "Ciência aberta", "Aveiro", "academico"),
+        ("Corrida solidária", "Cinco quilómetros", "Viseu", "lazer"),
+        ("Exposição", "Pintura moderna", "Évora", "cultural"),
+        ("Hackathon", "Quarenta e oito horas", "Leiria", "academico"),
+    ]
+    for nome, descricao, local, tipo in eventos:
+        payload = evento_payload(nome=nome, descricao=descricao, local=local, tipo=tipo)
+        assert db_client.post("/events", json=payload, headers=ADMIN).status_code == 201
+    return db_client
+
+
+def _nomes(response) -> list[str]:
+    assert response.status_code == 200
+    return [e["nome"] for e in response.json()["data"]]
+
+
+def test_search_ranks_by_relevance(catalogo):
+    nomes = _nomes(catalogo.get("/events/search", params={"q": "jazz"}))
+    # Palavra no nome pesa mais do que na descrição
+    assert nomes[-1] == "Festival de Blues"
+    assert set(nomes) == {"Concerto de Jazz", "Festival de Blues", "Jam session de jazz"}
+
+    nomes = _nomes(catalogo.get("/events/search", params={"q": "jazz porto"}))
+    assert nomes[0] == "Concerto de Jazz"
+    assert "Teatro de rua" in nomes
+
+
+def test_search_filters(catalogo):
+    params = {"q": "jazz porto", "tipo": "cultural"}
+    assert _nomes(catalogo.get("/events/search", params=params)) == [
+        "Concerto de Jazz",
+        "Teatro de rua",
+    ]
+    catalogo.patch("/events/4", json={"status": "cancelado"}, headers=ADMIN)
+    params["status"] = "agendado"
+    assert _nomes(catalogo.get("/events/search", params=params)) == ["Concerto de Jazz"]
+
+    params = {"q": "jazz", "from": "2030-01-02T00:00:00"}
+    assert _nomes(catalogo.get("/events/search", params=params)) == []
+
+
+def test_search_cursor_pages(catalogo):
+    vistos = []
+    params = {"q": "jazz porto blues python", "limit": 2}
+    while True:
+        r = catalogo.get("/events/search", params=params)
+        vistos += _nomes(r)
+        if not r.json()["nextCursor"]:
+            break
+        params["cursor"] = r.json()["nextCursor"]
+
+    todos = _nomes(
+        catalogo.get("/events/search", params={"q": "jazz porto blues python", "limit": 100})
+    )
+    assert vistos == todos
+    assert len(todos) == 5
+
+
+def test_search_index_follows_writes(catalogo):
+    catalogo.patch("/events/2", json={"nome": "Workshop de jazz"}, headers=ADMIN)
+    catalogo.delete("/events/1", headers=ADMIN)
+
+    nomes = _nomes(catalogo.get("/events/search", params={"q": "jazz"}))
+    assert "Workshop de jazz" in nomes
+    assert "Concerto de Jazz" not in nomes
+    assert _nomes(catalogo.get("/events/search", params={"q": "python"})) == []
+
+
+def test_search_rejects_invalid_input(catalogo):
+    assert catalogo.get("/events/search", params={"q": "?! de"}).status_code == 400
+    assert catalogo.get("/events/search", params={"q": "jazz", "cursor": "x"}).status_code == 400
+    # Operadores FTS/booleanos são tratados como texto
+    assert _nomes(catalogo.get("/events/search", params={"q": 'NEAR("jazz" OR'})) != []
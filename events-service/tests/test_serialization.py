@@ -0,0 +1,70 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import events_service_shim  # noqa: F401
+from .conftest import ADMIN, estudante, evento_payload
+
+
+def _legacy_body(model, content) -> bytes:
+    """Corpo que o FastAPI produzia a partir de objetos ORM e do `response_model`."""
+    from fastapi.responses import JSONResponse
+
+    return JSONResponse(model.model_validate(content).model_dump(mode="json")).body
+
+
+def test_row_serializer_matches_pydantic_json_mode():
+    from app.schemas import InscricaoOut
+    from app.serialization import inscricao_out
+
+    row = (
+        1,
+        2,
+        "pendente",
+        Decimal("12.50"),
+        datetime(2030, 1, 1, 10, 0, 0, 500),
+        datetime(2030, 1, 2),
+    )
+    assert inscricao_out(row) == InscricaoOut.model_validate(
+        dict(zip(inscricao_out.fields, row))
+    ).model_dump(mode="json")
+
+
+def test_list_and_detail_bodies_are_byte_compatible(db_client, db_engine):
+    from app.models import Evento, Inscricao
+    from app.schemas import EventoOut, PaginatedEventos, PaginatedInscricoes
+    for i in range(3):
+        payload = evento_payload(
+            nome=f"Concerto nº {i} — “Fado”",
+            descricao="Descrição com acentos: ção, ê, ü ☃ " * 20,
+            preco=7.5 + i,
+            data_fim="2030-01-01T12:30:00.250000" if i else None,
+        )
+        assert db_client.post("/events", json=payload, headers=ADMIN).status_code == 201
+    for user_id in (10, 11):
+        assert db_client.post("/events/1/inscrever", headers=estudante(user_id)).status_code == 201
+
+    with Session(db_engine) as db:
+        eventos = db.scalars(select(Evento).order_by(Evento.data_inicio, Evento.id)).all()
+        inscricoes = db.scalars(
+            select(Inscricao).order_by(Inscricao.created_at.desc(), Inscricao.user_id.desc())
+        ).all()
+
+        r = db_client.get("/events", params={"limit": 10})
+        assert r.content == _legacy_body(
+            PaginatedEventos,
+            {"total": 3, "totalPages": 1, "currentPage": 1, "data": eventos, "nextCursor": None},
+        )
+        # Segundo pedido vem da cache e tem de ser igual
+        assert db_client.get("/events", params={"limit": 10}).content == r.content
+
+        r = db_client.get("/events/2")
+        assert r.content == _legacy_body(EventoOut, eventos[1])
+
+        r = db_client.get("/events/1/inscritos", headers=ADMIN)
+        assert r.content == _legacy_body(
+            PaginatedInscricoes,
+            {"total": 2, "totalPages": 1, "currentPage": 1, "data": inscricoes, "nextCursor": None},
+        )